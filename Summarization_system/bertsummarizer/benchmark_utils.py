@@ -0,0 +1,145 @@
+import json
+import time
+from typing import Dict, List, Tuple
+
+from datasets import load_dataset
+from datasets import load_metric
+
+from sentence_separator import SentenceSeparator
+
+
+def create_local_corpus(path: str, dataset_name: str = "cnn_dailymail", num_records: int = 200, data_dir: str = None) -> int:
+    """Stores the first records of a test dataset into a local JSON lines file, so that the checks always run on the same texts.
+
+    Args:
+        path (str): Path of the created corpus file.
+        dataset_name (str, optional): Name of the dataset ('cnn_dailymail' or 'newsroom'). Defaults to "cnn_dailymail".
+        num_records (int, optional): Number of records stored in the corpus. Defaults to 200.
+        data_dir (str, optional): Directory with the manually downloaded dataset (required for 'newsroom'). Defaults to None.
+
+    Returns:
+        int: Number of records stored in the corpus.
+    """
+    # Load the dataset and the names of its text and summary fields
+    if dataset_name == "cnn_dailymail":
+        dataset = load_dataset('cnn_dailymail', '3.0.0', split="test")
+        text_key, summary_key = "article", "highlights"
+    elif dataset_name == "newsroom":
+        dataset = load_dataset('newsroom', data_dir=data_dir, split="test")
+        dataset = dataset.filter(lambda test_case: test_case['density_bin'] == 'extractive')
+        text_key, summary_key = "text", "summary"
+    else:
+        raise ValueError("Unsupported dataset '" + str(dataset_name) + "'. Supported datasets: cnn_dailymail, newsroom.")
+
+    # Write one record per line
+    num_written = 0
+    with open(path, "w", encoding="utf-8") as corpus_file:
+        for test_case in dataset:
+            if num_written == num_records:
+                break
+            corpus_file.write(json.dumps({"text": test_case[text_key], "summary": test_case[summary_key]}) + "\n")
+            num_written += 1
+
+    return num_written
+
+
+def load_local_corpus(path: str) -> List[Dict[str, str]]:
+    """Loads the records of a local corpus file created by create_local_corpus.
+
+    Args:
+        path (str): Path of the corpus file.
+
+    Returns:
+        List[Dict[str, str]]: Records of the corpus, each containing a "text" and a "summary".
+    """
+    with open(path, "r", encoding="utf-8") as corpus_file:
+        return [json.loads(line) for line in corpus_file if line.strip()]
+
+
+def gold_summary_lengths(corpus: List[Dict[str, str]]) -> List[int]:
+    """Counts the sentences of every gold summary in the corpus (summaries of the model have the same number of sentences).
+
+    Args:
+        corpus (List[Dict[str, str]]): Records of the corpus.
+
+    Returns:
+        List[int]: Number of sentences of each gold summary.
+    """
+    sent_sep = SentenceSeparator()
+    return [len(sentences) for sentences in sent_sep.process_contents((record["summary"] for record in corpus), min_length=20)]
+
+
+def select_summary_sentences(summarizer, corpus: List[Dict[str, str]], num_sentences: List[int], min_length: int = 40) -> Tuple[List[List[str]], float]:
+    """Selects the summary sentences of every text in the corpus.
+
+    Args:
+        summarizer (SummarizerModel): Model used to select the sentences.
+        corpus (List[Dict[str, str]]): Records of the corpus.
+        num_sentences (List[int]): Number of sentences selected for each text.
+        min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+
+    Returns:
+        Tuple[List[List[str]], float]: Selected sentences of each text, elapsed time in seconds.
+    """
+    selected_sentences = []
+    start_time = time.perf_counter()
+    for record, num in zip(corpus, num_sentences):
+        sentences = summarizer.separate_sentences(content=record["text"], min_length=min_length)
+        if sentences:
+            sentences, _ = summarizer.cluster_sentences(content_sents=sentences, num_sentences=num, use_first_sent=False)
+        selected_sentences.append(sentences)
+
+    return selected_sentences, time.perf_counter() - start_time
+
+
+def compute_rouge(predictions: List[str], references: List[str]) -> Dict[str, float]:
+    """Computes the ROUGE F-measures of the predicted summaries.
+
+    Args:
+        predictions (List[str]): Summaries created by the model.
+        references (List[str]): Gold summaries.
+
+    Returns:
+        Dict[str, float]: Mid F-measure of the ROUGE-1, ROUGE-2, ROUGE-L and ROUGE-L(sum) scores.
+    """
+    metric = load_metric('rouge', seed=12345)
+    score = metric.compute(predictions=predictions, references=references)
+    return {rouge_type: score[rouge_type].mid.fmeasure for rouge_type in ("rouge1", "rouge2", "rougeL", "rougeLsum")}
+
+
+def selection_agreement(reference_selection: List[List[str]], candidate_selection: List[List[str]]) -> Dict[str, float]:
+    """Compares the sentences selected by two models for the same texts.
+
+    Args:
+        reference_selection (List[List[str]]): Sentences selected by the reference model for each text.
+        candidate_selection (List[List[str]]): Sentences selected by the compared model for each text.
+
+    Returns:
+        Dict[str, float]: Share of texts with identical selections ("exact_match") and the mean Jaccard similarity of the selections ("mean_jaccard").
+    """
+    exact_matches = 0
+    jaccard_sum = 0.0
+    for reference, candidate in zip(reference_selection, candidate_selection):
+        reference, candidate = set(reference), set(candidate)
+        exact_matches += int(reference == candidate)
+        # Two empty selections are identical
+        jaccard_sum += len(reference & candidate) / len(reference | candidate) if reference | candidate else 1.0
+
+    num_texts = max(len(reference_selection), 1)
+    return {"exact_match": exact_matches / num_texts, "mean_jaccard": jaccard_sum / num_texts}
+
+
+def format_stage_times(trace: Dict[str, Dict], num_documents: int) -> str:
+    """Formats the mean wall time of every stage recorded by a trace (see profiling.StageTrace.to_dict) per document.
+
+    Args:
+        trace (Dict[str, Dict]): Records of the trace.
+        num_documents (int): Number of documents summarized while the trace was active.
+
+    Returns:
+        str: Stage times in milliseconds per document, followed by the mean numbers of sentences and tokens per document.
+    """
+    num_documents = max(num_documents, 1)
+    parts = [name + " " + str(round(stage["wall_ms"] / num_documents, 2)) + " ms" for name, stage in trace["stages"].items()]
+    parts.extend(name + " " + str(round(value / num_documents, 1)) for name, value in trace["counts"].items())
+    return ", ".join(parts)
@@ -1,8 +1,55 @@
-from typing import List, Union, Tuple
+import contextlib
+import os
+import re
+import tempfile
+import warnings
+from functools import lru_cache
+from typing import Dict, List, Union, Tuple
 
 import numpy as np
 import torch
 from transformers import BertModel,BertTokenizer
+from transformers import DistilBertModel, DistilBertTokenizer
+
+from compiled_encoder import SUPPORTED_FORMATS, export_encoder, load_encoder
+from profiling import count, record_batch_shape, stage, traced
+from weight_snapshot import SNAPSHOT_WEIGHTS_NAME, has_model_snapshot, save_model_snapshot, attach_weight_snapshot, skip_weight_initialization
+
+
+# Engines which can run the forward pass of the BertModel (compiled engines run a graph exported by compiled_encoder.py)
+SUPPORTED_ENGINES = ('eager', 'quantized') + SUPPORTED_FORMATS
+
+# Numerical precisions of the encoder computation (bfloat16 runs under CPU autocast)
+SUPPORTED_PRECISIONS = ('float32', 'bfloat16')
+
+# Data types in which the sentence embeddings are stored
+SUPPORTED_EMBEDDING_DTYPES = ('float32', 'float16')
+
+# Ways of pooling the hidden states of a sentence into its embedding ('mean' of its tokens or the state of the '[CLS]' token)
+SUPPORTED_POOLINGS = ('mean', 'cls')
+
+# Model and tokenizer classes of the supported architectures
+SUPPORTED_ARCHITECTURES = {
+    'bert': (BertModel, BertTokenizer),
+    'distilbert': (DistilBertModel, DistilBertTokenizer),
+}
+
+# Whitespace on which the BertTokenizer splits the text (its remaining steps only work within the words between whitespace)
+WHITESPACE_PATTERN = re.compile("[ \t\n\r\u00a0\u1680\u2000-\u200a\u202f\u205f\u3000]+")
+
+
+def cpu_supports_bfloat16() -> bool:
+    """Checks whether the CPU has native bfloat16 instructions (AVX512-BF16 or AMX-BF16), without which bfloat16 matmuls are emulated and slower than float32.
+
+    Returns:
+        bool: Whether the CPU supports bfloat16 natively.
+    """
+    try:
+        with open("/proc/cpuinfo", "r") as cpuinfo:
+            flags = set(" ".join(line for line in cpuinfo if line.startswith("flags")).split())
+    except OSError:
+        return False
+    return bool(flags & {"avx512_bf16", "amx_bf16"})
 
 
 class BertWrapper(object):
@@ -12,9 +59,35 @@ class BertWrapper(object):
         __device: torch.device
             A device on which the model runs.
         __model: BertModel
-            An instance of the BertModel class.
+            An instance of the BertModel class (None for the compiled engines).
         __tokenizer: BertTokenizer
             An instance of the BertTokenizer class.
+        __fast_tokenizer: tokenizers.BertWordPieceTokenizer
+            A fast (Rust) tokenizer sharing the vocabulary of the BertTokenizer (None if the *tokenizers* package isn't installed or it wasn't requested).
+        __word_token_ids: Callable
+            Memoized conversion of a single word into its vocabulary IDs (by the fast tokenizer if it's available).
+        __model_version: str
+            Version of the BERT model.
+        __architecture: str
+            Architecture of the BERT model ('bert' or 'distilbert').
+        __inference_mode: bool
+            Whether the embeddings are computed without autograd, running only the layers up to the deepest requested one.
+        __engine: str
+            Engine which runs the forward pass of the BertModel ('eager', 'quantized', 'torchscript' or 'onnx').
+        __precision: str
+            Numerical precision of the encoder computation ('float32' or 'bfloat16').
+        __pooling: str
+            Way of pooling the hidden states of a sentence into its embedding ('mean' or 'cls').
+        __embedding_dtype: np.dtype
+            Data type in which the sentence embeddings are stored (float32 or float16).
+        __compiled_encoder: Callable
+            Exported graph of the encoder and pooling step which replaces the BertModel (None for the 'eager' and 'quantized' engines).
+        __compiled_layers: List[int]
+            Non-negative indices of the hidden layers pooled by the compiled encoder.
+        __num_hidden_layers: int
+            Number of transformer layers of the BERT model.
+        __hidden_size: int
+            Dimension of the hidden states of the BERT model.
 
     Methods:
         get_model():
@@ -23,34 +96,166 @@ class BertWrapper(object):
             Retrieves an instance of the BertTokenizer class stored in a private class variable.
         get_device():
             Retrieves a torch.device object stored in a private class variable.
+        get_model_version():
+            Retrieves the version of the BERT model stored in a private class variable.
+        get_architecture():
+            Retrieves the architecture of the BERT model stored in a private class variable.
+        get_num_hidden_layers():
+            Retrieves the number of transformer layers stored in a private class variable.
+        get_inference_mode():
+            Retrieves the inference mode flag stored in a private class variable.
+        get_engine():
+            Retrieves the name of the engine stored in a private class variable.
+        get_precision():
+            Retrieves the numerical precision of the encoder computation stored in a private class variable.
+        get_pooling():
+            Retrieves the way of pooling the hidden states stored in a private class variable.
+        get_embedding_dtype():
+            Retrieves the data type of the sentence embeddings stored in a private class variable.
+        get_compiled_encoder():
+            Retrieves the compiled encoder stored in a private class variable.
+        export_compiled_encoder(path: str, hidden_layers: Union[List[int], int] = -2, export_format: str = 'torchscript'):
+            Exports the encoder and pooling step of the BertModel into a graph which can be loaded by the compiled engines.
+        normalize_hidden_layers(hidden_layers: Union[List[int], int] = -2):
+            Converts the (possibly negative) hidden layer indices into non-negative indices of the BertModel hidden states.
         tokenize_text(text: str):
             Splits the text into meaningful tokens using an instance of BertTokenizer.
         convert_tokens_into_ids(text_tokens: List[str]):
             Converts the tokens into their vocabulary IDs using an instance of BertTokenizer.
         prepare_input(text: str):
             Splits the text onto meaningful tokens and converts the tokens into their vocabulary IDs.
-        forward_pass(token_ids: torch.LongTensor):
+        tokenize_batch(texts: List[str]):
+            Converts every text of a batch into its vocabulary IDs in one call.
+        encode_batch(texts: List[str]):
+            Converts the texts into padded vocabulary IDs and the matching attention mask.
+        pad_token_ids(token_ids: List[List[int]]):
+            Pads the vocabulary IDs of several texts to the same length and creates the matching attention mask.
+        forward_pass(token_ids: torch.LongTensor, attention_mask: torch.LongTensor = None):
             Runs a forward pass on an instance of a BertModel.
+        compute_hidden_states(token_ids: torch.LongTensor, attention_mask: torch.LongTensor = None, hidden_layers: Union[List[int], int] = -2):
+            Computes the hidden states of the requested layer(s) of the BertModel.
+        pool_hidden_states(hidden_states: Dict[int, torch.FloatTensor], attention_mask: torch.LongTensor, hidden_layers: Union[List[int], int] = -2):
+            Computes the embeddings of a padded batch by pooling (a masked mean value or the '[CLS]' token) the specified hidden layer(s) of the BertModel.
+        embed_token_batch(token_ids: torch.LongTensor, attention_mask: torch.LongTensor, hidden_layers: Union[List[int], int] = -2):
+            Computes the embeddings of a padded batch using the engine specified upon class initialization.
         create_sent_embedding(text: str, hidden_layers: Union[List[int], int] = -2):
-            Computes the embedding of the input text by taking a mean value of the specified hidden layer(s) of the BertModel.
-        create_embedding_matrix(content: List[str], hidden_layers: Union[List[int], int] = -2):
+            Computes the embedding of the input text by taking a mean value (or the '[CLS]' token) of the specified hidden layer(s) of the BertModel.
+        create_batch_embeddings(content: List[str], hidden_layers: Union[List[int], int] = -2, batch_size: int = 32):
+            Computes the embedding for each input sentence by running one forward pass per batch of sentences with a similar number of tokens.
+        create_embedding_matrix(content: List[str], hidden_layers: Union[List[int], int] = -2, batch_size: int = 1):
             Computes the embedding for each input sentence by running a forward pass and taking a mean value of specified hidden layer(s) of the BertModel.
+        map_char_spans_to_tokens(content: str, char_spans: List[Tuple[int, int]]):
+            Converts the whole text into vocabulary IDs and maps the character spans of its sentences onto word-piece positions.
+        create_document_embeddings(content: str, char_spans: List[Tuple[int, int]], hidden_layers: Union[List[int], int] = -2, window_size: int = 512, stride: int = 256, batch_size: int = 8):
+            Computes the embedding for each sentence of a text by encoding the whole text in overlapping windows and pooling each sentence's word pieces.
     """
 
-    def __init__(self, model_version: str = 'bert-large-uncased'):
+    def __init__(self, model_version: str = 'bert-large-uncased', inference_mode: bool = True, engine: str = 'eager', compiled_model_path: str = None, fast_tokenizer: bool = True, word_cache_size: int = 65536, architecture: str = 'bert', num_layers: int = None, tokenizer_version: str = None, snapshot_dir: str = None, precision: str = 'float32', embedding_dtype: str = 'float32', pooling: str = 'mean'):
         """Initializes an instance of the BertWrapper class.
 
         Args:
             model_version (str, optional): Version of the BERT model. Defaults to 'bert-large-uncased'.
+            inference_mode (bool, optional): Whether the embeddings are computed without autograd, running only the layers up to the deepest requested one. Defaults to True.
+            engine (str, optional): Engine which runs the forward pass of the BertModel. The 'quantized' engine applies dynamic int8 quantization to the Linear layers and runs on the CPU. The 'torchscript' and 'onnx' engines run a graph exported by export_compiled_encoder instead of the BertModel. Defaults to 'eager'.
+            compiled_model_path (str, optional): Path of the exported graph (required by the 'torchscript' and 'onnx' engines). Defaults to None.
+            fast_tokenizer (bool, optional): Whether the words missing from the memoized vocabulary IDs are tokenized by the fast tokenizer of the *tokenizers* package (if it is installed). Defaults to True.
+            word_cache_size (int, optional): Maximum number of words whose vocabulary IDs are memoized by the tokenization. Defaults to 65536.
+            architecture (str, optional): Architecture of the BERT model ('bert' or 'distilbert'). Defaults to 'bert'.
+            num_layers (int, optional): Number of transformer layers which are kept (the remaining layers of a deeper model are dropped). Defaults to None (all layers).
+            tokenizer_version (str, optional): Version of the tokenizer. Defaults to None (the same as the model version).
+            snapshot_dir (str, optional): Directory of a model snapshot (see weight_snapshot.py). The 'eager' engine loads the configuration and tokenizer from the snapshot and memory-maps its weights instead of parsing the checkpoint, so it starts faster and worker processes share the weights. The snapshot is created if it doesn't exist, and recreated if it was stored for another model (version, architecture, number of layers or tokenizer). Defaults to None.
+            precision (str, optional): Numerical precision of the encoder computation of the 'eager' engine. 'bfloat16' runs the encoder under CPU autocast (it falls back to 'float32' if the CPU or PyTorch lacks bfloat16 support). Defaults to 'float32'.
+            embedding_dtype (str, optional): Data type in which the sentence embeddings are returned ('float32' or 'float16'). Defaults to 'float32'.
+            pooling (str, optional): Way of pooling the hidden states of a sentence into its embedding. 'mean' takes the mean value of the states of its tokens, 'cls' surrounds the sentence with the '[CLS]' and '[SEP]' tokens and takes the state of the '[CLS]' token. The 'document' embedding mode always takes the mean value. Defaults to 'mean'.
         """
-        # Set the device to *gpu* if it's available 
-        self.__device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        # Initialize the BERT model
-        self.__model = BertModel.from_pretrained(model_version, output_hidden_states=True).to(self.__device)
+        if architecture not in SUPPORTED_ARCHITECTURES:
+            raise ValueError("Unsupported architecture '" + str(architecture) + "'. Supported architectures: " + ", ".join(SUPPORTED_ARCHITECTURES) + ".")
+        if engine not in SUPPORTED_ENGINES:
+            raise ValueError("Unsupported engine '" + str(engine) + "'. Supported engines: " + ", ".join(SUPPORTED_ENGINES) + ".")
+        if engine in SUPPORTED_FORMATS and compiled_model_path is None:
+            raise ValueError("The '" + engine + "' engine requires the path of the exported graph (compiled_model_path).")
+        if snapshot_dir is not None and engine != 'eager':
+            raise ValueError("Model snapshots can only be used by the 'eager' engine.")
+        if precision not in SUPPORTED_PRECISIONS:
+            raise ValueError("Unsupported precision '" + str(precision) + "'. Supported precisions: " + ", ".join(SUPPORTED_PRECISIONS) + ".")
+        if precision != 'float32' and engine != 'eager':
+            raise ValueError("The '" + precision + "' precision can only be used by the 'eager' engine.")
+        if embedding_dtype not in SUPPORTED_EMBEDDING_DTYPES:
+            raise ValueError("Unsupported embedding data type '" + str(embedding_dtype) + "'. Supported data types: " + ", ".join(SUPPORTED_EMBEDDING_DTYPES) + ".")
+        if pooling not in SUPPORTED_POOLINGS:
+            raise ValueError("Unsupported pooling '" + str(pooling) + "'. Supported poolings: " + ", ".join(SUPPORTED_POOLINGS) + ".")
+        if pooling != 'mean' and engine in SUPPORTED_FORMATS:
+            raise ValueError("The '" + engine + "' engine runs a graph which pools the mean value, so it can't use the '" + pooling + "' pooling.")
+
+        # Set the device to *gpu* if it's available (dynamically quantized models and ONNX graphs only run on the *cpu*)
+        self.__device = torch.device("cuda" if torch.cuda.is_available() and engine not in ('quantized', 'onnx') else "cpu")
+        model_class, tokenizer_class = SUPPORTED_ARCHITECTURES[architecture]
+        self.__architecture = architecture
+        # Settings identifying the model of a snapshot (a snapshot of another model is recreated instead of being loaded)
+        snapshot_identity = {"model_version": model_version, "architecture": architecture, "num_layers": num_layers,
+                             "tokenizer_version": tokenizer_version if tokenizer_version is not None else model_version}
+        snapshot_exists = snapshot_dir is not None and has_model_snapshot(snapshot_dir, snapshot_identity)
+        if snapshot_dir is not None and not snapshot_exists and has_model_snapshot(snapshot_dir):
+            warnings.warn("The snapshot at '" + snapshot_dir + "' was stored for another model, it is recreated from '" + model_version + "'.")
         # Initialize the BERT tokenizer
-        self.__tokenizer = BertTokenizer.from_pretrained(model_version)
-        # Set the BERT model to 'evaluation mode'
-        self.__model.eval()
+        if snapshot_exists:
+            self.__tokenizer = tokenizer_class.from_pretrained(snapshot_dir)
+        else:
+            self.__tokenizer = tokenizer_class.from_pretrained(tokenizer_version if tokenizer_version is not None else model_version)
+        self.__fast_tokenizer = self.__create_fast_tokenizer() if fast_tokenizer else None
+        self.__word_token_ids = lru_cache(maxsize=word_cache_size)(self.__convert_word_into_ids)
+
+        if engine in SUPPORTED_FORMATS:
+            # The exported graph replaces the BertModel, so the model checkpoint is never loaded
+            self.__model = None
+            self.__compiled_encoder, metadata = load_encoder(compiled_model_path, self.__device)
+            if metadata["model_version"] != model_version:
+                raise ValueError("The graph at '" + compiled_model_path + "' was exported from '" + metadata["model_version"] + "', not from '" + model_version + "'.")
+            self.__compiled_layers = metadata["hidden_layers"]
+            self.__num_hidden_layers = metadata["num_hidden_layers"]
+            self.__hidden_size = metadata["hidden_size"]
+        else:
+            # Initialize the BERT model (the weights of an existing snapshot replace the initial weights, so neither the checkpoint is loaded nor the weights are initialized)
+            if snapshot_exists:
+                with skip_weight_initialization(model_class):
+                    self.__model = model_class(model_class.config_class.from_pretrained(snapshot_dir))
+            else:
+                self.__model = model_class.from_pretrained(model_version, output_hidden_states=True)
+            # Drop the transformer layers above the requested depth
+            if num_layers is not None and num_layers < self.__model.config.num_hidden_layers:
+                transformer_layers = self.__layer_modules()
+                del transformer_layers[num_layers:]
+                if architecture == 'distilbert':
+                    self.__model.config.n_layers = num_layers
+                    self.__model.transformer.n_layers = num_layers
+                else:
+                    self.__model.config.num_hidden_layers = num_layers
+            # Back the weights by the memory-mapped snapshot (created from the loaded checkpoint on the first run)
+            if snapshot_dir is not None:
+                if not snapshot_exists:
+                    save_model_snapshot(self.__model, self.__tokenizer, snapshot_dir, identity=snapshot_identity)
+                attach_weight_snapshot(self.__model, os.path.join(snapshot_dir, SNAPSHOT_WEIGHTS_NAME))
+            self.__model.to(self.__device)
+            # Set the BERT model to 'evaluation mode'
+            self.__model.eval()
+            # Replace the Linear layers with their dynamically quantized (int8) counterparts
+            if engine == 'quantized':
+                self.__model = torch.quantization.quantize_dynamic(self.__model, {torch.nn.Linear}, dtype=torch.qint8)
+            self.__compiled_encoder = None
+            self.__compiled_layers = None
+            self.__num_hidden_layers = self.__model.config.num_hidden_layers
+            self.__hidden_size = self.__model.config.hidden_size
+
+        self.__model_version = model_version
+        self.__inference_mode = inference_mode
+        self.__engine = engine
+        self.__embedding_dtype = np.dtype(embedding_dtype)
+        self.__pooling = pooling
+        # CPU autocast exists since PyTorch 1.10 and is only faster than float32 with native bfloat16 instructions
+        if precision == 'bfloat16' and (self.__device.type != "cpu" or not hasattr(torch, "cpu") or not hasattr(torch.cpu, "amp") or not cpu_supports_bfloat16()):
+            warnings.warn("bfloat16 CPU autocast isn't supported by this CPU or PyTorch version, the encoder runs in float32.")
+            precision = 'float32'
+        self.__precision = precision
     
 
     def get_model(self) -> BertModel:
@@ -80,6 +285,121 @@ class BertWrapper(object):
         return self.__device
 
 
+    def get_model_version(self) -> str:
+        """Retrieves the version of the BERT model stored in a private class variable.
+
+        Returns:
+            str: Version of the BERT model (specified upon class initialization).
+        """
+        return self.__model_version
+
+
+    def get_architecture(self) -> str:
+        """Retrieves the architecture of the BERT model stored in a private class variable.
+
+        Returns:
+            str: Architecture of the BERT model ('bert' or 'distilbert').
+        """
+        return self.__architecture
+
+
+    def get_num_hidden_layers(self) -> int:
+        """Retrieves the number of transformer layers stored in a private class variable.
+
+        Returns:
+            int: Number of transformer layers of the BERT model (after dropping the layers above the requested depth).
+        """
+        return self.__num_hidden_layers
+
+
+    def get_inference_mode(self) -> bool:
+        """Retrieves the inference mode flag stored in a private class variable.
+
+        Returns:
+            bool: Whether the embeddings are computed without autograd, running only the layers up to the deepest requested one.
+        """
+        return self.__inference_mode
+
+
+    def get_engine(self) -> str:
+        """Retrieves the name of the engine stored in a private class variable.
+
+        Returns:
+            str: Engine which runs the forward pass of the BertModel.
+        """
+        return self.__engine
+
+
+    def get_precision(self) -> str:
+        """Retrieves the numerical precision of the encoder computation stored in a private class variable.
+
+        Returns:
+            str: Numerical precision of the encoder computation ('float32', or 'bfloat16' if it is supported).
+        """
+        return self.__precision
+
+
+    def get_pooling(self) -> str:
+        """Retrieves the way of pooling the hidden states stored in a private class variable.
+
+        Returns:
+            str: Way of pooling the hidden states of a sentence into its embedding ('mean' or 'cls').
+        """
+        return self.__pooling
+
+
+    def get_embedding_dtype(self) -> np.dtype:
+        """Retrieves the data type of the sentence embeddings stored in a private class variable.
+
+        Returns:
+            np.dtype: Data type in which the sentence embeddings are returned.
+        """
+        return self.__embedding_dtype
+
+
+    def get_compiled_encoder(self):
+        """Retrieves the compiled encoder stored in a private class variable.
+
+        Returns:
+            Callable: Exported graph of the encoder and pooling step (None for the 'eager' and 'quantized' engines).
+        """
+        return self.__compiled_encoder
+
+
+    def export_compiled_encoder(self, path: str, hidden_layers: Union[List[int], int] = -2, export_format: str = 'torchscript') -> Dict[str, Union[str, int, List[int]]]:
+        """Exports the encoder and pooling step of the BertModel into a graph which can be loaded by the compiled engines.
+
+        Args:
+            path (str): Path of the exported graph.
+            hidden_layers (Union[List[int], int], optional): Hidden layer(s) from which the embeddings are calculated by the graph. Defaults to -2.
+            export_format (str, optional): Format of the exported graph ('torchscript' or 'onnx'). Defaults to 'torchscript'.
+
+        Returns:
+            Dict[str, Union[str, int, List[int]]]: Metadata of the exported graph.
+        """
+        if self.__engine != 'eager' or self.__architecture != 'bert':
+            raise ValueError("The encoder can only be exported from the 'eager' engine of the 'bert' architecture.")
+        return export_encoder(self.__model, path, self.normalize_hidden_layers(hidden_layers), self.__model_version, export_format=export_format)
+
+
+    def normalize_hidden_layers(self, hidden_layers: Union[List[int], int] = -2) -> List[int]:
+        """Converts the (possibly negative) hidden layer indices into non-negative indices of the BertModel hidden states.
+
+        Args:
+            hidden_layers (Union[List[int], int], optional): Hidden layer(s) of the BertModel. Defaults to -2.
+
+        Returns:
+            List[int]: Indices of the hidden layer(s), where 0 is the output of the embedding layer and the last index is the output of the last transformer layer.
+        """
+        # The hidden states consist of the embedding layer output followed by the output of every transformer layer
+        num_hidden_states = self.__num_hidden_layers + 1
+        layers = [hidden_layers] if type(hidden_layers) == int else hidden_layers
+        for index in layers:
+            if not -num_hidden_states <= index < num_hidden_states:
+                raise IndexError("Hidden layer index " + str(index) + " is out of range for a model with " + str(num_hidden_states) + " hidden states.")
+        return [index % num_hidden_states for index in layers]
+
+
     def tokenize_text(self, text:str ) -> List[str]:
         """Splits the text into meaningful tokens using an instance of BertTokenizer.
 
@@ -113,30 +433,265 @@ class BertWrapper(object):
         Returns:
             torch.tensor: Vocabulary IDs of the tokenized input text.
         """
-        # Split text onto meaningful tokens
-        tokenized_text = self.tokenize_text(text)
-        # Convert tokens into vocabulary IDs
-        token_ids = self.convert_tokens_into_ids(tokenized_text)
+        # Convert the text into vocabulary IDs (using the memoized IDs of its words, see tokenize_batch)
+        token_ids = self.__add_special_tokens(self.tokenize_batch([text])[0])
 
         return torch.tensor([token_ids]).type(torch.LongTensor).to(self.__device)
 
 
-    def forward_pass(self, token_ids: torch.LongTensor ) -> Tuple[torch.FloatTensor, torch.FloatTensor ,torch.FloatTensor] :
+    @traced('tokenize')
+    def tokenize_batch(self, texts: List[str] ) -> List[List[int]] :
+        """Converts every text of a batch into its vocabulary IDs in one call.
+
+        The texts are split on whitespace and the vocabulary IDs of every word are memoized, so frequent words are tokenized only once.
+        The words which aren't memoized yet are tokenized by the fast tokenizer (or by the BertTokenizer without it). Both produce the same
+        IDs as tokenize_text followed by convert_tokens_into_ids, since the BertTokenizer never merges word pieces across whitespace.
+
+        Args:
+            texts (List[str]): Texts being tokenized and converted to vocabulary IDs.
+
+        Returns:
+            List[List[int]]: Vocabulary IDs of each text.
+        """
+        batch_token_ids = []
+        for text in texts:
+            token_ids = []
+            for word in WHITESPACE_PATTERN.split(text):
+                if word:
+                    token_ids.extend(self.__word_token_ids(word))
+            batch_token_ids.append(token_ids)
+        count('tokens', sum(len(token_ids) for token_ids in batch_token_ids))
+        return batch_token_ids
+
+
+    def encode_batch(self, texts: List[str] ) -> Tuple[np.ndarray, np.ndarray] :
+        """Converts the texts into padded vocabulary IDs and the matching attention mask.
+
+        Args:
+            texts (List[str]): Texts being tokenized and converted to vocabulary IDs.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Padded vocabulary IDs of the texts, attention mask marking the positions which are not padding.
+        """
+        return self.__pad_arrays(self.tokenize_batch(texts))
+
+
+    def pad_token_ids(self, token_ids: List[List[int]] ) -> Tuple[torch.LongTensor, torch.LongTensor] :
+        """Pads the vocabulary IDs of several texts to the same length and creates the matching attention mask.
+
+        Args:
+            token_ids (List[List[int]]): Vocabulary IDs of each text in the batch.
+
+        Returns:
+            Tuple[torch.LongTensor, torch.LongTensor]: Padded vocabulary IDs of the batch, attention mask marking the positions which are not padding.
+        """
+        padded_ids, attention_mask = self.__pad_arrays(token_ids)
+        return torch.from_numpy(padded_ids).to(self.__device), torch.from_numpy(attention_mask).to(self.__device)
+
+
+    def __pad_arrays(self, token_ids: List[List[int]] ) -> Tuple[np.ndarray, np.ndarray] :
+        """Pads the vocabulary IDs of several texts to the same length and creates the matching attention mask.
+
+        Args:
+            token_ids (List[List[int]]): Vocabulary IDs of each text in the batch.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Padded vocabulary IDs of the batch, attention mask marking the positions which are not padding.
+        """
+        # Allocate the arrays using the length of the longest text in the batch
+        max_length = max([len(ids) for ids in token_ids], default=0)
+        padded_ids = np.full((len(token_ids), max_length), self.__tokenizer.pad_token_id, dtype=np.int64)
+        attention_mask = np.zeros((len(token_ids), max_length), dtype=np.int64)
+        # Copy the IDs of each text and mark their positions in the attention mask
+        for row, ids in enumerate(token_ids):
+            padded_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        return padded_ids, attention_mask
+
+
+    def __autocast(self):
+        """Creates the autocast context of the encoder computation.
+
+        Returns:
+            ContextManager: bfloat16 CPU autocast for the 'bfloat16' precision, an empty context otherwise.
+        """
+        if self.__precision == 'bfloat16':
+            return torch.cpu.amp.autocast(dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
+
+    def __layer_modules(self) -> torch.nn.ModuleList:
+        """Retrieves the transformer layers of the model.
+
+        Returns:
+            torch.nn.ModuleList: Transformer layers of the model, from the first to the last one.
+        """
+        if self.__architecture == 'distilbert':
+            return self.__model.transformer.layer
+        return self.__model.encoder.layer
+
+
+    def __add_special_tokens(self, token_ids: List[int] ) -> List[int] :
+        """Surrounds the vocabulary IDs of a sentence with the '[CLS]' and '[SEP]' tokens if the sentence is pooled by its '[CLS]' token.
+
+        Args:
+            token_ids (List[int]): Vocabulary IDs of the sentence.
+
+        Returns:
+            List[int]: Vocabulary IDs which go through the model (unchanged for the 'mean' pooling).
+        """
+        if self.__pooling == 'cls':
+            return [self.__tokenizer.cls_token_id] + list(token_ids) + [self.__tokenizer.sep_token_id]
+        return token_ids
+
+
+    def __convert_word_into_ids(self, word: str ) -> Tuple[int] :
+        """Converts a single word (text without whitespace) into its vocabulary IDs.
+
+        Args:
+            word (str): Word being tokenized and converted to vocabulary IDs.
+
+        Returns:
+            Tuple[int]: Vocabulary IDs of the word.
+        """
+        if self.__fast_tokenizer is not None:
+            return tuple(self.__fast_tokenizer.encode(word, add_special_tokens=False).ids)
+        return tuple(self.convert_tokens_into_ids(self.tokenize_text(word)))
+
+
+    def __create_fast_tokenizer(self):
+        """Creates a fast tokenizer which shares the vocabulary of the BertTokenizer.
+
+        Returns:
+            tokenizers.BertWordPieceTokenizer: An initialized fast tokenizer (None if the *tokenizers* package isn't installed).
+        """
+        try:
+            from tokenizers import BertWordPieceTokenizer
+        except ImportError:
+            return None
+
+        # The fast tokenizer reads the vocabulary from a file
+        with tempfile.TemporaryDirectory() as vocab_dir:
+            vocab_file = self.__tokenizer.save_vocabulary(vocab_dir)[0]
+            return BertWordPieceTokenizer(vocab_file, lowercase=self.__tokenizer.basic_tokenizer.do_lower_case)
+
+
+    def forward_pass(self, token_ids: torch.LongTensor, attention_mask: torch.LongTensor = None ) -> Tuple[torch.FloatTensor, torch.FloatTensor ,torch.FloatTensor] :
         """Runs a forward pass on an instance of a BertModel.
 
         Args:
             token_ids (torch.LongTensor): Vocabulary IDs of a text going through the model.
+            attention_mask (torch.LongTensor, optional): Mask of the padded positions in a batch of texts. Defaults to None.
 
         Returns:
-            Tuple[torch.FloatTensor, torch.FloatTensor ,torch.FloatTensor]: Sequence of hidden states at the output of the last layer of the BertModel, hidden state of the first token in the sequence at the output of the BertModel, hidden states of all layers of the BertModel. 
+            Tuple[torch.FloatTensor, torch.FloatTensor ,torch.FloatTensor]: Sequence of hidden states at the output of the last layer of the BertModel, hidden state of the first token in the sequence at the output of the BertModel, hidden states of all layers of the BertModel.
         """
-        # Run a forward pass and return the values
-        last_hidden_state, pooler_output, hidden_states = self.__model(token_ids)
+        if self.__model is None:
+            raise RuntimeError("The '" + self.__engine + "' engine doesn't run a BertModel forward pass.")
+        # Run a forward pass and return the values (DistilBertModel has no pooler)
+        if self.__architecture == 'distilbert':
+            last_hidden_state, hidden_states = self.__model(token_ids, attention_mask=attention_mask)
+            return last_hidden_state, None, hidden_states
+        last_hidden_state, pooler_output, hidden_states = self.__model(token_ids, attention_mask=attention_mask)
         return last_hidden_state, pooler_output, hidden_states
 
 
+    @traced('forward_pass')
+    def compute_hidden_states(self, token_ids: torch.LongTensor, attention_mask: torch.LongTensor = None, hidden_layers: Union[List[int], int] = -2) -> Dict[int, torch.FloatTensor]:
+        """Computes the hidden states of the requested layer(s) of the BertModel.
+
+        In inference mode the computation runs without autograd and stops after the deepest requested layer, so the remaining
+        transformer layers are never executed and the hidden states of the layers which weren't requested aren't kept.
+
+        Args:
+            token_ids (torch.LongTensor): Vocabulary IDs of a text going through the model.
+            attention_mask (torch.LongTensor, optional): Mask of the padded positions in a batch of texts. Defaults to None.
+            hidden_layers (Union[List[int], int], optional): Hidden layer(s) whose states will be returned. Defaults to -2.
+
+        Returns:
+            Dict[int, torch.FloatTensor]: Hidden states of the requested layer(s), keyed by their non-negative index (see normalize_hidden_layers). With the 'bfloat16' precision the hidden states are bfloat16 tensors.
+        """
+        if self.__model is None:
+            raise RuntimeError("The '" + self.__engine + "' engine doesn't compute the hidden states.")
+        layers = self.normalize_hidden_layers(hidden_layers)
+        record_batch_shape(tuple(token_ids.shape))
+
+        # Outside of the inference mode run the full forward pass
+        if not self.__inference_mode:
+            with self.__autocast():
+                _, _, hidden_states = self.forward_pass(token_ids, attention_mask=attention_mask)
+            return {index: hidden_states[index] for index in layers}
+
+        with torch.no_grad(), self.__autocast():
+            if attention_mask is None:
+                attention_mask = torch.ones_like(token_ids)
+            # Output of the embedding layer is the hidden state with index 0
+            hidden = self.__model.embeddings(token_ids)
+            selected_states = {0: hidden} if 0 in layers else {}
+            # Build the same attention mask the model builds internally (BertModel uses an additive mask)
+            if self.__architecture == 'distilbert':
+                layer_mask = attention_mask
+            else:
+                layer_mask = attention_mask[:, None, None, :].type(hidden.dtype)
+                layer_mask = (1.0 - layer_mask) * -10000.0
+            # Run the transformer layers up to the deepest requested one
+            for index, layer in enumerate(self.__layer_modules()[:max(layers)], start=1):
+                hidden = layer(hidden, layer_mask)[0]
+                if index in layers:
+                    selected_states[index] = hidden
+
+        return selected_states
+
+
+    def pool_hidden_states(self, hidden_states: Dict[int, torch.FloatTensor], attention_mask: torch.LongTensor, hidden_layers: Union[List[int], int] = -2) -> torch.tensor:
+        """Computes the embeddings of a padded batch by pooling (a masked mean value or the '[CLS]' token, see *pooling*) the specified hidden layer(s) of the BertModel.
+
+        Args:
+            hidden_states (Dict[int, torch.FloatTensor]): Hidden states of the requested layer(s), keyed by their non-negative index.
+            attention_mask (torch.LongTensor): Mask of the padded positions in the batch.
+            hidden_layers (Union[List[int], int], optional): Hidden layer(s) from which the embeddings will be calculated. Defaults to -2.
+
+        Returns:
+            torch.tensor: Embedding of each text in the batch.
+        """
+        layers = self.normalize_hidden_layers(hidden_layers)
+        # The '[CLS]' token is the first token of every text
+        if self.__pooling == 'cls':
+            return torch.stack([hidden_states[i][:, 0].float() for i in layers]).mean(dim=0)
+        # Padded positions must not contribute to the mean value (the sums are accumulated in float32)
+        mask = attention_mask.unsqueeze(-1).float()
+        token_counts = mask.sum(dim=1).clamp(min=1)
+        # Every layer has the same number of tokens, so the mean over all of them is the mean of per-layer means
+        layer_means = [(hidden_states[i].float() * mask).sum(dim=1) / token_counts for i in layers]
+        return torch.stack(layer_means).mean(dim=0)
+
+
+    def embed_token_batch(self, token_ids: torch.LongTensor, attention_mask: torch.LongTensor, hidden_layers: Union[List[int], int] = -2) -> torch.tensor:
+        """Computes the embeddings of a padded batch using the engine specified upon class initialization.
+
+        Args:
+            token_ids (torch.LongTensor): Padded vocabulary IDs of the batch.
+            attention_mask (torch.LongTensor): Mask of the padded positions in the batch.
+            hidden_layers (Union[List[int], int], optional): Hidden layer(s) from which the embeddings will be calculated. Defaults to -2.
+
+        Returns:
+            torch.tensor: Embedding of each text in the batch.
+        """
+        # The compiled encoder computes the embeddings of the hidden layers it was exported with
+        if self.__compiled_encoder is not None:
+            if self.normalize_hidden_layers(hidden_layers) != self.__compiled_layers:
+                raise ValueError("The compiled encoder pools the hidden layers " + str(self.__compiled_layers) + ", not " + str(hidden_layers) + ".")
+            record_batch_shape(tuple(token_ids.shape))
+            with torch.no_grad(), stage('forward_pass'):
+                return self.__compiled_encoder(token_ids, attention_mask)
+
+        hidden_states = self.compute_hidden_states(token_ids, attention_mask=attention_mask, hidden_layers=hidden_layers)
+        return self.pool_hidden_states(hidden_states, attention_mask, hidden_layers=hidden_layers)
+
+
     def create_sent_embedding(self, text: str, hidden_layers: Union[List[int], int] = -2) -> torch.tensor:
-        """Computes the embedding of the input text by taking a mean value of the specified hidden layer(s) of the BertModel.
+        """Computes the embedding of the input text by taking a mean value (or the '[CLS]' token, see *pooling*) of the specified hidden layer(s) of the BertModel.
 
         Args:
             text (str): Text whose embedding will be calculated.
@@ -147,47 +702,185 @@ class BertWrapper(object):
         """
         # Convert text to tokens, and tokens into vocabulary IDs
         text_token_ids = self.prepare_input(text)
+        # Compiled engines compute the embedding directly
+        if self.__compiled_encoder is not None:
+            return self.embed_token_batch(text_token_ids, torch.ones_like(text_token_ids), hidden_layers=hidden_layers).squeeze()
         # Run a forward pass on the BertModel
-        _ ,_ , hidden_states = self.forward_pass(text_token_ids)
+        layers = self.normalize_hidden_layers(hidden_layers)
+        hidden_states = self.compute_hidden_states(text_token_ids, hidden_layers=hidden_layers)
+        if self.__pooling == 'cls':
+            return self.pool_hidden_states(hidden_states, torch.ones_like(text_token_ids), hidden_layers=hidden_layers).squeeze()
 
         # Extract the values from specified hidden layers
         if type(hidden_layers) == int:
-            hidden = hidden_states[hidden_layers]
+            hidden = hidden_states[layers[0]]
         else:
-            last_states = [hidden_states[i] for i in hidden_layers]
+            last_states = [hidden_states[i] for i in layers]
             hidden = torch.cat(tuple(last_states), dim = 1) 
         # Return the mean of extracted values
-        return hidden.mean(dim=1).squeeze()
-    
+        return hidden.float().mean(dim=1).squeeze()
+
+
+    def create_batch_embeddings(self, content: List[str], hidden_layers: Union[List[int], int] = -2, batch_size: int = 32) -> np.ndarray:
+        """Computes the embedding for each input sentence by running one forward pass per batch of sentences with a similar number of tokens.
 
-    def create_embedding_matrix(self, content: List[str], hidden_layers: Union[List[int], int] = -2) -> np.ndarray:
+        Args:
+            content (List[str]): Sentences of the input text.
+            hidden_layers (Union[List[int], int], optional): Hidden layer(s) from which the embedding of each sentence will be calculated. Defaults to -2.
+            batch_size (int, optional): Maximum number of sentences in one forward pass. Defaults to 32.
+
+        Returns:
+            np.ndarray: Embeddings for each sentence of the input text (in the order of the input sentences).
+        """
+        if not content:
+            return np.asarray([])
+
+        # Convert every sentence to tokens, and tokens into vocabulary IDs
+        sent_token_ids = [self.__add_special_tokens(token_ids) for token_ids in self.tokenize_batch(content)]
+        # Sort the sentences by their number of tokens, so that every batch needs as little padding as possible
+        sorted_indices = sorted(range(len(content)), key=lambda index: len(sent_token_ids[index]))
+
+        sent_embeddings = np.zeros((len(content), self.__hidden_size), dtype=self.__embedding_dtype)
+        for start in range(0, len(sorted_indices), batch_size):
+            batch_indices = sorted_indices[start:start + batch_size]
+            # Pad the batch and run a forward pass on the BertModel
+            token_ids, attention_mask = self.pad_token_ids([sent_token_ids[index] for index in batch_indices])
+            embeddings = self.embed_token_batch(token_ids, attention_mask, hidden_layers=hidden_layers)
+            # Store the embeddings at the positions of the original sentences
+            sent_embeddings[batch_indices] = embeddings.data.cpu().numpy()
+
+        return sent_embeddings
+
+
+    def create_embedding_matrix(self, content: List[str], hidden_layers: Union[List[int], int] = -2, batch_size: int = 1) -> np.ndarray:
         """Computes the embedding for each input sentence by running a forward pass and taking a mean value of specified hidden layer(s) of the BertModel.
 
         Args:
             content (List[str]): Sentences of the input text.
             hidden_layers (Union[List[int], int], optional): Hidden layer(s) from which the embedding of each sentence will be calculated. Defaults to -2.
+            batch_size (int, optional): Number of sentences in one forward pass. If it is larger than 1, sentences are embedded in padded batches. Defaults to 1.
 
         Returns:
             np.ndarray: Embeddings for each sentence of the input text.
         """
+        # Embed the sentences in padded batches if requested
+        if batch_size > 1:
+            return self.create_batch_embeddings(content, hidden_layers=hidden_layers, batch_size=batch_size)
+
         sent_embeddings = []
         # Create embedding for each input sentence
         for sentence in content:
             embedding = self.create_sent_embedding(text=sentence, hidden_layers=hidden_layers).data.cpu().numpy()
             sent_embeddings.append(np.squeeze(embedding))
         # Return the embeddings in a matrix form
-        return np.asarray(sent_embeddings)
+        return np.asarray(sent_embeddings, dtype=self.__embedding_dtype)
     
 
-    def __call__(self, content: List[str], hidden_layers: Union[List[int], int] = -2) -> np.ndarray:
+    def map_char_spans_to_tokens(self, content: str, char_spans: List[Tuple[int, int]]) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """Converts the whole text into vocabulary IDs and maps the character spans of its sentences onto word-piece positions.
+
+        The text is cut at the span boundaries and every piece is tokenized on its own, so each sentence covers a contiguous
+        range of word pieces.
+
+        Args:
+            content (str): Text containing the sentences.
+            char_spans (List[Tuple[int, int]]): Sorted, non-overlapping character spans (start, end) of the sentences.
+
+        Returns:
+            Tuple[List[int], List[Tuple[int, int]]]: Vocabulary IDs of the whole text, word-piece span (start, end) of each sentence.
+        """
+        # Cut the text into the pieces between the sentences and the sentences themselves
+        segments = []
+        cursor = 0
+        for start, end in char_spans:
+            if start < cursor or end < start:
+                raise ValueError("Character spans of the sentences must be sorted and must not overlap.")
+            segments.append(content[cursor:start])
+            segments.append(content[start:end])
+            cursor = end
+        segments.append(content[cursor:])
+
+        token_ids = []
+        token_spans = []
+        for index, segment_ids in enumerate(self.tokenize_batch(segments)):
+            # Sentences are the odd segments
+            if index % 2 == 1:
+                token_spans.append((len(token_ids), len(token_ids) + len(segment_ids)))
+            token_ids.extend(segment_ids)
+
+        return token_ids, token_spans
+
+
+    def create_document_embeddings(self, content: str, char_spans: List[Tuple[int, int]], hidden_layers: Union[List[int], int] = -2, window_size: int = 512, stride: int = 256, batch_size: int = 8) -> np.ndarray:
+        """Computes the embedding for each sentence of a text by encoding the whole text in overlapping windows and pooling each sentence's word pieces.
+
+        Every sentence is pooled in the window where it is the most central (the farthest from both window edges), so its
+        embedding carries the context of the surrounding sentences.
+
+        Args:
+            content (str): Text containing the sentences.
+            char_spans (List[Tuple[int, int]]): Sorted, non-overlapping character spans (start, end) of the sentences.
+            hidden_layers (Union[List[int], int], optional): Hidden layer(s) from which the embedding of each sentence will be calculated. Defaults to -2.
+            window_size (int, optional): Number of word pieces in one window (limited by the number of position embeddings of the model). Defaults to 512.
+            stride (int, optional): Number of word pieces between the starts of neighbouring windows. Defaults to 256.
+            batch_size (int, optional): Maximum number of windows in one forward pass. Defaults to 8.
+
+        Returns:
+            np.ndarray: Embeddings for each sentence (in the order of the character spans).
+        """
+        if self.__model is None:
+            raise RuntimeError("The '" + self.__engine + "' engine doesn't support document embeddings.")
+        if not char_spans:
+            return np.asarray([])
+
+        token_ids, token_spans = self.map_char_spans_to_tokens(content, char_spans)
+        window_size = min(window_size, self.__model.config.max_position_embeddings)
+        stride = max(min(stride, window_size), 1)
+
+        # Place the windows so that the last one reaches the end of the text
+        window_starts = [0]
+        while window_starts[-1] + window_size < len(token_ids):
+            window_starts.append(window_starts[-1] + stride)
+
+        # Pick the window in which each sentence is the most central
+        sent_windows = [
+            max(range(len(window_starts)), key=lambda window: min(start - window_starts[window], window_starts[window] + window_size - end))
+            for start, end in token_spans
+        ]
+        # Run only the windows which were picked by at least one sentence
+        used_windows = sorted(set(sent_windows))
+        layers = self.normalize_hidden_layers(hidden_layers)
+
+        sent_embeddings = np.zeros((len(token_spans), self.__hidden_size), dtype=self.__embedding_dtype)
+        for batch_start in range(0, len(used_windows), batch_size):
+            batch_windows = used_windows[batch_start:batch_start + batch_size]
+            window_ids, attention_mask = self.pad_token_ids([token_ids[window_starts[window]:window_starts[window] + window_size] for window in batch_windows])
+            hidden_states = self.compute_hidden_states(window_ids, attention_mask=attention_mask, hidden_layers=hidden_layers)
+
+            for row, window in enumerate(batch_windows):
+                window_start = window_starts[window]
+                for sent_num, (start, end) in enumerate(token_spans):
+                    if sent_windows[sent_num] != window:
+                        continue
+                    # Pool the part of the sentence which lies inside the window
+                    span_start = max(start - window_start, 0)
+                    span_end = max(min(end - window_start, window_size), span_start + 1)
+                    layer_means = [hidden_states[i][row, span_start:span_end].float().mean(dim=0) for i in layers]
+                    sent_embeddings[sent_num] = torch.stack(layer_means).mean(dim=0).data.cpu().numpy()
+
+        return sent_embeddings
+
+
+    def __call__(self, content: List[str], hidden_layers: Union[List[int], int] = -2, batch_size: int = 1) -> np.ndarray:
         """Computes the embedding for each input sentence by running a forward pass and taking a mean value of specified hidden layer(s) of the BertModel.
 
         Args:
             content (List[str]): Sentences of the input text.
             hidden_layers (Union[List[int], int], optional): Hidden layer(s) from which the embedding of each sentence will be calculated. Defaults to -2.
+            batch_size (int, optional): Number of sentences in one forward pass. If it is larger than 1, sentences are embedded in padded batches. Defaults to 1.
 
         Returns:
             np.ndarray: Embeddings for each sentence of the input text.
         """
-        return self.create_embedding_matrix(content, hidden_layers)
+        return self.create_embedding_matrix(content, hidden_layers, batch_size)
     
@@ -0,0 +1,92 @@
+import argparse
+import time
+from typing import Dict, List, Union
+
+import numpy as np
+
+from benchmark_utils import create_local_corpus, load_local_corpus, gold_summary_lengths, selection_agreement
+from kmeans_wrapper import KMeansWrapper
+
+
+# Compared clustering configurations (the first one is the reference, i.e. the current output of the summarizer)
+CONFIGURATIONS = {
+    "kmeans, n_init=10": {"backend": 'kmeans'},
+    "kmeans elkan, n_init=3": {"backend": 'kmeans', "n_init": 3, "algorithm": 'elkan'},
+    "kmeans elkan, n_init=1": {"backend": 'kmeans', "n_init": 1, "algorithm": 'elkan'},
+    "kmeans full, n_init=1": {"backend": 'kmeans', "n_init": 1, "algorithm": 'full'},
+    "minibatch, n_init=3": {"backend": 'minibatch'},
+    "numpy, n_init=1": {"backend": 'numpy'},
+    "numpy, n_init=3": {"backend": 'numpy', "n_init": 3},
+}
+
+# Texts with more sentences than this are reported as long texts
+LONG_TEXT_SENTENCES = 40
+
+
+def embed_corpus(corpus_path: str, bert_version: str = 'bert-large-uncased', batch_size: int = 32) -> List[np.ndarray]:
+    """Computes the sentence embeddings of every text in the local corpus (the embeddings are computed once and shared by all clustering configurations).
+
+    Args:
+        corpus_path (str): Path of the local corpus file (see benchmark_utils.create_local_corpus).
+        bert_version (str, optional): Version of the BERT model. Defaults to 'bert-large-uncased'.
+        batch_size (int, optional): Number of sentences embedded in one forward pass. Defaults to 32.
+
+    Returns:
+        List[np.ndarray]: Sentence embeddings of each text.
+    """
+    from summarizer_model import SummarizerModel
+
+    summarizer = SummarizerModel(bert_version=bert_version, batch_size=batch_size)
+    embeddings = []
+    for record in load_local_corpus(corpus_path):
+        sentences = summarizer.separate_sentences(content=record["text"])
+        embeddings.append(summarizer.retrieve_sent_embeddings(sentences) if sentences else np.zeros((0, 0), dtype=np.float32))
+    return embeddings
+
+
+def benchmark_clustering(embeddings: List[np.ndarray], num_sentences: List[int], configurations: Dict[str, Dict[str, Union[str, int]]] = CONFIGURATIONS, random_state: int = 12345) -> Dict[str, Dict[str, float]]:
+    """Measures the fit time of every clustering configuration and the agreement of its selections with the first configuration.
+
+    Args:
+        embeddings (List[np.ndarray]): Sentence embeddings of each text.
+        num_sentences (List[int]): Number of sentences selected for each text.
+        configurations (Dict[str, Dict[str, Union[str, int]]], optional): Keyword arguments of the KMeansWrapper of each configuration. Defaults to CONFIGURATIONS.
+        random_state (int, optional): A fixed random seed. Defaults to 12345.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Mean time on short and long texts (in milliseconds), share of identical selections and the mean Jaccard similarity of each configuration.
+    """
+    texts = [(sent_embeddings, num) for sent_embeddings, num in zip(embeddings, num_sentences) if len(sent_embeddings) > 0]
+    results = {}
+    reference_selection = None
+    for name, options in configurations.items():
+        selection, short_times, long_times = [], [], []
+        for sent_embeddings, num in texts:
+            start_time = time.perf_counter()
+            selection.append(KMeansWrapper(sent_embeddings, num_sentences=num, random_state=random_state, **options).cluster_embeddings())
+            elapsed_time = 1000 * (time.perf_counter() - start_time)
+            (long_times if len(sent_embeddings) > LONG_TEXT_SENTENCES else short_times).append(elapsed_time)
+
+        reference_selection = reference_selection or selection
+        results[name] = dict(selection_agreement(reference_selection, selection),
+                             short_ms=float(np.mean(short_times)) if short_times else 0.0,
+                             long_ms=float(np.mean(long_times)) if long_times else 0.0)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the fit time and selections of the clustering backends on a fixed local corpus.")
+    parser.add_argument("corpus", help="path of the local corpus file")
+    parser.add_argument("--create", type=int, default=0, help="create the corpus from the first N records of the CNN / Daily Mail test split")
+    parser.add_argument("--bert-version", default='bert-large-uncased')
+    args = parser.parse_args()
+
+    if args.create:
+        create_local_corpus(args.corpus, num_records=args.create)
+
+    corpus_embeddings = embed_corpus(args.corpus, bert_version=args.bert_version)
+    corpus_num_sentences = gold_summary_lengths(load_local_corpus(args.corpus))
+    print(" ------------- CLUSTERING BENCHMARK -------------------")
+    for configuration, result in benchmark_clustering(corpus_embeddings, corpus_num_sentences).items():
+        print(" -> " + configuration + " : " + str(round(result["short_ms"], 2)) + " ms (short texts), " + str(round(result["long_ms"], 2)) + " ms (long texts), "
+              + str(round(100 * result["exact_match"], 1)) + "% identical selections, mean Jaccard " + str(round(result["mean_jaccard"], 4)))
@@ -0,0 +1,227 @@
+import argparse
+import json
+from typing import Dict, List, Union
+
+import numpy as np
+import torch
+
+
+# Formats in which the encoder can be exported
+SUPPORTED_FORMATS = ('torchscript', 'onnx')
+
+
+class EncoderPoolingModule(torch.nn.Module):
+    """The module that combines the encoder of a BertModel with the masked mean pooling of the selected hidden layers, so that both can be exported as one graph.
+
+    Attributes:
+        embeddings: torch.nn.Module
+            Embedding layer of the BertModel.
+        layers: torch.nn.ModuleList
+            Transformer layers of the BertModel up to the deepest selected one.
+        selected_layers: List[int]
+            Non-negative indices of the hidden layers which are pooled.
+    """
+
+    def __init__(self, model: torch.nn.Module, selected_layers: List[int]):
+        """Initializes an instance of the EncoderPoolingModule class.
+
+        Args:
+            model (torch.nn.Module): An instance of the BertModel class.
+            selected_layers (List[int]): Non-negative indices of the hidden layers which are pooled.
+        """
+        super().__init__()
+        self.embeddings = model.embeddings
+        # Transformer layers after the deepest selected one are not part of the graph
+        self.layers = torch.nn.ModuleList(model.encoder.layer[:max(selected_layers)])
+        self.selected_layers = list(selected_layers)
+
+
+    def forward(self, input_ids: torch.LongTensor, attention_mask: torch.LongTensor) -> torch.FloatTensor:
+        """Computes the embedding of each text in a padded batch.
+
+        Args:
+            input_ids (torch.LongTensor): Padded vocabulary IDs of the batch.
+            attention_mask (torch.LongTensor): Mask of the padded positions in the batch.
+
+        Returns:
+            torch.FloatTensor: Embedding of each text in the batch.
+        """
+        # Position and token type IDs are built from the input, so that they follow its (dynamic) shape
+        position_ids = torch.arange(input_ids.size(1), dtype=torch.long, device=input_ids.device).unsqueeze(0).expand_as(input_ids)
+        token_type_ids = torch.zeros_like(input_ids)
+        hidden = self.embeddings(input_ids=input_ids, token_type_ids=token_type_ids, position_ids=position_ids)
+
+        # Additive mask used by the attention and multiplicative mask used by the pooling
+        extended_mask = (1.0 - attention_mask[:, None, None, :].to(hidden.dtype)) * -10000.0
+        pooling_mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+        token_counts = pooling_mask.sum(dim=1).clamp(min=1)
+
+        layer_means = [(hidden * pooling_mask).sum(dim=1) / token_counts] * self.selected_layers.count(0)
+        for index, layer in enumerate(self.layers, start=1):
+            hidden = layer(hidden, extended_mask)[0]
+            layer_means += [(hidden * pooling_mask).sum(dim=1) / token_counts] * self.selected_layers.count(index)
+
+        return torch.stack(layer_means).mean(dim=0)
+
+
+class OnnxEncoder(object):
+    """The class that runs an exported ONNX encoder with the same interface as the TorchScript encoder.
+
+    Attributes:
+        __session: onnxruntime.InferenceSession
+            An initialized ONNX Runtime session.
+    """
+
+    def __init__(self, path: str):
+        """Initializes an instance of the OnnxEncoder class.
+
+        Args:
+            path (str): Path of the exported ONNX graph.
+        """
+        # onnxruntime is only needed by the 'onnx' engine
+        import onnxruntime
+        self.__session = onnxruntime.InferenceSession(path)
+
+
+    def __call__(self, input_ids: torch.LongTensor, attention_mask: torch.LongTensor) -> torch.FloatTensor:
+        """Computes the embedding of each text in a padded batch.
+
+        Args:
+            input_ids (torch.LongTensor): Padded vocabulary IDs of the batch.
+            attention_mask (torch.LongTensor): Mask of the padded positions in the batch.
+
+        Returns:
+            torch.FloatTensor: Embedding of each text in the batch.
+        """
+        inputs = {"input_ids": input_ids.cpu().numpy(), "attention_mask": attention_mask.cpu().numpy()}
+        embeddings, = self.__session.run(["sentence_embeddings"], inputs)
+        return torch.from_numpy(embeddings)
+
+
+def metadata_path(path: str) -> str:
+    """Retrieves the path of the metadata file stored next to an exported encoder.
+
+    Args:
+        path (str): Path of the exported encoder.
+
+    Returns:
+        str: Path of the metadata file.
+    """
+    return path + ".json"
+
+
+def export_encoder(model: torch.nn.Module, path: str, selected_layers: List[int], model_version: str, export_format: str = 'torchscript') -> Dict[str, Union[str, int, List[int]]]:
+    """Exports the encoder and pooling step of a BertModel into a graph with dynamic batch and sequence axes.
+
+    Args:
+        model (torch.nn.Module): An instance of the BertModel class (running in evaluation mode).
+        path (str): Path of the exported graph. Metadata of the graph is stored next to it (see metadata_path).
+        selected_layers (List[int]): Non-negative indices of the hidden layers which are pooled.
+        model_version (str): Version of the BERT model.
+        export_format (str, optional): Format of the exported graph ('torchscript' or 'onnx'). Defaults to 'torchscript'.
+
+    Returns:
+        Dict[str, Union[str, int, List[int]]]: Metadata of the exported graph.
+    """
+    if export_format not in SUPPORTED_FORMATS:
+        raise ValueError("Unsupported export format '" + str(export_format) + "'. Supported formats: " + ", ".join(SUPPORTED_FORMATS) + ".")
+
+    module = EncoderPoolingModule(model, selected_layers).eval()
+    # Example input used for tracing (the batch and sequence axes stay dynamic)
+    device = next(model.parameters()).device
+    input_ids = torch.ones((2, 8), dtype=torch.long, device=device)
+    attention_mask = torch.ones((2, 8), dtype=torch.long, device=device)
+    attention_mask[1, 5:] = 0
+
+    with torch.no_grad():
+        if export_format == 'torchscript':
+            traced_module = torch.jit.trace(module, (input_ids, attention_mask))
+            # Freezing inlines the weights and lets the JIT fuse the operations
+            torch.jit.save(torch.jit.freeze(traced_module), path)
+        else:
+            torch.onnx.export(module, (input_ids, attention_mask), path,
+                              input_names=["input_ids", "attention_mask"],
+                              output_names=["sentence_embeddings"],
+                              dynamic_axes={"input_ids": {0: "batch", 1: "sequence"},
+                                            "attention_mask": {0: "batch", 1: "sequence"},
+                                            "sentence_embeddings": {0: "batch"}},
+                              opset_version=11)
+
+    metadata = {
+        "format": export_format,
+        "model_version": model_version,
+        "hidden_layers": list(selected_layers),
+        "num_hidden_layers": model.config.num_hidden_layers,
+        "hidden_size": model.config.hidden_size,
+    }
+    with open(metadata_path(path), "w") as metadata_file:
+        json.dump(metadata, metadata_file)
+    return metadata
+
+
+def load_encoder(path: str, device: torch.device):
+    """Loads an exported encoder along with its metadata.
+
+    Args:
+        path (str): Path of the exported graph.
+        device (torch.device): Device on which the TorchScript graph runs (ONNX graphs run on the CPU).
+
+    Returns:
+        Tuple[Callable, Dict[str, Union[str, int, List[int]]]]: Callable which computes the embeddings of a padded batch, metadata of the graph.
+    """
+    with open(metadata_path(path), "r") as metadata_file:
+        metadata = json.load(metadata_file)
+
+    if metadata["format"] == 'torchscript':
+        encoder = torch.jit.load(path, map_location=device)
+        encoder.eval()
+    else:
+        encoder = OnnxEncoder(path)
+    return encoder, metadata
+
+
+def check_parity(eager_wrapper, compiled_wrapper, sentences: List[str], hidden_layers: Union[List[int], int] = -2, batch_size: int = 8, atol: float = 1e-4) -> float:
+    """Compares the sentence embeddings of a compiled engine with the embeddings of the eager engine.
+
+    Args:
+        eager_wrapper (BertWrapper): Wrapper running the 'eager' engine.
+        compiled_wrapper (BertWrapper): Wrapper running a compiled engine.
+        sentences (List[str]): Sentences whose embeddings are compared.
+        hidden_layers (Union[List[int], int], optional): Hidden layer(s) from which the embeddings are calculated. Defaults to -2.
+        batch_size (int, optional): Number of sentences in one forward pass. Defaults to 8.
+        atol (float, optional): Maximum allowed absolute difference of the embeddings. Defaults to 1e-4.
+
+    Returns:
+        float: Maximum absolute difference of the embeddings.
+    """
+    eager_embeddings = eager_wrapper.create_embedding_matrix(sentences, hidden_layers=hidden_layers, batch_size=batch_size)
+    compiled_embeddings = compiled_wrapper.create_embedding_matrix(sentences, hidden_layers=hidden_layers, batch_size=batch_size)
+
+    max_difference = float(np.abs(eager_embeddings - compiled_embeddings).max())
+    if max_difference > atol:
+        raise AssertionError("Compiled encoder differs from the eager encoder by " + str(max_difference) + " (allowed " + str(atol) + ").")
+    return max_difference
+
+
+if __name__ == "__main__":
+    from bert_wrapper import BertWrapper
+
+    parser = argparse.ArgumentParser(description="Exports the encoder of the BertWrapper and checks it against the eager engine.")
+    parser.add_argument("path", help="path of the exported graph")
+    parser.add_argument("--format", choices=SUPPORTED_FORMATS, default='torchscript')
+    parser.add_argument("--bert-version", default='bert-large-uncased')
+    parser.add_argument("--hidden-layers", type=int, nargs="+", default=[-2])
+    args = parser.parse_args()
+
+    hidden_layers = args.hidden_layers[0] if len(args.hidden_layers) == 1 else args.hidden_layers
+    eager_wrapper = BertWrapper(model_version=args.bert_version)
+    eager_wrapper.export_compiled_encoder(args.path, hidden_layers=hidden_layers, export_format=args.format)
+
+    test_sentences = [
+        "Most of the solar system's asteroids live and work in the main asteroid belt, a roughly flat zone between the orbits of Mars and Jupiter.",
+        "By tradition, the discoverers get to name their asteroids whatever they like.",
+        "Sounds insignificant.",
+        "The Kuiper belt is a comet-strewn swath of circular real estate that begins just beyond the orbit of Neptune, includes Pluto, and extends perhaps as far again from Neptune as Neptune is from the Sun.",
+    ]
+    compiled_wrapper = BertWrapper(model_version=args.bert_version, engine=args.format, compiled_model_path=args.path)
+    print(" -> Maximum absolute difference : " + str(check_parity(eager_wrapper, compiled_wrapper, test_sentences, hidden_layers=hidden_layers)))
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Union
+
+import numpy as np
+
+
+class EmbeddingCache(object):
+    """The class that stores sentence embeddings keyed by a hash of the model version, hidden layers and sentence text.
+
+    Recently used embeddings are kept in a bounded in-memory LRU. If a database path is provided, every embedding is also
+    stored in a persistent sqlite tier, which is consulted on a miss of the in-memory tier.
+
+    Attributes:
+        __max_entries: int
+            Maximum number of embeddings kept in memory.
+        __entries: OrderedDict
+            Embeddings kept in memory, ordered from the least to the most recently used.
+        __db_path: str
+            Path of the sqlite database of the persistent tier.
+        __connection: sqlite3.Connection
+            Connection to the sqlite database (None if there is no persistent tier).
+        __lock: threading.Lock
+            Lock guarding the cache against concurrent requests.
+        __stats: Dict[str, int]
+            Counters of memory hits, disk hits, misses and evictions.
+
+    Methods:
+        get_max_entries():
+            Retrieves the maximum number of embeddings kept in memory stored in a private class variable.
+        get_db_path():
+            Retrieves the path of the sqlite database stored in a private class variable.
+        get_stats():
+            Retrieves the cache counters.
+        create_key(model_version: str, hidden_layers: Union[List[int], int], sentence: str):
+            Creates the key of a sentence embedding.
+        get_many(keys: List[str]):
+            Retrieves the cached embeddings of the given keys.
+        put_many(keys: List[str], embeddings: np.ndarray):
+            Stores the embeddings under the given keys.
+        clear():
+            Removes all embeddings from the cache and resets the counters.
+    """
+
+    def __init__(self, max_entries: int = 10000, db_path: str = None):
+        """Initializes an instance of the EmbeddingCache class.
+
+        Args:
+            max_entries (int, optional): Maximum number of embeddings kept in memory. Defaults to 10000.
+            db_path (str, optional): Path of the sqlite database of the persistent tier (no persistent tier if None). Defaults to None.
+        """
+        self.__max_entries = max_entries
+        self.__entries = OrderedDict()
+        self.__db_path = db_path
+        self.__lock = threading.Lock()
+        self.__stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        # Open the persistent tier (the connection is shared by the threads of a web worker)
+        self.__connection = None
+        if db_path is not None:
+            self.__connection = sqlite3.connect(db_path, check_same_thread=False)
+            self.__connection.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, dtype TEXT, embedding BLOB)")
+            self.__connection.commit()
+
+
+    def get_max_entries(self) -> int:
+        """Retrieves the maximum number of embeddings kept in memory stored in a private class variable.
+
+        Returns:
+            int: Maximum number of embeddings kept in memory.
+        """
+        return self.__max_entries
+
+
+    def get_db_path(self) -> Union[str, None]:
+        """Retrieves the path of the sqlite database stored in a private class variable.
+
+        Returns:
+            Union[str, None]: Path of the sqlite database of the persistent tier.
+        """
+        return self.__db_path
+
+
+    def get_stats(self) -> Dict[str, int]:
+        """Retrieves the cache counters.
+
+        Returns:
+            Dict[str, int]: Number of memory hits, disk hits, misses, evictions and embeddings currently kept in memory.
+        """
+        with self.__lock:
+            stats = dict(self.__stats)
+            stats["memory_entries"] = len(self.__entries)
+        return stats
+
+
+    @staticmethod
+    def create_key(model_version: str, hidden_layers: Union[List[int], int], sentence: str) -> str:
+        """Creates the key of a sentence embedding.
+
+        Args:
+            model_version (str): Version of the model which computes the embedding.
+            hidden_layers (Union[List[int], int]): Hidden layer(s) from which the embedding is calculated.
+            sentence (str): Text of the sentence.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest identifying the embedding.
+        """
+        return hashlib.sha256(json.dumps([model_version, hidden_layers, sentence]).encode("utf-8")).hexdigest()
+
+
+    def get_many(self, keys: List[str]) -> List[Union[np.ndarray, None]]:
+        """Retrieves the cached embeddings of the given keys.
+
+        Args:
+            keys (List[str]): Keys of the embeddings (see create_key).
+
+        Returns:
+            List[Union[np.ndarray, None]]: Embedding of each key (None for keys which aren't cached).
+        """
+        with self.__lock:
+            embeddings = []
+            for key in keys:
+                embedding = self.__entries.get(key)
+                if embedding is not None:
+                    self.__entries.move_to_end(key)
+                    self.__stats["memory_hits"] += 1
+                else:
+                    embedding = self.__load_from_disk(key)
+                    if embedding is not None:
+                        # Promote the embedding into the in-memory tier
+                        self.__store_in_memory(key, embedding)
+                        self.__stats["disk_hits"] += 1
+                    else:
+                        self.__stats["misses"] += 1
+                embeddings.append(embedding)
+
+        return embeddings
+
+
+    def put_many(self, keys: List[str], embeddings: np.ndarray):
+        """Stores the embeddings under the given keys.
+
+        Args:
+            keys (List[str]): Keys of the embeddings (see create_key).
+            embeddings (np.ndarray): Embeddings stored in the cache (one row per key).
+        """
+        # Copy the rows, so that the cache doesn't keep the whole embedding matrix alive
+        embeddings = [np.array(embedding, copy=True) for embedding in embeddings]
+        with self.__lock:
+            for key, embedding in zip(keys, embeddings):
+                self.__store_in_memory(key, embedding)
+            if self.__connection is not None:
+                self.__connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, dtype, embedding) VALUES (?, ?, ?)",
+                    [(key, embedding.dtype.str, embedding.tobytes()) for key, embedding in zip(keys, embeddings)]
+                )
+                self.__connection.commit()
+
+
+    def clear(self):
+        """Removes all embeddings from the cache and resets the counters."""
+        with self.__lock:
+            self.__entries.clear()
+            self.__stats = {counter: 0 for counter in self.__stats}
+            if self.__connection is not None:
+                self.__connection.execute("DELETE FROM embeddings")
+                self.__connection.commit()
+
+
+    def __store_in_memory(self, key: str, embedding: np.ndarray):
+        """Stores the embedding in the in-memory tier, evicting the least recently used embeddings if it is full.
+
+        Args:
+            key (str): Key of the embedding.
+            embedding (np.ndarray): Stored embedding.
+        """
+        self.__entries[key] = embedding
+        self.__entries.move_to_end(key)
+        while len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+            self.__stats["evictions"] += 1
+
+
+    def __load_from_disk(self, key: str) -> Union[np.ndarray, None]:
+        """Loads the embedding from the persistent tier.
+
+        Args:
+            key (str): Key of the embedding.
+
+        Returns:
+            Union[np.ndarray, None]: Stored embedding (None if it isn't stored or there is no persistent tier).
+        """
+        if self.__connection is None:
+            return None
+        row = self.__connection.execute("SELECT dtype, embedding FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[1], dtype=np.dtype(row[0]))
@@ -0,0 +1,86 @@
+import argparse
+import multiprocessing
+import resource
+from typing import Dict, List, Union
+
+from benchmark_utils import create_local_corpus, load_local_corpus, gold_summary_lengths, select_summary_sentences, compute_rouge, format_stage_times
+from encoder_registry import ENCODERS
+
+
+def run_encoder(encoder: str, corpus_path: str, batch_size: int = 32, engine: str = 'eager') -> Dict[str, Union[List[List[str]], float]]:
+    """Selects the summary sentences of the local corpus with one encoder (meant to run in a fresh process, so that the peak memory belongs to that encoder only).
+
+    Args:
+        encoder (str): Name of a registered encoder.
+        corpus_path (str): Path of the local corpus file (see benchmark_utils.create_local_corpus).
+        batch_size (int, optional): Number of sentences embedded in one forward pass. Defaults to 32.
+        engine (str, optional): Engine which runs the encoder ('eager' or 'quantized'). Defaults to 'eager'.
+
+    Returns:
+        Dict[str, Union[List[List[str]], float]]: Selected sentences of each text, elapsed time in seconds, the peak resident memory in megabytes and the records of the stage trace.
+    """
+    from profiling import StageTrace
+    from summarizer_model import SummarizerModel
+
+    corpus = load_local_corpus(corpus_path)
+    summarizer = SummarizerModel(encoder=encoder, batch_size=batch_size, engine=engine)
+    # Record the time of every stage (the trace is returned as a dictionary, since it is sent from another process)
+    with StageTrace() as trace:
+        selection, elapsed_time = select_summary_sentences(summarizer, corpus, gold_summary_lengths(corpus))
+    # Linux reports the peak resident set size in kilobytes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"selection": selection, "time": elapsed_time, "peak_rss": peak_rss, "trace": trace.to_dict()}
+
+
+def benchmark_encoders(corpus_path: str, encoders: List[str], batch_size: int = 32, engine: str = 'eager') -> str:
+    """Measures the latency, peak memory and ROUGE scores of the registered encoders on a local corpus.
+
+    Args:
+        corpus_path (str): Path of the local corpus file (see benchmark_utils.create_local_corpus).
+        encoders (List[str]): Names of the measured encoders.
+        batch_size (int, optional): Number of sentences embedded in one forward pass. Defaults to 32.
+        engine (str, optional): Engine which runs the encoders ('eager' or 'quantized'). Defaults to 'eager'.
+
+    Returns:
+        str: Latency / quality matrix as a markdown table.
+    """
+    corpus = load_local_corpus(corpus_path)
+    references = [record["summary"] for record in corpus]
+
+    rows = ["| Encoder | Description | ms / document | Peak RSS (MB) | ROUGE-1 | ROUGE-2 | ROUGE-L |",
+            "|---|---|---|---|---|---|---|"]
+    # Every encoder runs in a new process, otherwise the peak memory of the larger models would hide the smaller ones
+    context = multiprocessing.get_context("spawn")
+    for encoder in encoders:
+        with context.Pool(processes=1) as pool:
+            result = pool.apply(run_encoder, (encoder, corpus_path, batch_size, engine))
+        rouge = compute_rouge([' '.join(sentences) for sentences in result["selection"]], references)
+        ms_per_document = 1000 * result["time"] / max(len(corpus), 1)
+
+        print(" -> " + encoder + " : " + str(round(ms_per_document, 1)) + " ms/document, " + str(round(result["peak_rss"])) + " MB, ROUGE-1 : " + str(round(rouge["rouge1"], 4)))
+        print("      per document : " + format_stage_times(result["trace"], len(corpus)))
+        rows.append("| " + " | ".join([encoder, ENCODERS[encoder].description, str(round(ms_per_document, 1)), str(round(result["peak_rss"])),
+                                          str(round(rouge["rouge1"], 4)), str(round(rouge["rouge2"], 4)), str(round(rouge["rougeL"], 4))]) + " |")
+
+    return "\n".join(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publishes the latency / quality matrix of the registered encoders on a fixed local corpus.")
+    parser.add_argument("corpus", help="path of the local corpus file")
+    parser.add_argument("--create", type=int, default=0, help="create the corpus from the first N records of the CNN / Daily Mail test split")
+    parser.add_argument("--encoders", nargs="+", choices=list(ENCODERS), default=list(ENCODERS))
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--engine", choices=('eager', 'quantized'), default='eager')
+    parser.add_argument("--output", default=None, help="markdown file into which the matrix is written")
+    args = parser.parse_args()
+
+    if args.create:
+        create_local_corpus(args.corpus, num_records=args.create)
+
+    print(" ------------- ENCODER BENCHMARK -------------------")
+    matrix = benchmark_encoders(args.corpus, args.encoders, batch_size=args.batch_size, engine=args.engine)
+    print(matrix)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            output_file.write(matrix + "\n")
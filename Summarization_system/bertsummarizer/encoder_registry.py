@@ -0,0 +1,76 @@
+from typing import Dict, List, NamedTuple, Union
+
+
+class EncoderSpec(NamedTuple):
+    """Specification of an encoder which computes the sentence embeddings.
+
+    Attributes:
+        model_version: str
+            Version of the pretrained model.
+        architecture: str
+            Architecture of the model ('bert' or 'distilbert', see bert_wrapper.SUPPORTED_ARCHITECTURES).
+        num_layers: int
+            Number of transformer layers which are kept (None keeps all layers).
+        hidden_layers: Union[List[int], int]
+            Hidden layer(s) from which the sentence representation is taken.
+        pooling: str
+            Way of pooling the hidden states of a sentence ('mean' or 'cls', see bert_wrapper.SUPPORTED_POOLINGS).
+        tokenizer_version: str
+            Version of the tokenizer (None uses the model version).
+        description: str
+            Short description of the encoder.
+    """
+    model_version: str
+    architecture: str = 'bert'
+    num_layers: int = None
+    hidden_layers: Union[List[int], int] = -2
+    pooling: str = 'mean'
+    tokenizer_version: str = None
+    description: str = ''
+
+
+# Registered encoders, from the largest (the original model of the summarizer) to the smallest
+ENCODERS = {
+    'bert-large': EncoderSpec('bert-large-uncased', description="BERT-Large, 24 layers, hidden size 1024 (original model)"),
+    'bert-large-l12': EncoderSpec('bert-large-uncased', num_layers=12, description="BERT-Large truncated to its first 12 layers"),
+    'bert-large-l6': EncoderSpec('bert-large-uncased', num_layers=6, description="BERT-Large truncated to its first 6 layers"),
+    'bert-base': EncoderSpec('bert-base-uncased', description="BERT-Base, 12 layers, hidden size 768"),
+    'distilbert': EncoderSpec('distilbert-base-uncased', architecture='distilbert', description="DistilBERT, 6 layers, hidden size 768"),
+    'bert-medium': EncoderSpec('google/bert_uncased_L-8_H-512_A-8', tokenizer_version='bert-base-uncased', description="BERT-Medium, 8 layers, hidden size 512"),
+    'bert-small': EncoderSpec('google/bert_uncased_L-4_H-512_A-8', tokenizer_version='bert-base-uncased', description="BERT-Small, 4 layers, hidden size 512"),
+    'bert-mini': EncoderSpec('google/bert_uncased_L-4_H-256_A-4', tokenizer_version='bert-base-uncased', description="BERT-Mini, 4 layers, hidden size 256"),
+    'bert-tiny': EncoderSpec('google/bert_uncased_L-2_H-128_A-2', tokenizer_version='bert-base-uncased', description="BERT-Tiny, 2 layers, hidden size 128"),
+}
+
+
+def get_encoder_spec(name: str) -> EncoderSpec:
+    """Retrieves the specification of a registered encoder.
+
+    Args:
+        name (str): Name of the encoder (a key of ENCODERS).
+
+    Returns:
+        EncoderSpec: Specification of the encoder.
+    """
+    if name not in ENCODERS:
+        raise ValueError("Unknown encoder '" + str(name) + "'. Registered encoders: " + ", ".join(ENCODERS) + ".")
+    return ENCODERS[name]
+
+
+def register_encoder(name: str, spec: EncoderSpec):
+    """Registers an encoder under the given name, so that it can be selected by the SummarizerModel.
+
+    Args:
+        name (str): Name of the encoder.
+        spec (EncoderSpec): Specification of the encoder.
+    """
+    ENCODERS[name] = spec
+
+
+def list_encoders() -> Dict[str, str]:
+    """Retrieves the names and descriptions of the registered encoders.
+
+    Returns:
+        Dict[str, str]: Description of each registered encoder.
+    """
+    return {name: spec.description for name, spec in ENCODERS.items()}
@@ -0,0 +1,170 @@
+import heapq
+from typing import List
+
+import numpy as np
+
+from kmeans_wrapper import compute_num_clusters
+
+
+# Objectives of the greedy selection ('facility_location' maximizes how well the selected sentences cover every sentence of the text,
+# 'mmr' trades the similarity to the whole text against the redundancy with the sentences selected before)
+SUPPORTED_OBJECTIVES = ('facility_location', 'mmr')
+
+
+def cosine_similarity_matrix(sent_embeddings: np.ndarray) -> np.ndarray:
+    """Computes the cosine similarity of every pair of sentence embeddings with a single matrix product.
+
+    Args:
+        sent_embeddings (np.ndarray): Sentence embeddings (one per row).
+
+    Returns:
+        np.ndarray: Symmetric matrix of cosine similarities, computed in float64.
+    """
+    embeddings = np.asarray(sent_embeddings, dtype=np.float64)
+    # Zero vectors (e.g. padding) have no direction, their similarity to every sentence is 0
+    norms = np.linalg.norm(embeddings, axis=1)
+    embeddings = embeddings / np.where(norms > 0, norms, 1.0)[:, None]
+    return embeddings @ embeddings.T
+
+
+class GreedySelector(object):
+    """The class that selects summary sentences greedily from a precomputed similarity matrix (a deterministic alternative to KMeansWrapper without centroids and random restarts).
+
+    The similarity matrix costs O(n^2) for n sentences, the selection of k sentences adds O(nk) for 'mmr' and a few gain
+    evaluations of O(n) per selected sentence for 'facility_location' (lazy greedy).
+
+    Attributes:
+        __sent_embeddings: np.ndarray
+            Sentence embeddings.
+        __sent_ratio: float
+            Ratio of the number of embeddings whose indices need to be returned.
+        __num_sentences: int
+            Absolute number of embeddings whose indices need to be returned.
+        __objective: str
+            Objective of the greedy selection ('facility_location' or 'mmr').
+        __mmr_lambda: float
+            Weight of the similarity to the text against the redundancy in the 'mmr' objective.
+
+    Methods:
+        get_sent_embeddings():
+            Retrieves sentence embeddings stored in a private class variable.
+        get_objective():
+            Retrieves the objective of the greedy selection stored in a private class variable.
+        select_facility_location(similarities: np.ndarray, num_selected: int):
+            Selects the sentences which maximize the facility-location coverage of the text.
+        select_mmr(similarities: np.ndarray, num_selected: int):
+            Selects the sentences by maximal marginal relevance.
+        select_embeddings():
+            Determines the list indices of the selected embeddings.
+    """
+
+    def __init__(self, sent_embeddings: np.ndarray, sent_ratio: float = 0.2, num_sentences: int = None, objective: str = 'facility_location', mmr_lambda: float = 0.7):
+        """Initializes an instance of the GreedySelector class.
+
+        Args:
+            sent_embeddings (np.ndarray): Sentence embeddings.
+            sent_ratio (float, optional): Ratio of the number of embeddings whose indices need to be returned. Defaults to 0.2.
+            num_sentences (int, optional): Absolute number of embeddings whose indices need to be returned. Defaults to None.
+            objective (str, optional): Objective of the greedy selection ('facility_location' or 'mmr'). Defaults to 'facility_location'.
+            mmr_lambda (float, optional): Weight of the similarity to the text against the redundancy in the 'mmr' objective. Defaults to 0.7.
+        """
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError("Unsupported objective '" + str(objective) + "'. Supported objectives: " + ", ".join(SUPPORTED_OBJECTIVES) + ".")
+
+        self.__sent_embeddings = sent_embeddings
+        self.__sent_ratio = sent_ratio
+        self.__num_sentences = num_sentences
+        self.__objective = objective
+        self.__mmr_lambda = mmr_lambda
+
+
+    def get_sent_embeddings(self) -> np.ndarray:
+        """Retrieves sentence embeddings stored in a private class variable.
+
+        Returns:
+            np.ndarray: Sentence embeddings (specified upon class initialization).
+        """
+        return self.__sent_embeddings
+
+
+    def get_objective(self) -> str:
+        """Retrieves the objective of the greedy selection stored in a private class variable.
+
+        Returns:
+            str: Objective of the greedy selection (specified upon class initialization).
+        """
+        return self.__objective
+
+
+    def select_facility_location(self, similarities: np.ndarray, num_selected: int) -> List[int]:
+        """Selects the sentences which maximize the facility-location coverage of the text, i.e. the sum over all sentences of the similarity to the closest selected sentence.
+
+        The coverage is submodular, so the gain of a sentence never grows as sentences are selected. A gain computed earlier is an upper bound,
+        and only the sentence on top of the queue needs to be re-evaluated (lazy greedy).
+
+        Args:
+            similarities (np.ndarray): Cosine similarities of the sentences.
+            num_selected (int): Number of selected sentences.
+
+        Returns:
+            List[int]: Indices of the selected sentences in the order of selection.
+        """
+        # Shift the similarities to be non-negative, so that the coverage is monotone
+        similarities = similarities - similarities.min()
+        coverage = np.zeros(len(similarities))
+
+        # Queue of (negated gain, sentence index, number of selected sentences when the gain was computed), ties are resolved in favour of the lower index
+        queue = [(-gain, sent_num, 0) for sent_num, gain in enumerate(similarities.sum(axis=0))]
+        heapq.heapify(queue)
+        selected = []
+        while queue and len(selected) < num_selected:
+            negated_gain, sent_num, computed_at = heapq.heappop(queue)
+            if computed_at == len(selected):
+                selected.append(sent_num)
+                coverage = np.maximum(coverage, similarities[:, sent_num])
+            else:
+                gain = np.maximum(similarities[:, sent_num] - coverage, 0).sum()
+                heapq.heappush(queue, (-gain, sent_num, len(selected)))
+
+        return selected
+
+
+    def select_mmr(self, similarities: np.ndarray, num_selected: int) -> List[int]:
+        """Selects the sentences by maximal marginal relevance, i.e. the similarity to the whole text (the mean similarity to all sentences) reduced by the highest similarity to a selected sentence.
+
+        Args:
+            similarities (np.ndarray): Cosine similarities of the sentences.
+            num_selected (int): Number of selected sentences.
+
+        Returns:
+            List[int]: Indices of the selected sentences in the order of selection.
+        """
+        relevance = similarities.mean(axis=1)
+        redundancy = np.zeros(len(similarities))
+        available = np.ones(len(similarities), dtype=bool)
+        selected = []
+        for _ in range(min(num_selected, len(similarities))):
+            scores = np.where(available, self.__mmr_lambda * relevance - (1 - self.__mmr_lambda) * redundancy, -np.inf)
+            sent_num = int(np.argmax(scores))
+            selected.append(sent_num)
+            available[sent_num] = False
+            # Update the highest similarity to a selected sentence with the new sentence only (dissimilar sentences aren't redundant)
+            redundancy = np.maximum(redundancy, similarities[:, sent_num])
+
+        return selected
+
+
+    def select_embeddings(self) -> List[int]:
+        """Determines the list indices of the selected embeddings (the same number of sentences as KMeansWrapper would return).
+
+        Returns:
+            List[int]: Sorted list indices of the selected sentence embeddings.
+        """
+        if len(self.__sent_embeddings) == 0 or self.__num_sentences == 0:
+            return []
+
+        similarities = cosine_similarity_matrix(self.__sent_embeddings)
+        num_selected = compute_num_clusters(len(self.__sent_embeddings), self.__sent_ratio, self.__num_sentences)
+        if self.__objective == 'mmr':
+            return sorted(self.select_mmr(similarities, num_selected))
+        return sorted(self.select_facility_location(similarities, num_selected))
@@ -0,0 +1,283 @@
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple, Union
+
+import torch
+from threadpoolctl import threadpool_limits
+
+from embedding_cache import EmbeddingCache
+from summarizer_model import SummarizerModel
+
+
+# Model replica of the current worker process (set by the initializer of the pool)
+_replica = None
+
+
+def partition_cores(num_replicas: int, threads_per_replica: int = None) -> List[List[int]]:
+    """Splits the cores available to the current process into disjoint partitions, one per replica.
+
+    Args:
+        num_replicas (int): Number of model replicas.
+        threads_per_replica (int, optional): Number of cores given to each replica. Defaults to None (the available cores are split evenly).
+
+    Returns:
+        List[List[int]]: Core IDs of each replica.
+    """
+    # sched_getaffinity respects the cores assigned by the container or taskset (it isn't available on every platform)
+    cores = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+    if threads_per_replica is None:
+        threads_per_replica = max(len(cores) // num_replicas, 1)
+    if num_replicas * threads_per_replica > len(cores):
+        raise ValueError("Cannot give " + str(threads_per_replica) + " cores to each of " + str(num_replicas) + " replicas, only " + str(len(cores)) + " cores are available.")
+
+    return [cores[index * threads_per_replica:(index + 1) * threads_per_replica] for index in range(num_replicas)]
+
+
+def _initialize_replica(core_partitions: multiprocessing.Queue, pin_cores: bool, model_options: Dict[str, Any], embedding_cache_options: Dict[str, Any]):
+    """Pins the worker process to its core partition, limits its thread pools and loads its model replica.
+
+    Args:
+        core_partitions (multiprocessing.Queue): Queue holding the core partitions which aren't taken by other workers.
+        pin_cores (bool): Whether the worker process is pinned to its cores.
+        model_options (Dict[str, Any]): Keyword arguments of the SummarizerModel.
+        embedding_cache_options (Dict[str, Any]): Keyword arguments of the EmbeddingCache of the replica (None disables caching).
+    """
+    global _replica
+
+    cores = core_partitions.get()
+    if pin_cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    # PyTorch runs the forward pass on the cores of the partition, BLAS / OpenMP pools (used by KMeans) are limited to the same number of threads
+    torch.set_num_threads(len(cores))
+    torch.set_num_interop_threads(1)
+    threadpool_limits(limits=len(cores))
+
+    embedding_cache = EmbeddingCache(**embedding_cache_options) if embedding_cache_options is not None else None
+    _replica = SummarizerModel(embedding_cache=embedding_cache, **model_options)
+    _replica.warm_up()
+
+
+def _warm_up_replica() -> int:
+    """Waits until the worker process has loaded and warmed up its model replica (the initializer runs before any task).
+
+    Returns:
+        int: ID of the worker process.
+    """
+    return os.getpid()
+
+
+def _summarize_in_replica(summarize_options: Dict[str, Any]) -> str:
+    """Summarizes a text with the model replica of the worker process.
+
+    Args:
+        summarize_options (Dict[str, Any]): Keyword arguments of SummarizerModel.summarize.
+
+    Returns:
+        str: A summary of the input text.
+    """
+    return _replica.summarize(**summarize_options)
+
+
+def _summarize_lengths_in_replica(summarize_options: Dict[str, Any]) -> List[str]:
+    """Summarizes a text in several lengths with the model replica of the worker process.
+
+    Args:
+        summarize_options (Dict[str, Any]): Keyword arguments of SummarizerModel.summarize_lengths.
+
+    Returns:
+        List[str]: Summaries of the input text, one for each length.
+    """
+    return _replica.summarize_lengths(**summarize_options)
+
+
+def _summarize_with_lengths_in_replica(summarize_options: Dict[str, Any]) -> Tuple[str, List[str]]:
+    """Summarizes a text along with its summaries of several lengths with the model replica of the worker process.
+
+    Args:
+        summarize_options (Dict[str, Any]): Keyword arguments of SummarizerModel.summarize_with_lengths.
+
+    Returns:
+        Tuple[str, List[str]]: The summary of the input text along with its summaries of the additional lengths.
+    """
+    return _replica.summarize_with_lengths(**summarize_options)
+
+
+class InferencePool(object):
+    """The class that runs several replicas of the SummarizerModel in worker processes, each pinned to its own partition of cores.
+
+    Requests are taken from a shared queue by the first idle replica, so that a long text doesn't hold up the texts behind it.
+
+    Attributes:
+        __num_replicas: int
+            Number of model replicas (worker processes).
+        __core_partitions: List[List[int]]
+            Core IDs of each replica.
+        __executor: ProcessPoolExecutor
+            Executor running the worker processes.
+
+    Methods:
+        get_num_replicas():
+            Retrieves the number of model replicas stored in a private class variable.
+        get_core_partitions():
+            Retrieves the core IDs of each replica stored in a private class variable.
+        submit(content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence'):
+            Sends the input text to the first idle replica.
+        summarize(content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence'):
+            Calculates the summary of the input text in one of the replicas.
+        summarize_lengths(content: str, lengths: List[Union[int, float]], min_length: int = 40, max_length: int = 600, use_first_sent: bool = True):
+            Calculates summaries of several lengths of the input text in one of the replicas.
+        summarize_with_lengths(content: str, lengths: List[Union[int, float]], sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True):
+            Calculates the summary of the input text along with the summaries of several lengths in one of the replicas.
+        warm_up():
+            Starts the worker processes and waits until every replica is loaded and warmed up.
+        shutdown():
+            Stops the worker processes.
+    """
+
+    def __init__(self, num_replicas: int = 2, threads_per_replica: int = None, pin_cores: bool = True, model_options: Dict[str, Any] = None, embedding_cache_options: Dict[str, Any] = None):
+        """Initializes an instance of the InferencePool class.
+
+        Args:
+            num_replicas (int, optional): Number of model replicas (worker processes). Defaults to 2.
+            threads_per_replica (int, optional): Number of cores (and threads) given to each replica. Defaults to None (the available cores are split evenly).
+            pin_cores (bool, optional): Whether each worker process is pinned to its cores. Defaults to True.
+            model_options (Dict[str, Any], optional): Keyword arguments of the SummarizerModel of each replica. Defaults to None.
+            embedding_cache_options (Dict[str, Any], optional): Keyword arguments of the EmbeddingCache of each replica (a 'db_path' is shared by all replicas). Defaults to None.
+        """
+        self.__num_replicas = num_replicas
+        self.__core_partitions = partition_cores(num_replicas, threads_per_replica)
+
+        # Worker processes are spawned, since forking a process with initialized thread pools can deadlock
+        context = multiprocessing.get_context("spawn")
+        core_partitions = context.Queue()
+        for cores in self.__core_partitions:
+            core_partitions.put(cores)
+        self.__executor = ProcessPoolExecutor(max_workers=num_replicas, mp_context=context, initializer=_initialize_replica,
+                                              initargs=(core_partitions, pin_cores, model_options or {}, embedding_cache_options))
+
+
+    def get_num_replicas(self) -> int:
+        """Retrieves the number of model replicas stored in a private class variable.
+
+        Returns:
+            int: Number of model replicas (specified upon class initialization).
+        """
+        return self.__num_replicas
+
+
+    def get_core_partitions(self) -> List[List[int]]:
+        """Retrieves the core IDs of each replica stored in a private class variable.
+
+        Returns:
+            List[List[int]]: Core IDs of each replica.
+        """
+        return self.__core_partitions
+
+
+    def submit(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence') -> Future:
+        """Sends the input text to the first idle replica.
+
+        Args:
+            content (str): Input text that will be summarized.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+            embedding_mode (str, optional): Whether each sentence is embedded on its own ('sentence') or in the context of the whole text ('document'). Defaults to 'sentence'.
+
+        Returns:
+            Future: Future resolving to the summary of the input text.
+        """
+        summarize_options = {"content": content, "sent_ratio": sent_ratio, "num_sentences": num_sentences, "min_length": min_length,
+                             "max_length": max_length, "use_first_sent": use_first_sent, "embedding_mode": embedding_mode}
+        return self.__executor.submit(_summarize_in_replica, summarize_options)
+
+
+    def summarize(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence') -> str:
+        """Calculates the summary of the input text in one of the replicas.
+
+        Args:
+            content (str): Input text that will be summarized.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+            embedding_mode (str, optional): Whether each sentence is embedded on its own ('sentence') or in the context of the whole text ('document'). Defaults to 'sentence'.
+
+        Returns:
+            str: A summary of the input text.
+        """
+        return self.submit(content, sent_ratio, num_sentences, min_length, max_length, use_first_sent, embedding_mode).result()
+
+
+    def summarize_lengths(self, content: str, lengths: List[Union[int, float]], min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> List[str]:
+        """Calculates summaries of several lengths of the input text in one of the replicas (see SummarizerModel.summarize_lengths).
+
+        Every replica keeps its own cache of hierarchies, so a follow-up request only skips the BERT model if it reaches the same replica.
+
+        Args:
+            content (str): Input text that will be summarized.
+            lengths (List[Union[int, float]]): Lengths of the summaries, an integer is an absolute number of sentences and a float is a ratio of the number of sentences.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summaries. Defaults to True.
+
+        Returns:
+            List[str]: Summaries of the input text, one for each length.
+        """
+        summarize_options = {"content": content, "lengths": lengths, "min_length": min_length, "max_length": max_length, "use_first_sent": use_first_sent}
+        return self.__executor.submit(_summarize_lengths_in_replica, summarize_options).result()
+
+
+    def summarize_with_lengths(self, content: str, lengths: List[Union[int, float]], sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> Tuple[str, List[str]]:
+        """Calculates the summary of the input text along with the summaries of several lengths in one of the replicas (see SummarizerModel.summarize_with_lengths).
+
+        Args:
+            content (str): Input text that will be summarized.
+            lengths (List[Union[int, float]]): Lengths of the additional summaries, an integer is an absolute number of sentences and a float is a ratio of the number of sentences.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned in the main summary. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned in the main summary. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summaries. Defaults to True.
+
+        Returns:
+            Tuple[str, List[str]]: The summary of the input text along with its summaries of the additional lengths.
+        """
+        summarize_options = {"content": content, "lengths": lengths, "sent_ratio": sent_ratio, "num_sentences": num_sentences, "min_length": min_length,
+                             "max_length": max_length, "use_first_sent": use_first_sent}
+        return self.__executor.submit(_summarize_with_lengths_in_replica, summarize_options).result()
+
+
+    def warm_up(self):
+        """Starts the worker processes and waits until every replica is loaded and warmed up."""
+        # Every worker is started by the first submission and runs its initializer (which warms up the replica) before any task
+        futures = [self.__executor.submit(_warm_up_replica) for _ in range(self.__num_replicas)]
+        for future in futures:
+            future.result()
+
+
+    def shutdown(self):
+        """Stops the worker processes."""
+        self.__executor.shutdown(wait=True)
+
+
+    def __call__(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence') -> str:
+        """Calculates the summary of the input text in one of the replicas (the same interface as the SummarizerModel).
+
+        Args:
+            content (str): Input text that will be summarized.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+            embedding_mode (str, optional): Whether each sentence is embedded on its own ('sentence') or in the context of the whole text ('document'). Defaults to 'sentence'.
+
+        Returns:
+            str: A summary of the input text.
+        """
+        return self.summarize(content, sent_ratio, num_sentences, min_length, max_length, use_first_sent, embedding_mode)
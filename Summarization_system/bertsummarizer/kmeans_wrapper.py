@@ -2,9 +2,77 @@ from typing import List, Dict, Union
 
 import numpy as np
 from numpy import ndarray
+from scipy.optimize import linear_sum_assignment
 
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 
+from numpy_kmeans import NumpyKMeans, batched_kmeans, squared_distance_matrix
+from profiling import traced
+
+
+# Clustering backends ('kmeans' is sklearn's KMeans, 'minibatch' is sklearn's MiniBatchKMeans for long texts,
+# 'numpy' is a lightweight k-means++ implementation without sklearn)
+SUPPORTED_BACKENDS = ('kmeans', 'minibatch', 'numpy')
+
+# Ways of assigning a sentence to every centroid ('greedy' picks the closest unused sentence for the centroids in order,
+# 'optimal' minimizes the total distance of the one-to-one assignment)
+SUPPORTED_ASSIGNMENTS = ('greedy', 'optimal')
+
+
+def compute_num_clusters(num_embeddings: int, sent_ratio: float = 0.2, num_sentences: int = None) -> int:
+    """Calculates the number of clusters using the number of sentences or the sentence ratio.
+
+    Args:
+        num_embeddings (int): Number of embeddings being clustered.
+        sent_ratio (float, optional): Ratio of the number of embeddings whose indices need to be returned. Defaults to 0.2.
+        num_sentences (int, optional): Absolute number of embeddings whose indices need to be returned. Defaults to None.
+
+    Returns:
+        int: Number of clusters.
+    """
+    if num_sentences is not None:
+        return min(num_sentences, num_embeddings)
+    return max(int(num_embeddings * sent_ratio), 1)
+
+
+def cluster_embeddings_batch(embeddings_list: List[np.ndarray], sent_ratio: Union[List[float], float] = 0.2, num_sentences: Union[List[int], int] = None, random_state: int = 12345,
+                             assignment: str = 'greedy', n_init: int = 1, batch_size: int = 32) -> List[List[int]]:
+    """Clusters the sentence embeddings of several texts together (see numpy_kmeans.batched_kmeans) and determines the list indices of the embeddings closest to the centroids of each text.
+
+    Texts are sorted by their number of sentences and clustered in groups of similar length, so that the padding stays small.
+    Every text gets the same indices as a KMeansWrapper with the 'numpy' backend (up to floating-point rounding).
+
+    Args:
+        embeddings_list (List[np.ndarray]): Sentence embeddings of each text.
+        sent_ratio (Union[List[float], float], optional): Ratio of the number of embeddings whose indices need to be returned (one ratio for all texts or one per text). Defaults to 0.2.
+        num_sentences (Union[List[int], int], optional): Absolute number of embeddings whose indices need to be returned (one number for all texts or one per text). Defaults to None.
+        random_state (int, optional): A fixed random seed (used for replication of results). Defaults to 12345.
+        assignment (str, optional): Way of assigning a sentence to every centroid ('greedy' or 'optimal'). Defaults to 'greedy'.
+        n_init (int, optional): Number of runs of the clustering with different seeds. Defaults to 1.
+        batch_size (int, optional): Maximum number of texts clustered together. Defaults to 32.
+
+    Returns:
+        List[List[int]]: Sorted list indices of the embeddings closest to cluster centroids of each text.
+    """
+    if not isinstance(sent_ratio, (list, tuple)):
+        sent_ratio = [sent_ratio] * len(embeddings_list)
+    if not isinstance(num_sentences, (list, tuple)):
+        num_sentences = [num_sentences] * len(embeddings_list)
+
+    # Texts without sentences (or without requested sentences) have no clusters
+    closest_indices = [[] for _ in embeddings_list]
+    texts = [text for text, embeddings in enumerate(embeddings_list) if len(embeddings) > 0 and num_sentences[text] != 0]
+    texts.sort(key=lambda text: len(embeddings_list[text]))
+
+    for start in range(0, len(texts), batch_size):
+        batch_texts = texts[start:start + batch_size]
+        n_clusters = [compute_num_clusters(len(embeddings_list[text]), sent_ratio[text], num_sentences[text]) for text in batch_texts]
+        centroids = batched_kmeans([embeddings_list[text] for text in batch_texts], n_clusters, n_init=n_init, random_state=random_state)
+        for text, text_clusters, text_centroids in zip(batch_texts, n_clusters, centroids):
+            wrapper = KMeansWrapper(embeddings_list[text], num_sentences=text_clusters, random_state=random_state, assignment=assignment, backend='numpy')
+            closest_indices[text] = sorted(wrapper.find_closest_sents(text_centroids).values())
+
+    return closest_indices
 
 
 class KMeansWrapper(object):
@@ -19,8 +87,16 @@ class KMeansWrapper(object):
             Absolute number of input sentence embeddings whose indices need to be returned.
         __random_state:
             A fixed random seed.
+        __backend:
+            Clustering backend ('kmeans', 'minibatch' or 'numpy').
+        __n_init:
+            Number of runs of the clustering with different seeds (None uses the default of the backend).
+        __algorithm:
+            Algorithm of sklearn's KMeans (None uses the default of sklearn).
         __model:
-            An instance of the KMeans class.
+            An instance of the KMeans class (or of the class of the selected backend).
+        __assignment:
+            Way of assigning a sentence to every centroid ('greedy' or 'optimal').
     
     Methods:
         get_model():
@@ -33,18 +109,22 @@ class KMeansWrapper(object):
             Retrieves the sentence ratio stored in a private class variable.
         get_num_sentences():
             Retrieves the number of sentences stored in a private class variable.
+        get_assignment():
+            Retrieves the way of assigning the sentences to centroids stored in a private class variable.
+        get_backend():
+            Retrieves the clustering backend stored in a private class variable.
         fit_model():
             Fits the KMeans model stored in a private class variable using sentence embeddings specified upon class initialization.
         retrieve_centroids():
             Retrieves the centroids of the fitted KMeans object stored in a private class variable.
-        find_closest_sents(cluster_centroids : np.ndarray):
+        find_closest_sents(cluster_centroids : np.ndarray, assignment: str = None):
             Determines the list indices of sentence embeddings who are closest to cluster centroids. Sentence embeddings are specified upon class initialization. 
         cluster_embeddings():
             Fits the KMeans model using the sentence embeddings specified upon class initialization, determines the list indices of the embeddings who fall closest to cluster centroids and returns those indices.
     """
 
 
-    def __init__(self, sent_embeddings: ndarray, sent_ratio: float = 0.2, num_sentences: int = None, random_state: int = 12345):
+    def __init__(self, sent_embeddings: ndarray, sent_ratio: float = 0.2, num_sentences: int = None, random_state: int = 12345, assignment: str = 'greedy', backend: str = 'kmeans', n_init: int = None, algorithm: str = None):
         """Initializes an instance of the KMeansWrapper class.
 
         Args:
@@ -52,30 +132,45 @@ class KMeansWrapper(object):
             sent_ratio (float, optional): Ratio of the number of input sentence embeddings whose indices need to be returned. Defaults to 0.2.
             num_sentences (int, optional): Absolute number of input sentence embeddings whose indices need to be returned. Defaults to None.
             random_state (int, optional): A fixed random seed (used for replication of results). Defaults to 12345.
+            assignment (str, optional): Way of assigning a sentence to every centroid. 'greedy' picks the closest sentence which wasn't picked by a previous centroid, 'optimal' picks the one-to-one assignment with the minimum total distance. Defaults to 'greedy'.
+            backend (str, optional): Clustering backend. 'kmeans' is sklearn's KMeans, 'minibatch' is sklearn's MiniBatchKMeans (faster on long texts), 'numpy' is a k-means++ implementation in NumPy (faster on short texts). Defaults to 'kmeans'.
+            n_init (int, optional): Number of runs of the clustering with different seeds (fewer runs are faster). Defaults to None (the default of sklearn's KMeans for 'kmeans', 3 for 'minibatch', 1 for 'numpy').
+            algorithm (str, optional): Algorithm of the 'kmeans' backend (e.g. 'full' or 'elkan', the names depend on the sklearn version). Defaults to None (the default of sklearn's KMeans).
         """
+        if assignment not in SUPPORTED_ASSIGNMENTS:
+            raise ValueError("Unsupported assignment '" + str(assignment) + "'. Supported assignments: " + ", ".join(SUPPORTED_ASSIGNMENTS) + ".")
+        if backend not in SUPPORTED_BACKENDS:
+            raise ValueError("Unsupported clustering backend '" + str(backend) + "'. Supported backends: " + ", ".join(SUPPORTED_BACKENDS) + ".")
         # Store the provided values
         self.__sent_embeddings = sent_embeddings
         self.__sent_ratio = sent_ratio
         self.__num_sentences = num_sentences
         self.__random_state = random_state
+        self.__assignment = assignment
+        self.__backend = backend
+        self.__n_init = n_init
+        self.__algorithm = algorithm
         # Instantiate the KMeans clustering model
         self.__model = self.__instantiate_model()
     
         
-    def __instantiate_model(self) -> KMeans:
-        """Initializes an instance of the KMeans clustering model.
+    def __instantiate_model(self) -> Union[KMeans, MiniBatchKMeans, NumpyKMeans]:
+        """Initializes an instance of the clustering model of the selected backend.
 
         Returns:
-            KMeans: Instance of the KMeans clustering model.
+            Union[KMeans, MiniBatchKMeans, NumpyKMeans]: Instance of the clustering model.
         """
         # Calculate the number of clusters using *number of sentences*/*sentence ratio*
-        if self.__num_sentences is not None:
-            n_clusters = min(self.__num_sentences, len(self.__sent_embeddings))
-        else:
-            n_clusters = max(int(len(self.__sent_embeddings)* self.__sent_ratio), 1)
+        n_clusters = compute_num_clusters(len(self.__sent_embeddings), self.__sent_ratio, self.__num_sentences)
             
-        # Initialize a KMeans object
-        return KMeans(n_clusters=n_clusters , random_state = self.__random_state)
+        # Initialize a clustering object of the selected backend
+        if self.__backend == 'minibatch':
+            return MiniBatchKMeans(n_clusters=n_clusters, random_state=self.__random_state, n_init=self.__n_init or 3)
+        if self.__backend == 'numpy':
+            return NumpyKMeans(n_clusters=n_clusters, random_state=self.__random_state, n_init=self.__n_init or 1)
+        # Only the options which were set are passed, so that the defaults follow the installed sklearn version
+        kmeans_options = {"n_init": self.__n_init, "algorithm": self.__algorithm}
+        return KMeans(n_clusters=n_clusters, random_state=self.__random_state, **{name: value for name, value in kmeans_options.items() if value is not None})
     
 
     def get_model(self) -> KMeans:
@@ -123,6 +218,25 @@ class KMeansWrapper(object):
         return self.__num_sentences
     
     
+    def get_assignment(self) -> str:
+        """Retrieves the way of assigning the sentences to centroids stored in a private class variable.
+
+        Returns:
+            str: Way of assigning a sentence to every centroid ('greedy' or 'optimal').
+        """
+        return self.__assignment
+    
+    
+    def get_backend(self) -> str:
+        """Retrieves the clustering backend stored in a private class variable.
+
+        Returns:
+            str: Clustering backend ('kmeans', 'minibatch' or 'numpy').
+        """
+        return self.__backend
+    
+    
+    @traced('fit_model')
     def fit_model(self) -> KMeans:
         """Fits the KMeans model stored in a private class variable using sentence embeddings specified upon class initialization.
 
@@ -130,7 +244,7 @@ class KMeansWrapper(object):
             KMeans: A fitted KMeans object.
         """
         # Fit the model and return it
-        self.__model = self.__model.fit(self.__sent_embeddings)
+        self.__model = self.__model.fit(self.__upcast_embeddings())
         return self.__model
     
 
@@ -143,40 +257,54 @@ class KMeansWrapper(object):
         return self.__model.cluster_centers_
 
 
-    def find_closest_sents(self, cluster_centroids : np.ndarray) -> Dict[int,int] : 
+    @traced('find_closest_sents')
+    def find_closest_sents(self, cluster_centroids : np.ndarray, assignment: str = None) -> Dict[int,int] : 
         """Determines the list indices of sentence embeddings who are closest to cluster centroids. Sentence embeddings are specified upon class initialization. 
 
+        The distances of all centroids to all sentence embeddings are computed by one matrix product. The 'greedy' assignment
+        selects the same sentences as a loop which, for the centroids in order, picks the closest sentence not picked before
+        (ties are resolved in favour of the lower index).
+
         Args:
             cluster_centroids (np.ndarray): Coordinates of cluster centroids.
+            assignment (str, optional): Way of assigning a sentence to every centroid ('greedy' or 'optimal'). Defaults to None (the assignment specified upon class initialization).
 
         Returns:
             Dict[int,int]: Dictionary whose keys are the centroid indices and values are list indices of the embeddings closest to those centroids.
         """
-        # Set up variables
-        min_distance = 1e10
-        used_sent_indexes = []
-        curr_sent_num = -1
+        assignment = assignment if assignment is not None else self.__assignment
+        sent_embeddings = self.__upcast_embeddings()
+        distances = squared_distance_matrix(sent_embeddings, cluster_centroids)
+
+        # Pick the one-to-one assignment with the minimum total distance
+        if assignment == 'optimal':
+            centroid_indices, sent_indices = linear_sum_assignment(np.sqrt(distances))
+            return {int(cent_num): int(sent_num) for cent_num, sent_num in zip(centroid_indices, sent_indices)}
+
+        # Rounding errors of the matrix product are far below this margin, so the closest sentence is always among the candidates
+        margins = 1e-5 * (distances.max(axis=1) + 1e-12)
+        used = np.zeros(len(sent_embeddings), dtype=bool)
         closest_sentences = {}
-
-        # For every centroid
         for cent_num, centroid in enumerate(cluster_centroids):
-            # For every sentence embedding, determine the distance to centroid
-            for sent_num, sent_features in enumerate(self.__sent_embeddings):
-                distance = np.linalg.norm(sent_features - centroid)
-                # Remember the index of the sentence embedding with the minimum distance 
-                if distance < min_distance and sent_num not in used_sent_indexes :
-                    curr_sent_num = sent_num
-                    min_distance = distance
-            # Store the index of the sentence embedding with minimum distance and reset the variables
-            used_sent_indexes.append(curr_sent_num)
+            # Sentences picked by previous centroids can't be picked again
+            row = np.where(used, np.inf, distances[cent_num])
+            min_distance = row.min()
+            if not np.isfinite(min_distance):
+                closest_sentences[cent_num] = -1
+                continue
+            # Resolve (near) ties with the same distance computation as the original loop, in the order of the sentences
+            candidates = np.flatnonzero(row <= min_distance + margins[cent_num])
+            if len(candidates) == 1:
+                curr_sent_num = int(candidates[0])
+            else:
+                candidate_distances = [np.linalg.norm(sent_embeddings[sent_num] - centroid) for sent_num in candidates]
+                curr_sent_num = int(candidates[int(np.argmin(candidate_distances))])
+            used[curr_sent_num] = True
             closest_sentences[cent_num] = curr_sent_num
-            min_distance = 1e10
-            curr_sent_num = -1
-        
+
         return closest_sentences
 
 
-    
     def cluster_embeddings(self) -> List[int] :
         """Fits the KMeans model using the sentence embeddings specified upon class initialization, determines the list indices of the embeddings who fall closest to cluster centroids and returns those indices.
 
@@ -200,6 +328,17 @@ class KMeansWrapper(object):
         return sorted_indices
     
 
+    def __upcast_embeddings(self) -> np.ndarray:
+        """Retrieves the sentence embeddings in the precision used by the clustering (float16 embeddings are upcast to float32, other embeddings are returned unchanged).
+
+        Returns:
+            numpy.ndarray: Sentence embeddings used by the clustering.
+        """
+        if self.__sent_embeddings.dtype == np.float16:
+            return self.__sent_embeddings.astype(np.float32)
+        return self.__sent_embeddings
+
+
     def __call__(self) -> List[int] :
         """Fits the KMeans model using the sentence embeddings specified upon class initialization, determines the list indices of the embeddings who fall closest to cluster centroids and returns those indices.
 
@@ -0,0 +1,282 @@
+from typing import List
+
+import numpy as np
+
+
+def squared_distance_matrix(sent_embeddings: np.ndarray, cluster_centroids: np.ndarray) -> np.ndarray:
+    """Computes the squared euclidean distance of every centroid to every sentence embedding with a single matrix product.
+
+    Args:
+        sent_embeddings (np.ndarray): Sentence embeddings (one per row).
+        cluster_centroids (np.ndarray): Coordinates of cluster centroids (one per row).
+
+    Returns:
+        np.ndarray: Squared distances (one row per centroid, one column per sentence embedding), computed in float64.
+    """
+    sent_embeddings = np.asarray(sent_embeddings, dtype=np.float64)
+    cluster_centroids = np.asarray(cluster_centroids, dtype=np.float64)
+    # ||c - x||^2 = ||c||^2 - 2 c.x + ||x||^2
+    distances = np.einsum('ij,ij->i', cluster_centroids, cluster_centroids)[:, None] - 2 * cluster_centroids @ sent_embeddings.T
+    distances += np.einsum('ij,ij->i', sent_embeddings, sent_embeddings)[None, :]
+    # Rounding can make the distance of (nearly) identical vectors slightly negative
+    return np.maximum(distances, 0)
+
+
+class NumpyKMeans(object):
+    """The class that clusters embeddings with k-means++ seeding and Lloyd iterations implemented in NumPy (a lightweight alternative to sklearn's KMeans with the same fit / cluster_centers_ interface).
+
+    Attributes:
+        n_clusters: int
+            Number of clusters.
+        n_init: int
+            Number of runs with different seeds (the run with the lowest inertia is kept).
+        max_iter: int
+            Maximum number of Lloyd iterations of one run.
+        tol: float
+            Convergence threshold on the squared centroid shift, relative to the mean variance of the data.
+        random_state: int
+            A fixed random seed.
+        cluster_centers_: np.ndarray
+            Coordinates of cluster centroids (set by fit).
+        labels_: np.ndarray
+            Cluster of every embedding (set by fit).
+        inertia_: float
+            Sum of squared distances of the embeddings to their centroids (set by fit).
+        n_iter_: int
+            Number of Lloyd iterations of the kept run (set by fit).
+    """
+
+    def __init__(self, n_clusters: int, n_init: int = 1, max_iter: int = 100, tol: float = 1e-4, random_state: int = None):
+        """Initializes an instance of the NumpyKMeans class.
+
+        Args:
+            n_clusters (int): Number of clusters.
+            n_init (int, optional): Number of runs with different seeds. Defaults to 1.
+            max_iter (int, optional): Maximum number of Lloyd iterations of one run. Defaults to 100.
+            tol (float, optional): Convergence threshold on the squared centroid shift, relative to the mean variance of the data. Defaults to 1e-4.
+            random_state (int, optional): A fixed random seed. Defaults to None.
+        """
+        self.n_clusters = n_clusters
+        self.n_init = n_init
+        self.max_iter = max_iter
+        self.tol = tol
+        self.random_state = random_state
+
+
+    def fit(self, embeddings: np.ndarray) -> "NumpyKMeans":
+        """Clusters the embeddings.
+
+        Args:
+            embeddings (np.ndarray): Embeddings being clustered (one per row).
+
+        Returns:
+            NumpyKMeans: The fitted instance.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float64)
+        random_state = np.random.RandomState(self.random_state)
+        tolerance = self.tol * np.var(embeddings, axis=0).mean()
+
+        best_run = None
+        for _ in range(self.n_init):
+            run = self.__lloyd(embeddings, self.__init_centroids(embeddings, random_state), tolerance)
+            if best_run is None or run[2] < best_run[2]:
+                best_run = run
+        self.cluster_centers_, self.labels_, self.inertia_, self.n_iter_ = best_run
+        return self
+
+
+    def __init_centroids(self, embeddings: np.ndarray, random_state: np.random.RandomState) -> np.ndarray:
+        """Seeds the centroids with k-means++ (every next centroid is sampled with a probability proportional to its squared distance from the closest centroid so far).
+
+        Args:
+            embeddings (np.ndarray): Embeddings being clustered.
+            random_state (np.random.RandomState): Generator of the random numbers.
+
+        Returns:
+            np.ndarray: Initial centroids.
+        """
+        centroids = [embeddings[random_state.randint(len(embeddings))]]
+        closest_distances = squared_distance_matrix(embeddings, centroids[0][None, :])[0]
+        for _ in range(1, self.n_clusters):
+            total = closest_distances.sum()
+            # All remaining embeddings coincide with a centroid, so any of them will do
+            if total <= 0:
+                index = random_state.randint(len(embeddings))
+            else:
+                index = min(np.searchsorted(np.cumsum(closest_distances), random_state.uniform(0, total)), len(embeddings) - 1)
+            centroids.append(embeddings[index])
+            closest_distances = np.minimum(closest_distances, squared_distance_matrix(embeddings, embeddings[index][None, :])[0])
+        return np.array(centroids)
+
+
+    def __lloyd(self, embeddings: np.ndarray, centroids: np.ndarray, tolerance: float):
+        """Runs the Lloyd iterations from the initial centroids.
+
+        Args:
+            embeddings (np.ndarray): Embeddings being clustered.
+            centroids (np.ndarray): Initial centroids.
+            tolerance (float): Absolute convergence threshold on the squared centroid shift.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, float, int]: Centroids, cluster of every embedding, inertia, number of iterations.
+        """
+        for iteration in range(1, self.max_iter + 1):
+            # Assign every embedding to its closest centroid
+            distances = squared_distance_matrix(embeddings, centroids)
+            labels = distances.argmin(axis=0)
+            counts = np.bincount(labels, minlength=self.n_clusters)
+            # Move every centroid to the mean of its embeddings
+            new_centroids = np.zeros_like(centroids)
+            np.add.at(new_centroids, labels, embeddings)
+            non_empty = counts > 0
+            new_centroids[non_empty] /= counts[non_empty, None]
+            # An empty cluster is moved to the embedding which is the farthest from its centroid
+            for cluster in np.flatnonzero(~non_empty):
+                farthest = distances[labels, np.arange(len(embeddings))].argmax()
+                new_centroids[cluster] = embeddings[farthest]
+                distances[:, farthest] = 0
+
+            shift = ((new_centroids - centroids) ** 2).sum()
+            centroids = new_centroids
+            if shift <= tolerance:
+                break
+
+        distances = squared_distance_matrix(embeddings, centroids)
+        labels = distances.argmin(axis=0)
+        return centroids, labels, float(distances[labels, np.arange(len(embeddings))].sum()), iteration
+
+
+def batched_kmeans(embeddings_list: List[np.ndarray], n_clusters_list: List[int], n_init: int = 1, max_iter: int = 100, tol: float = 1e-4, random_state: int = None) -> List[np.ndarray]:
+    """Clusters the embeddings of several texts at once, running k-means++ seeding and Lloyd iterations on padded arrays.
+
+    Each text draws its random numbers from its own generator in the same order as NumpyKMeans, so every text gets the same
+    centroids (up to floating-point rounding) as a NumpyKMeans fitted on that text alone.
+
+    Args:
+        embeddings_list (List[np.ndarray]): Embeddings of each text (one per row, every text has at least one embedding).
+        n_clusters_list (List[int]): Number of clusters of each text (between 1 and the number of its embeddings).
+        n_init (int, optional): Number of runs with different seeds (the run with the lowest inertia is kept for each text). Defaults to 1.
+        max_iter (int, optional): Maximum number of Lloyd iterations of one run. Defaults to 100.
+        tol (float, optional): Convergence threshold on the squared centroid shift, relative to the mean variance of each text. Defaults to 1e-4.
+        random_state (int, optional): A fixed random seed. Defaults to None.
+
+    Returns:
+        List[np.ndarray]: Centroids of each text.
+    """
+    num_texts = len(embeddings_list)
+    sizes = np.array([len(embeddings) for embeddings in embeddings_list])
+    n_clusters = np.array(n_clusters_list)
+
+    # Pad the texts to the same number of embeddings and the same number of centroids
+    padded = np.zeros((num_texts, sizes.max(), np.shape(embeddings_list[0])[1]), dtype=np.float64)
+    for text, embeddings in enumerate(embeddings_list):
+        padded[text, :sizes[text]] = embeddings
+    point_mask = np.arange(sizes.max())[None, :] < sizes[:, None]
+    centroid_mask = np.arange(n_clusters.max())[None, :] < n_clusters[:, None]
+    tolerances = np.array([tol * np.var(np.asarray(embeddings, dtype=np.float64), axis=0).mean() for embeddings in embeddings_list])
+
+    generators = [np.random.RandomState(random_state) for _ in range(num_texts)]
+    best_centroids, best_inertia = None, np.full(num_texts, np.inf)
+    for _ in range(n_init):
+        centroids = _batched_init_centroids(padded, sizes, n_clusters, generators)
+        centroids, inertia = _batched_lloyd(padded, point_mask, centroid_mask, centroids, tolerances, max_iter)
+        # Keep the run with the lowest inertia of every text
+        improved = inertia < best_inertia
+        best_centroids = centroids if best_centroids is None else np.where(improved[:, None, None], centroids, best_centroids)
+        best_inertia = np.where(improved, inertia, best_inertia)
+
+    return [best_centroids[text, :n_clusters[text]] for text in range(num_texts)]
+
+
+def _batched_squared_distances(padded: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Computes the squared distance of every centroid to every embedding of every text with one batched matrix product.
+
+    Args:
+        padded (np.ndarray): Padded embeddings (text, embedding, dimension).
+        centroids (np.ndarray): Padded centroids (text, centroid, dimension).
+
+    Returns:
+        np.ndarray: Squared distances (text, centroid, embedding).
+    """
+    distances = np.einsum('bkd,bkd->bk', centroids, centroids)[:, :, None] - 2 * np.matmul(centroids, padded.transpose(0, 2, 1))
+    distances += np.einsum('bnd,bnd->bn', padded, padded)[:, None, :]
+    return np.maximum(distances, 0)
+
+
+def _batched_init_centroids(padded: np.ndarray, sizes: np.ndarray, n_clusters: np.ndarray, generators: List[np.random.RandomState]) -> np.ndarray:
+    """Seeds the centroids of every text with k-means++ (see NumpyKMeans).
+
+    Args:
+        padded (np.ndarray): Padded embeddings (text, embedding, dimension).
+        sizes (np.ndarray): Number of embeddings of each text.
+        n_clusters (np.ndarray): Number of clusters of each text.
+        generators (List[np.random.RandomState]): Generator of the random numbers of each text.
+
+    Returns:
+        np.ndarray: Padded initial centroids (text, centroid, dimension).
+    """
+    num_texts = len(padded)
+    centroids = np.zeros((num_texts, n_clusters.max(), padded.shape[2]), dtype=np.float64)
+    indices = np.array([generators[text].randint(sizes[text]) for text in range(num_texts)])
+    centroids[:, 0] = padded[np.arange(num_texts), indices]
+    closest_distances = _batched_squared_distances(padded, centroids[:, :1])[:, 0]
+
+    for cluster in range(1, n_clusters.max()):
+        for text in np.flatnonzero(n_clusters > cluster):
+            text_distances = closest_distances[text, :sizes[text]]
+            total = text_distances.sum()
+            # All remaining embeddings coincide with a centroid, so any of them will do
+            if total <= 0:
+                indices[text] = generators[text].randint(sizes[text])
+            else:
+                indices[text] = min(np.searchsorted(np.cumsum(text_distances), generators[text].uniform(0, total)), sizes[text] - 1)
+        centroids[:, cluster] = padded[np.arange(num_texts), indices]
+        closest_distances = np.minimum(closest_distances, _batched_squared_distances(padded, centroids[:, cluster:cluster + 1])[:, 0])
+
+    return centroids
+
+
+def _batched_lloyd(padded: np.ndarray, point_mask: np.ndarray, centroid_mask: np.ndarray, centroids: np.ndarray, tolerances: np.ndarray, max_iter: int):
+    """Runs the Lloyd iterations of every text until all texts have converged (a converged text keeps its centroids).
+
+    Args:
+        padded (np.ndarray): Padded embeddings (text, embedding, dimension).
+        point_mask (np.ndarray): Mask of the embeddings which aren't padding (text, embedding).
+        centroid_mask (np.ndarray): Mask of the centroids which aren't padding (text, centroid).
+        centroids (np.ndarray): Padded initial centroids (text, centroid, dimension).
+        tolerances (np.ndarray): Absolute convergence threshold of each text.
+        max_iter (int): Maximum number of Lloyd iterations.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Padded centroids, inertia of each text.
+    """
+    num_clusters = centroids.shape[1]
+    active = np.ones(len(padded), dtype=bool)
+    for _ in range(max_iter):
+        # Assign every embedding to its closest centroid (padded centroids are never the closest)
+        distances = _batched_squared_distances(padded, centroids)
+        distances[~centroid_mask] = np.inf
+        labels = distances.argmin(axis=1)
+        assignments = (labels[:, :, None] == np.arange(num_clusters)[None, None, :]) & point_mask[:, :, None]
+        counts = assignments.sum(axis=1)
+        # Move every centroid to the mean of its embeddings
+        new_centroids = np.matmul(assignments.transpose(0, 2, 1).astype(np.float64), padded)
+        non_empty = counts > 0
+        new_centroids[non_empty] /= counts[non_empty][:, None]
+        # An empty cluster is moved to the embedding which is the farthest from its centroid
+        for text, cluster in zip(*np.nonzero(~non_empty & centroid_mask & active[:, None])):
+            assigned_distances = np.where(point_mask[text], np.take_along_axis(distances[text], labels[text][None, :], axis=0)[0], -np.inf)
+            farthest = assigned_distances.argmax()
+            new_centroids[text, cluster] = padded[text, farthest]
+            distances[text, :, farthest] = 0
+
+        shifts = ((new_centroids - centroids) ** 2 * centroid_mask[:, :, None]).sum(axis=(1, 2))
+        centroids = np.where(active[:, None, None], new_centroids, centroids)
+        active &= shifts > tolerances
+        if not active.any():
+            break
+
+    distances = _batched_squared_distances(padded, centroids)
+    distances[~centroid_mask] = np.inf
+    inertia = np.where(point_mask, distances.min(axis=1), 0).sum(axis=1)
+    return centroids, inertia
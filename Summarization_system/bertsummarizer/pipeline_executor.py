@@ -0,0 +1,433 @@
+import contextlib
+import contextvars
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
+
+from profiling import StageTrace, count, get_active_trace, stage
+from sentence_separator import SentenceSeparator, _initialize_worker, _separate_batch
+from summarizer_model import SummarizerModel
+
+
+# Ways of running the sentence separation stage ('thread' runs a separator in every worker thread, 'process' sends the texts to worker processes)
+SUPPORTED_SEPARATION_MODES = ('thread', 'process')
+
+# Marks the end of the jobs in a queue between the stages
+_STOP = None
+
+
+class _SummaryJob(object):
+    """The class that holds a text on its way through the stages of the PipelineExecutor.
+
+    Attributes:
+        content: str
+            Input text.
+        options: Dict[str, Union[float, int, bool]]
+            Parameters of the summary (sent_ratio, num_sentences, min_length, max_length and use_first_sent).
+        future: Future
+            Future resolving to the summary of the text.
+        sentences: List[str]
+            Sentences of the text (set by the separation stage).
+        sent_embeddings: np.ndarray
+            Embeddings of the sentences (set by the encoding stage).
+        context: contextvars.Context
+            Copy of the context of the submitting thread (the stages of the job run in it, so that they are recorded in its active trace).
+    """
+
+    def __init__(self, content: str, options: Dict[str, Union[float, int, bool]]):
+        """Initializes an instance of the _SummaryJob class.
+
+        Args:
+            content (str): Input text.
+            options (Dict[str, Union[float, int, bool]]): Parameters of the summary.
+        """
+        self.content = content
+        self.options = options
+        self.future = Future()
+        self.sentences = None
+        self.sent_embeddings = None
+        self.context = contextvars.copy_context()
+
+
+class PipelineExecutor(object):
+    """The class that runs the sentence separation, the BERT model and the clustering of a SummarizerModel as concurrent stages connected by bounded queues.
+
+    Every stage works on a different text at the same time, so the throughput of many texts (a bulk job or concurrent API requests) approaches
+    the throughput of the slowest stage instead of the sum of all stages. The sentences are separated by a pool of threads (or worker processes),
+    embedded by a single thread which owns the BERT model and clustered by another pool of threads. The encoding thread takes every text waiting
+    in its queue (up to *max_batch_documents*) and embeds their sentences together. A full queue blocks the stage in front of it, and a full first
+    queue blocks the submitting thread (backpressure), so the number of texts in flight is bounded.
+
+    PyTorch, NumPy and scikit-learn release the GIL in their numerical kernels, so the threads of the stages do overlap. The streaming clustering
+    mode and the 'document' embedding mode of the SummarizerModel aren't used by the pipeline. The stages of a text run in a copy of the context
+    of the submitting thread, so they are recorded in its active StageTrace (the embedding of a shared batch is recorded for every text in it, with its counts prefixed by 'batch_').
+
+    Attributes:
+        __summarizer: SummarizerModel
+            The model whose stages are run.
+        __max_batch_documents: int
+            Maximum number of texts whose sentences are embedded together.
+        __batch_size: int
+            Number of sentences embedded in one forward pass.
+        __queues: Dict[str, queue.Queue]
+            Bounded queues in front of the 'separation', 'encoding' and 'clustering' stages.
+        __threads: Dict[str, List[threading.Thread]]
+            Worker threads of every stage.
+        __process_pool: ProcessPoolExecutor
+            Worker processes of the separation stage (None in the 'thread' mode).
+        __busy_times: Dict[str, float]
+            Time spent by the workers of every stage on the texts (in seconds).
+        __lock: threading.Lock
+            Lock guarding the busy times.
+
+    Methods:
+        get_summarizer():
+            Retrieves the model whose stages are run stored in a private class variable.
+        get_busy_times():
+            Retrieves the time spent by the workers of every stage on the texts.
+        submit(content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True):
+            Sends the input text into the pipeline.
+        map(contents: Iterable[str], sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True):
+            Streams the input texts through the pipeline and yields their summaries in the order of the texts.
+        summarize(content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence'):
+            Calculates the summary of the input text in the pipeline.
+        summarize_lengths(content: str, lengths: List[Union[int, float]], min_length: int = 40, max_length: int = 600, use_first_sent: bool = True):
+            Calculates summaries of several lengths of the input text (outside the pipeline).
+        summarize_with_lengths(content: str, lengths: List[Union[int, float]], sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True):
+            Calculates the summary of the input text along with the summaries of several lengths (outside the pipeline).
+        warm_up():
+            Warms up the model.
+        shutdown():
+            Finishes the texts in the pipeline and stops the workers of all stages.
+    """
+
+    def __init__(self, summarizer: SummarizerModel, separation_workers: int = 1, separation_mode: str = 'thread', clustering_workers: int = 1, queue_size: int = 16, max_batch_documents: int = 8, batch_size: int = 32):
+        """Initializes an instance of the PipelineExecutor class and starts the workers of all stages.
+
+        Args:
+            summarizer (SummarizerModel): The model whose stages are run.
+            separation_workers (int, optional): Number of threads (or worker processes) separating the texts into sentences. Defaults to 1.
+            separation_mode (str, optional): Whether the texts are separated in threads ('thread') or in worker processes ('process'). Defaults to 'thread'.
+            clustering_workers (int, optional): Number of threads clustering the sentence embeddings. Defaults to 1.
+            queue_size (int, optional): Maximum number of texts waiting in front of every stage. Defaults to 16.
+            max_batch_documents (int, optional): Maximum number of texts whose sentences are embedded together. Defaults to 8.
+            batch_size (int, optional): Number of sentences embedded in one forward pass. Defaults to 32.
+        """
+        if separation_mode not in SUPPORTED_SEPARATION_MODES:
+            raise ValueError("Unsupported separation mode '" + str(separation_mode) + "'. Supported modes: " + ", ".join(SUPPORTED_SEPARATION_MODES) + ".")
+
+        self.__summarizer = summarizer
+        self.__max_batch_documents = max_batch_documents
+        self.__batch_size = batch_size
+        self.__queues = {stage_name: queue.Queue(maxsize=queue_size) for stage_name in ('separation', 'encoding', 'clustering')}
+        self.__busy_times = {stage_name: 0.0 for stage_name in ('separation', 'encoding', 'clustering')}
+        self.__lock = threading.Lock()
+
+        # Every separation thread has its own separator (or sends the texts to the worker processes, which create their own separators)
+        separator = summarizer.get_sentence_separator()
+        self.__process_pool = None
+        if separation_mode == 'process':
+            # Worker processes are spawned, since forking a process with initialized thread pools (e.g. of the BERT model) can deadlock
+            self.__process_pool = ProcessPoolExecutor(max_workers=separation_workers, mp_context=multiprocessing.get_context("spawn"), initializer=_initialize_worker,
+                                                      initargs=(separator.get_language(), separator.get_engine()))
+
+        self.__threads = {
+            'separation': [threading.Thread(target=self.__run_separation, args=(SentenceSeparator(language=separator.get_language(), engine=separator.get_engine()),), daemon=True)
+                           for _ in range(separation_workers)],
+            'encoding': [threading.Thread(target=self.__run_encoding, daemon=True)],
+            'clustering': [threading.Thread(target=self.__run_clustering, daemon=True) for _ in range(clustering_workers)],
+        }
+        for threads in self.__threads.values():
+            for thread in threads:
+                thread.start()
+
+
+    def get_summarizer(self) -> SummarizerModel:
+        """Retrieves the model whose stages are run stored in a private class variable.
+
+        Returns:
+            SummarizerModel: The model whose stages are run (specified upon class initialization).
+        """
+        return self.__summarizer
+
+
+    def get_busy_times(self) -> Dict[str, float]:
+        """Retrieves the time spent by the workers of every stage on the texts (the stage with the longest time per worker is the bottleneck of the pipeline).
+
+        Returns:
+            Dict[str, float]: Busy time of the 'separation', 'encoding' and 'clustering' stage (in seconds, summed over the workers of the stage).
+        """
+        with self.__lock:
+            return dict(self.__busy_times)
+
+
+    def __add_busy_time(self, stage_name: str, start_time: float):
+        """Adds the time elapsed since the start time to the busy time of a stage.
+
+        Args:
+            stage_name (str): Name of the stage.
+            start_time (float): Value of time.perf_counter() when the work started.
+        """
+        elapsed_time = time.perf_counter() - start_time
+        with self.__lock:
+            self.__busy_times[stage_name] += elapsed_time
+
+
+    def __run_separation(self, separator: SentenceSeparator):
+        """Separates the texts of the jobs into sentences (the loop of a separation thread).
+
+        Args:
+            separator (SentenceSeparator): Sentence separator of the thread (unused in the 'process' mode).
+        """
+        for job in iter(self.__queues['separation'].get, _STOP):
+            start_time = time.perf_counter()
+            try:
+                job.sentences = job.context.run(self.__separate_job, separator, job)
+            except Exception as error:
+                job.future.set_exception(error)
+                continue
+            finally:
+                self.__add_busy_time('separation', start_time)
+            self.__queues['encoding'].put(job)
+
+
+    def __separate_job(self, separator: SentenceSeparator, job: _SummaryJob) -> List[str]:
+        """Separates the text of a job into sentences.
+
+        Args:
+            separator (SentenceSeparator): Sentence separator of the thread (unused in the 'process' mode).
+            job (_SummaryJob): The job whose text is separated.
+
+        Returns:
+            List[str]: Sentences of the text.
+        """
+        with stage('separate_sentences'):
+            if self.__process_pool is not None:
+                sentences = self.__process_pool.submit(_separate_batch, ([job.content], job.options["min_length"], job.options["max_length"], 1)).result()[0]
+            else:
+                sentences = separator.process_content(job.content, min_length=job.options["min_length"], max_length=job.options["max_length"])
+        count('sentences', len(sentences))
+        return sentences
+
+
+    def __run_encoding(self):
+        """Embeds the sentences of the waiting jobs together (the loop of the encoding thread)."""
+        encoding_queue = self.__queues['encoding']
+        stopping = False
+        while not stopping:
+            # Wait for a job, then take the jobs which are already waiting (without waiting for more)
+            jobs = [encoding_queue.get()]
+            while jobs[-1] is not _STOP and len(jobs) < self.__max_batch_documents:
+                try:
+                    jobs.append(encoding_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if jobs[-1] is _STOP:
+                jobs.pop()
+                stopping = True
+
+            start_time = time.perf_counter()
+            embedded_jobs = [job for job in jobs if job.sentences]
+            try:
+                # The embedding of the shared batch is recorded (only if some of its jobs are traced) in the traces of all its jobs. The batch
+                # can't be split by job, so its counts (e.g. the tokens) are the totals of the whole batch
+                job_traces = [trace for trace in (job.context.run(get_active_trace) for job in embedded_jobs) if trace is not None]
+                batch_trace = StageTrace() if job_traces else None
+                pooled_sents = [sentence for job in embedded_jobs for sentence in job.sentences]
+                with batch_trace or contextlib.nullcontext():
+                    pooled_embeddings = self.__summarizer.retrieve_sent_embeddings(content_sents=pooled_sents, batch_size=self.__batch_size) if pooled_sents else None
+                for job_trace in job_traces:
+                    job_trace.merge(batch_trace, count_prefix='batch_')
+                # Scatter the embeddings back to the jobs
+                start = 0
+                for job in embedded_jobs:
+                    job.sent_embeddings = pooled_embeddings[start:start + len(job.sentences)]
+                    start += len(job.sentences)
+            except Exception as error:
+                for job in jobs:
+                    job.future.set_exception(error)
+                continue
+            finally:
+                self.__add_busy_time('encoding', start_time)
+
+            for job in jobs:
+                self.__queues['clustering'].put(job)
+
+
+    def __cluster_job(self, job: _SummaryJob) -> str:
+        """Clusters the sentence embeddings of a job and joins the selected sentences.
+
+        Args:
+            job (_SummaryJob): The job whose sentences are clustered.
+
+        Returns:
+            str: A summary of the text of the job.
+        """
+        closest_sent_indices = []
+        if job.sentences:
+            closest_sent_indices = self.__summarizer.cluster_sent_embeddings(job.sent_embeddings, sent_ratio=job.options["sent_ratio"], num_sentences=job.options["num_sentences"])
+
+            # Include the index of the first sentence if *useFirstSent* is set to true
+            if job.options["use_first_sent"]:
+                if not closest_sent_indices:
+                    closest_sent_indices.append(0)
+                elif closest_sent_indices[0] != 0:
+                    closest_sent_indices.insert(0 , 0)
+        return ' '.join(job.sentences[index] for index in closest_sent_indices)
+
+
+    def __run_clustering(self):
+        """Clusters the sentence embeddings of the jobs and resolves their futures (the loop of a clustering thread)."""
+        for job in iter(self.__queues['clustering'].get, _STOP):
+            start_time = time.perf_counter()
+            try:
+                summary = job.context.run(self.__cluster_job, job)
+            except Exception as error:
+                job.future.set_exception(error)
+                continue
+            finally:
+                self.__add_busy_time('clustering', start_time)
+            job.future.set_result(summary)
+
+
+    def submit(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> Future:
+        """Sends the input text into the pipeline (blocks while the queue of the first stage is full).
+
+        Args:
+            content (str): Input text that will be summarized.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+
+        Returns:
+            Future: Future resolving to the summary of the input text.
+        """
+        job = _SummaryJob(content, {"sent_ratio": sent_ratio, "num_sentences": num_sentences, "min_length": min_length, "max_length": max_length, "use_first_sent": use_first_sent})
+        self.__queues['separation'].put(job)
+        return job.future
+
+
+    def map(self, contents: Iterable[str], sent_ratio: float = 0.2, num_sentences: Union[List[int], int] = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> Iterator[str]:
+        """Streams the input texts through the pipeline and yields their summaries in the order of the texts.
+
+        The texts are read lazily, at most a few queues' worth of texts is submitted ahead of the summary which is yielded next.
+
+        Args:
+            contents (Iterable[str]): Input texts that will be summarized.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned. Defaults to 0.2
+            num_sentences (Union[List[int], int], optional): Absolute number of input text sentences that need to be returned (one number for all texts or one per text). Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+
+        Yields:
+            str: Summary of each input text.
+        """
+        max_pending = sum(stage_queue.maxsize for stage_queue in self.__queues.values()) + sum(len(threads) for threads in self.__threads.values())
+        pending = deque()
+        for num, content in enumerate(contents):
+            num_sents = num_sentences[num] if isinstance(num_sentences, (list, tuple)) else num_sentences
+            pending.append(self.submit(content, sent_ratio, num_sents, min_length, max_length, use_first_sent))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+    def summarize(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence') -> str:
+        """Calculates the summary of the input text in the pipeline.
+
+        Args:
+            content (str): Input text that will be summarized.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+            embedding_mode (str, optional): Only the 'sentence' embedding mode is supported by the pipeline. Defaults to 'sentence'.
+
+        Returns:
+            str: A summary of the input text.
+        """
+        if embedding_mode != 'sentence':
+            raise ValueError("Unsupported embedding mode '" + str(embedding_mode) + "'. The pipeline only supports the 'sentence' mode.")
+        return self.submit(content, sent_ratio, num_sentences, min_length, max_length, use_first_sent).result()
+
+
+    def summarize_lengths(self, content: str, lengths: List[Union[int, float]], min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> List[str]:
+        """Calculates summaries of several lengths of the input text (see SummarizerModel.summarize_lengths), outside the pipeline in the calling thread.
+
+        Args:
+            content (str): Input text that will be summarized.
+            lengths (List[Union[int, float]]): Lengths of the summaries, an integer is an absolute number of sentences and a float is a ratio of the number of sentences.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summaries. Defaults to True.
+
+        Returns:
+            List[str]: Summaries of the input text, one for each length.
+        """
+        return self.__summarizer.summarize_lengths(content=content, lengths=lengths, min_length=min_length, max_length=max_length, use_first_sent=use_first_sent)
+
+
+    def summarize_with_lengths(self, content: str, lengths: List[Union[int, float]], sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> Tuple[str, List[str]]:
+        """Calculates the summary of the input text along with the summaries of several lengths (see SummarizerModel.summarize_with_lengths), outside the pipeline in the calling thread.
+
+        Args:
+            content (str): Input text that will be summarized.
+            lengths (List[Union[int, float]]): Lengths of the additional summaries, an integer is an absolute number of sentences and a float is a ratio of the number of sentences.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned in the main summary. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned in the main summary. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summaries. Defaults to True.
+
+        Returns:
+            Tuple[str, List[str]]: The summary of the input text along with its summaries of the additional lengths.
+        """
+        return self.__summarizer.summarize_with_lengths(content=content, lengths=lengths, sent_ratio=sent_ratio, num_sentences=num_sentences, min_length=min_length,
+                                                        max_length=max_length, use_first_sent=use_first_sent)
+
+
+    def warm_up(self) -> float:
+        """Warms up the model (see SummarizerModel.warm_up).
+
+        Returns:
+            float: Duration of the warm-up in seconds.
+        """
+        return self.__summarizer.warm_up()
+
+
+    def shutdown(self):
+        """Finishes the texts in the pipeline and stops the workers of all stages (stage by stage, so that no text is left behind)."""
+        for stage_name in ('separation', 'encoding', 'clustering'):
+            for _ in self.__threads[stage_name]:
+                self.__queues[stage_name].put(_STOP)
+            for thread in self.__threads[stage_name]:
+                thread.join()
+        if self.__process_pool is not None:
+            self.__process_pool.shutdown(wait=True)
+
+
+    def __call__(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence') -> str:
+        """Calculates the summary of the input text in the pipeline (the same interface as the SummarizerModel).
+
+        Args:
+            content (str): Input text that will be summarized.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+            embedding_mode (str, optional): Only the 'sentence' embedding mode is supported by the pipeline. Defaults to 'sentence'.
+
+        Returns:
+            str: A summary of the input text.
+        """
+        return self.summarize(content, sent_ratio, num_sentences, min_length, max_length, use_first_sent, embedding_mode)
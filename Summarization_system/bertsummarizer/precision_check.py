@@ -0,0 +1,78 @@
+import argparse
+
+from benchmark_utils import create_local_corpus, load_local_corpus, gold_summary_lengths, select_summary_sentences, compute_rouge, selection_agreement
+from summarizer_model import SummarizerModel
+
+
+def check_precision(corpus_path: str, bert_version: str = 'bert-large-uncased', precision: str = 'bfloat16', embedding_dtype: str = 'float16', batch_size: int = 32,
+                    min_jaccard: float = 0.9, max_rouge_drop: float = 0.005) -> bool:
+    """Compares the summaries computed in a reduced precision with the summaries computed in float32 on a local corpus.
+
+    Args:
+        corpus_path (str): Path of the local corpus file (see benchmark_utils.create_local_corpus).
+        bert_version (str, optional): Version of the BERT model. Defaults to 'bert-large-uncased'.
+        precision (str, optional): Numerical precision of the encoder computation which is compared with float32. Defaults to 'bfloat16'.
+        embedding_dtype (str, optional): Data type of the sentence embeddings which is compared with float32. Defaults to 'float16'.
+        batch_size (int, optional): Number of sentences embedded in one forward pass. Defaults to 32.
+        min_jaccard (float, optional): Minimum mean Jaccard similarity of the selected sentences. Defaults to 0.9.
+        max_rouge_drop (float, optional): Maximum allowed drop of every ROUGE F-measure. Defaults to 0.005.
+
+    Returns:
+        bool: Whether the reduced precision passed the check.
+    """
+    corpus = load_local_corpus(corpus_path)
+    num_sentences = gold_summary_lengths(corpus)
+    references = [record["summary"] for record in corpus]
+
+    results = {}
+    for name, options in (('float32', {}), (precision + " / " + embedding_dtype, {"precision": precision, "embedding_dtype": embedding_dtype})):
+        summarizer = SummarizerModel(bert_version=bert_version, batch_size=batch_size, **options)
+        selection, elapsed_time = select_summary_sentences(summarizer, corpus, num_sentences)
+        rouge = compute_rouge([' '.join(sentences) for sentences in selection], references)
+        # Memory of the embedding matrix of a 100-sentence text
+        bert_model = summarizer.get_bert_model()
+        matrix_kb = 100 * bert_model(content=["Sounds insignificant."]).nbytes / 1024
+        results[name] = {"selection": selection, "time": elapsed_time, "rouge": rouge, "precision": bert_model.get_precision(), "matrix_kb": matrix_kb}
+        # Release the model before loading the next one
+        del summarizer, bert_model
+
+    reference, candidate = results['float32'], results[precision + " / " + embedding_dtype]
+    agreement = selection_agreement(reference["selection"], candidate["selection"])
+    rouge_drops = {rouge_type: reference["rouge"][rouge_type] - candidate["rouge"][rouge_type] for rouge_type in reference["rouge"]}
+
+    print(" ------------- PRECISION CHECK -------------------")
+    print("  " + str(len(corpus)) + " records")
+    for name, result in results.items():
+        print(" -> " + name.upper() + " (encoder runs in " + result["precision"] + ") : " + str(round(1000 * result["time"] / max(len(corpus), 1), 1)) + " ms/document, "
+              + str(round(result["matrix_kb"], 1)) + " KB per 100 sentence embeddings")
+        for rouge_type, value in result["rouge"].items():
+            print("      " + rouge_type + " : " + str(round(value, 4)))
+    print(" -> Identical selections : " + str(round(100 * agreement["exact_match"], 1)) + "%")
+    print(" -> Mean Jaccard of selections : " + str(round(agreement["mean_jaccard"], 4)))
+
+    # List the sentences whose selection changed
+    for index, (reference_sents, candidate_sents) in enumerate(zip(reference["selection"], candidate["selection"])):
+        if set(reference_sents) != set(candidate_sents):
+            print(" -> Record " + str(index) + " :")
+            for sentence in set(reference_sents) - set(candidate_sents):
+                print("      - " + sentence[:100])
+            for sentence in set(candidate_sents) - set(reference_sents):
+                print("      + " + sentence[:100])
+
+    passed = agreement["mean_jaccard"] >= min_jaccard and max(rouge_drops.values()) <= max_rouge_drop
+    print(" -> " + ("PASSED" if passed else "FAILED"))
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the reduced-precision inference with the float32 inference on a fixed local corpus.")
+    parser.add_argument("corpus", help="path of the local corpus file")
+    parser.add_argument("--create", type=int, default=0, help="create the corpus from the first N records of the CNN / Daily Mail test split")
+    parser.add_argument("--bert-version", default='bert-large-uncased')
+    parser.add_argument("--precision", choices=('float32', 'bfloat16'), default='bfloat16')
+    parser.add_argument("--embedding-dtype", choices=('float32', 'float16'), default='float16')
+    args = parser.parse_args()
+
+    if args.create:
+        create_local_corpus(args.corpus, num_records=args.create)
+    raise SystemExit(0 if check_precision(args.corpus, bert_version=args.bert_version, precision=args.precision, embedding_dtype=args.embedding_dtype) else 1)
@@ -0,0 +1,280 @@
+import contextlib
+import contextvars
+import functools
+import threading
+import time
+from typing import Callable, Dict, List, Tuple, Union
+
+
+# Trace of the current context (every thread and every asyncio task sees its own value, see contextvars)
+_active_trace = contextvars.ContextVar("summarizer_trace", default=None)
+
+# Context manager of the stages which run without an active trace
+_NO_TRACE = contextlib.nullcontext()
+
+
+class StageTrace(object):
+    """The class that records the wall and CPU time of every stage of a summary, along with the numbers of sentences and tokens and the shapes of the encoder batches.
+
+    A trace records the stages which run in the context in which it is active (see the with statement), including the contexts copied from
+    it (e.g. by the PipelineExecutor). Without an active trace, an instrumented stage costs a single context variable lookup. Stages can be
+    nested, e.g. 'summarize' contains 'separate_sentences', 'embed' and 'cluster', so the times of different stages don't add up. The CPU time
+    is the time of the calling thread, the threads of the PyTorch and BLAS thread pools aren't included.
+
+    Attributes:
+        __callback: Callable[[str, float, float], None]
+            Function called with the name, wall time and CPU time (in seconds) of every finished stage.
+        __stages: Dict[str, Dict[str, float]]
+            Number of calls, wall time and CPU time (in milliseconds) of every stage.
+        __counts: Dict[str, int]
+            Recorded counts (e.g. 'sentences' and 'tokens').
+        __batch_shapes: List[Tuple[int, ...]]
+            Shapes of the token batches which went through the encoder.
+        __lock: threading.Lock
+            Lock guarding the records against stages finishing in several threads.
+        __reset_tokens: List[contextvars.Token]
+            Tokens restoring the previously active trace when the trace is exited.
+
+    Methods:
+        get_stages():
+            Retrieves the number of calls, wall time and CPU time of every stage.
+        get_counts():
+            Retrieves the recorded counts.
+        get_batch_shapes():
+            Retrieves the shapes of the token batches which went through the encoder.
+        add_stage(name: str, wall_time: float, cpu_time: float):
+            Records a finished stage.
+        add_count(name: str, value: int):
+            Adds a value to a count.
+        add_batch_shape(shape: Tuple[int, ...]):
+            Records the shape of a token batch.
+        merge(other: StageTrace, count_prefix: str = ''):
+            Adds the records of another trace.
+        to_dict():
+            Retrieves all records as a dictionary.
+        server_timing():
+            Formats the wall times of the stages as the value of a Server-Timing HTTP header.
+    """
+
+    def __init__(self, callback: Callable[[str, float, float], None] = None):
+        """Initializes an instance of the StageTrace class.
+
+        Args:
+            callback (Callable[[str, float, float], None], optional): Function called with the name, wall time and CPU time (in seconds) of every finished stage. Defaults to None.
+        """
+        self.__callback = callback
+        self.__stages = {}
+        self.__counts = {}
+        self.__batch_shapes = []
+        self.__lock = threading.Lock()
+        self.__reset_tokens = []
+
+
+    def get_stages(self) -> Dict[str, Dict[str, float]]:
+        """Retrieves the number of calls, wall time and CPU time of every stage.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Dictionary with the keys 'calls', 'wall_ms' and 'cpu_ms' for every stage, in the order in which the stages first finished.
+        """
+        with self.__lock:
+            return {name: dict(stage) for name, stage in self.__stages.items()}
+
+
+    def get_counts(self) -> Dict[str, int]:
+        """Retrieves the recorded counts.
+
+        Returns:
+            Dict[str, int]: Value of every count (e.g. 'sentences' and 'tokens').
+        """
+        with self.__lock:
+            return dict(self.__counts)
+
+
+    def get_batch_shapes(self) -> List[Tuple[int, ...]]:
+        """Retrieves the shapes of the token batches which went through the encoder.
+
+        Returns:
+            List[Tuple[int, ...]]: Shape (number of texts, number of tokens) of every batch, in the order of the forward passes (a batch shared with other texts is recorded whole).
+        """
+        with self.__lock:
+            return list(self.__batch_shapes)
+
+
+    def add_stage(self, name: str, wall_time: float, cpu_time: float):
+        """Records a finished stage.
+
+        Args:
+            name (str): Name of the stage.
+            wall_time (float): Wall time of the stage in seconds.
+            cpu_time (float): CPU time of the stage in seconds.
+        """
+        with self.__lock:
+            stage = self.__stages.setdefault(name, {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0})
+            stage["calls"] += 1
+            stage["wall_ms"] += 1000 * wall_time
+            stage["cpu_ms"] += 1000 * cpu_time
+        if self.__callback is not None:
+            self.__callback(name, wall_time, cpu_time)
+
+
+    def add_count(self, name: str, value: int):
+        """Adds a value to a count.
+
+        Args:
+            name (str): Name of the count.
+            value (int): Added value.
+        """
+        with self.__lock:
+            self.__counts[name] = self.__counts.get(name, 0) + value
+
+
+    def add_batch_shape(self, shape: Tuple[int, ...]):
+        """Records the shape of a token batch.
+
+        Args:
+            shape (Tuple[int, ...]): Shape of the batch.
+        """
+        with self.__lock:
+            self.__batch_shapes.append(tuple(shape))
+
+
+    def merge(self, other: "StageTrace", count_prefix: str = ''):
+        """Adds the records of another trace (e.g. of a batch shared by several texts).
+
+        Args:
+            other (StageTrace): The trace whose records are added.
+            count_prefix (str, optional): Prefix added to the names of the merged counts (e.g. 'batch_' for the totals of a shared batch, so that they aren't mistaken for the counts of a single text). Defaults to ''.
+        """
+        other_stages, other_counts, other_shapes = other.get_stages(), other.get_counts(), other.get_batch_shapes()
+        with self.__lock:
+            for name, other_stage in other_stages.items():
+                stage = self.__stages.setdefault(name, {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0})
+                for key, value in other_stage.items():
+                    stage[key] += value
+            for name, value in other_counts.items():
+                self.__counts[count_prefix + name] = self.__counts.get(count_prefix + name, 0) + value
+            self.__batch_shapes.extend(other_shapes)
+
+
+    def to_dict(self) -> Dict[str, Union[Dict[str, Dict[str, float]], Dict[str, int], List[Tuple[int, ...]]]]:
+        """Retrieves all records as a dictionary (e.g. to be serialized or sent from another process).
+
+        Returns:
+            Dict[str, Union[Dict[str, Dict[str, float]], Dict[str, int], List[Tuple[int, ...]]]]: Stages, counts and batch shapes of the trace.
+        """
+        return {"stages": self.get_stages(), "counts": self.get_counts(), "batch_shapes": self.get_batch_shapes()}
+
+
+    def server_timing(self) -> str:
+        """Formats the wall times of the stages as the value of a Server-Timing HTTP header (shown by the developer tools of the browsers).
+
+        Returns:
+            str: Comma-separated metrics with the name of the stage and its duration in milliseconds.
+        """
+        return ", ".join(name + ";dur=" + str(round(stage["wall_ms"], 2)) for name, stage in self.get_stages().items())
+
+
+    def __enter__(self) -> "StageTrace":
+        """Makes the trace active in the current context.
+
+        Returns:
+            StageTrace: The trace itself.
+        """
+        self.__reset_tokens.append(_active_trace.set(self))
+        return self
+
+
+    def __exit__(self, *exc_info):
+        """Restores the trace which was active before."""
+        _active_trace.reset(self.__reset_tokens.pop())
+
+
+class _StageTimer(object):
+    """The class that measures one run of a stage and records it in a trace."""
+
+    __slots__ = ("trace", "name", "wall_start", "cpu_start")
+
+    def __init__(self, trace: StageTrace, name: str):
+        """Initializes an instance of the _StageTimer class.
+
+        Args:
+            trace (StageTrace): The trace in which the stage is recorded.
+            name (str): Name of the stage.
+        """
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        """Starts the measurement."""
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+
+    def __exit__(self, *exc_info):
+        """Records the stage in the trace (also if the stage raised an exception)."""
+        self.trace.add_stage(self.name, time.perf_counter() - self.wall_start, time.thread_time() - self.cpu_start)
+
+
+def get_active_trace() -> Union[StageTrace, None]:
+    """Retrieves the trace which is active in the current context.
+
+    Returns:
+        Union[StageTrace, None]: The active trace (None if no trace is active).
+    """
+    return _active_trace.get()
+
+
+def stage(name: str):
+    """Creates the context manager measuring a stage (it does nothing if no trace is active).
+
+    Args:
+        name (str): Name of the stage.
+
+    Returns:
+        Context manager recording the wall and CPU time of the block in the active trace.
+    """
+    trace = _active_trace.get()
+    return _NO_TRACE if trace is None else _StageTimer(trace, name)
+
+
+def traced(name: str) -> Callable:
+    """Creates a decorator which measures every call of a function as a stage.
+
+    Args:
+        name (str): Name of the stage.
+
+    Returns:
+        Callable: Decorator of the function.
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            trace = _active_trace.get()
+            if trace is None:
+                return function(*args, **kwargs)
+            with _StageTimer(trace, name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, value: int):
+    """Adds a value to a count of the active trace (it does nothing if no trace is active).
+
+    Args:
+        name (str): Name of the count.
+        value (int): Added value.
+    """
+    trace = _active_trace.get()
+    if trace is not None:
+        trace.add_count(name, value)
+
+
+def record_batch_shape(shape: Tuple[int, ...]):
+    """Records the shape of a token batch in the active trace (it does nothing if no trace is active).
+
+    Args:
+        shape (Tuple[int, ...]): Shape of the batch.
+    """
+    trace = _active_trace.get()
+    if trace is not None:
+        trace.add_batch_shape(shape)
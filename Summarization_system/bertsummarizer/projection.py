@@ -0,0 +1,136 @@
+import numpy as np
+
+
+# Methods of projecting the sentence embeddings before the clustering ('pca' is fit on the embeddings of each text,
+# 'random' is a fixed Gaussian projection derived from the random seed)
+SUPPORTED_PROJECTIONS = ('pca', 'random')
+
+
+class EmbeddingProjector(object):
+    """The class that projects the sentence embeddings of a text into a lower dimension, so that the clustering and the search for the closest sentences run on narrower vectors.
+
+    Attributes:
+        __method: str
+            Method of the projection ('pca' or 'random').
+        __n_components: int
+            Dimension of the projected embeddings.
+        __min_sentences: int
+            Minimum number of sentences of a text whose embeddings are projected (embeddings of shorter texts are returned unchanged).
+        __random_state: int
+            A fixed random seed.
+        __random_matrices: Dict[int, np.ndarray]
+            Random projection matrices for each input dimension (created on first use).
+
+    Methods:
+        get_method():
+            Retrieves the method of the projection stored in a private class variable.
+        get_n_components():
+            Retrieves the dimension of the projected embeddings stored in a private class variable.
+        get_min_sentences():
+            Retrieves the minimum number of sentences of a projected text stored in a private class variable.
+        project(sent_embeddings: np.ndarray):
+            Projects the sentence embeddings of a text into a lower dimension.
+    """
+
+    def __init__(self, method: str = 'pca', n_components: int = 128, min_sentences: int = 0, random_state: int = 12345):
+        """Initializes an instance of the EmbeddingProjector class.
+
+        Args:
+            method (str, optional): Method of the projection ('pca' or 'random'). Defaults to 'pca'.
+            n_components (int, optional): Dimension of the projected embeddings. Defaults to 128.
+            min_sentences (int, optional): Minimum number of sentences of a text whose embeddings are projected. Defaults to 0 (every text is projected).
+            random_state (int, optional): A fixed random seed (used for replication of results). Defaults to 12345.
+        """
+        if method not in SUPPORTED_PROJECTIONS:
+            raise ValueError("Unsupported projection '" + str(method) + "'. Supported projections: " + ", ".join(SUPPORTED_PROJECTIONS) + ".")
+        if n_components < 1:
+            raise ValueError("The projected embeddings need at least one component, got " + str(n_components) + ".")
+
+        self.__method = method
+        self.__n_components = n_components
+        self.__min_sentences = min_sentences
+        self.__random_state = random_state
+        self.__random_matrices = {}
+
+
+    def get_method(self) -> str:
+        """Retrieves the method of the projection stored in a private class variable.
+
+        Returns:
+            str: Method of the projection (specified upon class initialization).
+        """
+        return self.__method
+
+
+    def get_n_components(self) -> int:
+        """Retrieves the dimension of the projected embeddings stored in a private class variable.
+
+        Returns:
+            int: Dimension of the projected embeddings (specified upon class initialization).
+        """
+        return self.__n_components
+
+
+    def get_min_sentences(self) -> int:
+        """Retrieves the minimum number of sentences of a projected text stored in a private class variable.
+
+        Returns:
+            int: Minimum number of sentences of a projected text (specified upon class initialization).
+        """
+        return self.__min_sentences
+
+
+    def __random_matrix(self, dimension: int) -> np.ndarray:
+        """Retrieves the random projection matrix of the input dimension (the same seed always gives the same matrix, so the matrix doesn't need to be stored with the model).
+
+        Args:
+            dimension (int): Dimension of the input embeddings.
+
+        Returns:
+            np.ndarray: Projection matrix of shape (dimension, n_components).
+        """
+        if dimension not in self.__random_matrices:
+            # Gaussian entries scaled by 1/sqrt(k) preserve the expected squared distances (Johnson-Lindenstrauss)
+            random_state = np.random.RandomState(self.__random_state)
+            self.__random_matrices[dimension] = random_state.normal(size=(dimension, self.__n_components)) / np.sqrt(self.__n_components)
+        return self.__random_matrices[dimension]
+
+
+    def project(self, sent_embeddings: np.ndarray) -> np.ndarray:
+        """Projects the sentence embeddings of a text into a lower dimension.
+
+        The 'pca' projection keeps the directions of the largest variance of the text. A text with fewer sentences than components
+        is projected onto the span of its centered embeddings, which preserves all distances between the sentences exactly.
+
+        Args:
+            sent_embeddings (np.ndarray): Sentence embeddings of a text.
+
+        Returns:
+            np.ndarray: Projected embeddings (float32), or the input embeddings if the text is too short or they are already narrow.
+        """
+        if len(sent_embeddings) < max(self.__min_sentences, 1) or sent_embeddings.shape[-1] <= self.__n_components:
+            return sent_embeddings
+        dimension = sent_embeddings.shape[-1]
+
+        # Float16 embeddings are projected in float32
+        embeddings = sent_embeddings.astype(np.float32, copy=False)
+        if self.__method == 'random':
+            return (embeddings @ self.__random_matrix(dimension)).astype(np.float32)
+
+        # Principal components of the centered embeddings (the thin SVD costs O(n^2 d) for n sentences)
+        centered = embeddings - embeddings.mean(axis=0)
+        left_vectors, singular_values, _ = np.linalg.svd(centered, full_matrices=False)
+        n_components = min(self.__n_components, len(singular_values))
+        return (left_vectors[:, :n_components] * singular_values[:n_components]).astype(np.float32)
+
+
+    def __call__(self, sent_embeddings: np.ndarray) -> np.ndarray:
+        """Projects the sentence embeddings of a text into a lower dimension.
+
+        Args:
+            sent_embeddings (np.ndarray): Sentence embeddings of a text.
+
+        Returns:
+            np.ndarray: Projected embeddings.
+        """
+        return self.project(sent_embeddings)
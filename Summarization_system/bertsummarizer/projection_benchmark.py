@@ -0,0 +1,80 @@
+import argparse
+import time
+from typing import Dict, List, Union
+
+import numpy as np
+
+from benchmark_utils import create_local_corpus, load_local_corpus, gold_summary_lengths, selection_agreement
+from clustering_benchmark import LONG_TEXT_SENTENCES, embed_corpus
+from kmeans_wrapper import KMeansWrapper
+from projection import EmbeddingProjector
+
+
+# Compared projections (None is the reference, i.e. the clustering at full width)
+PROJECTIONS = {
+    "full width": None,
+    "pca, 256 components": {"method": 'pca', "n_components": 256},
+    "pca, 128 components": {"method": 'pca', "n_components": 128},
+    "pca, 64 components": {"method": 'pca', "n_components": 64},
+    "random, 256 components": {"method": 'random', "n_components": 256},
+    "random, 128 components": {"method": 'random', "n_components": 128},
+}
+
+
+def benchmark_projections(embeddings: List[np.ndarray], num_sentences: List[int], projections: Dict[str, Dict[str, Union[str, int]]] = PROJECTIONS,
+                          random_state: int = 12345, clustering_options: Dict[str, Union[str, int]] = None) -> Dict[str, Dict[str, float]]:
+    """Measures the time of the projection and clustering of every projection and the agreement of its selections with the clustering at full width.
+
+    Args:
+        embeddings (List[np.ndarray]): Sentence embeddings of each text.
+        num_sentences (List[int]): Number of sentences selected for each text.
+        projections (Dict[str, Dict[str, Union[str, int]]], optional): Keyword arguments of the EmbeddingProjector of each projection (None clusters at full width). Defaults to PROJECTIONS.
+        random_state (int, optional): A fixed random seed. Defaults to 12345.
+        clustering_options (Dict[str, Union[str, int]], optional): Keyword arguments of the KMeansWrapper (backend, n_init, algorithm). Defaults to None.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Mean time on short and long texts (in milliseconds), share of identical selections and the mean Jaccard similarity
+        of each projection (on all texts and on the long texts).
+    """
+    texts = [(sent_embeddings, num) for sent_embeddings, num in zip(embeddings, num_sentences) if len(sent_embeddings) > 0]
+    is_long = [len(sent_embeddings) > LONG_TEXT_SENTENCES for sent_embeddings, _ in texts]
+    results = {}
+    reference_selection = None
+    for name, options in projections.items():
+        projector = EmbeddingProjector(random_state=random_state, **options) if options is not None else None
+        selection, short_times, long_times = [], [], []
+        for (sent_embeddings, num), long_text in zip(texts, is_long):
+            start_time = time.perf_counter()
+            projected_embeddings = projector(sent_embeddings) if projector is not None else sent_embeddings
+            selection.append(KMeansWrapper(projected_embeddings, num_sentences=num, random_state=random_state, **(clustering_options or {})).cluster_embeddings())
+            elapsed_time = 1000 * (time.perf_counter() - start_time)
+            (long_times if long_text else short_times).append(elapsed_time)
+
+        reference_selection = reference_selection or selection
+        long_agreement = selection_agreement([reference for reference, long_text in zip(reference_selection, is_long) if long_text],
+                                             [candidate for candidate, long_text in zip(selection, is_long) if long_text])
+        results[name] = dict(selection_agreement(reference_selection, selection),
+                             long_exact_match=long_agreement["exact_match"], long_mean_jaccard=long_agreement["mean_jaccard"],
+                             short_ms=float(np.mean(short_times)) if short_times else 0.0,
+                             long_ms=float(np.mean(long_times)) if long_times else 0.0)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the clustering time and selections of the embedding projections on a fixed local corpus.")
+    parser.add_argument("corpus", help="path of the local corpus file")
+    parser.add_argument("--create", type=int, default=0, help="create the corpus from the first N records of the CNN / Daily Mail test split")
+    parser.add_argument("--bert-version", default='bert-large-uncased')
+    parser.add_argument("--backend", choices=('kmeans', 'minibatch', 'numpy'), default='kmeans')
+    args = parser.parse_args()
+
+    if args.create:
+        create_local_corpus(args.corpus, num_records=args.create)
+
+    corpus_embeddings = embed_corpus(args.corpus, bert_version=args.bert_version)
+    corpus_num_sentences = gold_summary_lengths(load_local_corpus(args.corpus))
+    print(" ------------- PROJECTION BENCHMARK -------------------")
+    for projection, result in benchmark_projections(corpus_embeddings, corpus_num_sentences, clustering_options={"backend": args.backend}).items():
+        print(" -> " + projection + " : " + str(round(result["short_ms"], 2)) + " ms (short texts), " + str(round(result["long_ms"], 2)) + " ms (long texts), "
+              + str(round(100 * result["exact_match"], 1)) + "% identical selections (" + str(round(100 * result["long_exact_match"], 1)) + "% on long texts), "
+              + "mean Jaccard " + str(round(result["mean_jaccard"], 4)) + " (" + str(round(result["long_mean_jaccard"], 4)) + " on long texts)")
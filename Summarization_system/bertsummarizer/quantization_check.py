@@ -0,0 +1,76 @@
+import argparse
+import io
+
+import torch
+
+from benchmark_utils import create_local_corpus, load_local_corpus, gold_summary_lengths, select_summary_sentences, compute_rouge, selection_agreement
+from summarizer_model import SummarizerModel
+
+
+def model_size_mb(model: torch.nn.Module) -> float:
+    """Computes the size of the serialized model weights.
+
+    Args:
+        model (torch.nn.Module): Model whose size is computed.
+
+    Returns:
+        float: Size of the model weights in megabytes.
+    """
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / 2**20
+
+
+def check_quantization(corpus_path: str, bert_version: str = 'bert-large-uncased', min_jaccard: float = 0.9, max_rouge_drop: float = 0.005) -> bool:
+    """Compares the summaries of the quantized engine with the summaries of the fp32 (eager) engine on a local corpus.
+
+    Args:
+        corpus_path (str): Path of the local corpus file (see benchmark_utils.create_local_corpus).
+        bert_version (str, optional): Version of the BERT model. Defaults to 'bert-large-uncased'.
+        min_jaccard (float, optional): Minimum mean Jaccard similarity of the selected sentences. Defaults to 0.9.
+        max_rouge_drop (float, optional): Maximum allowed drop of every ROUGE F-measure. Defaults to 0.005.
+
+    Returns:
+        bool: Whether the quantized engine passed the check.
+    """
+    corpus = load_local_corpus(corpus_path)
+    num_sentences = gold_summary_lengths(corpus)
+    references = [record["summary"] for record in corpus]
+
+    results = {}
+    for engine in ('eager', 'quantized'):
+        summarizer = SummarizerModel(bert_version=bert_version, engine=engine)
+        model_size = model_size_mb(summarizer.get_bert_model().get_model())
+        selection, elapsed_time = select_summary_sentences(summarizer, corpus, num_sentences)
+        rouge = compute_rouge([' '.join(sentences) for sentences in selection], references)
+        results[engine] = {"selection": selection, "time": elapsed_time, "rouge": rouge, "size": model_size}
+        # Release the model before loading the next one
+        del summarizer
+
+    agreement = selection_agreement(results['eager']["selection"], results['quantized']["selection"])
+    rouge_drops = {rouge_type: results['eager']["rouge"][rouge_type] - results['quantized']["rouge"][rouge_type] for rouge_type in results['eager']["rouge"]}
+
+    print(" ------------- QUANTIZATION CHECK -------------------")
+    print("  " + str(len(corpus)) + " records")
+    for engine, result in results.items():
+        print(" -> " + engine.upper() + " : " + str(round(result["size"], 1)) + " MB, " + str(round(1000 * result["time"] / max(len(corpus), 1), 1)) + " ms/document")
+        for rouge_type, value in result["rouge"].items():
+            print("      " + rouge_type + " : " + str(round(value, 4)))
+    print(" -> Identical selections : " + str(round(100 * agreement["exact_match"], 1)) + "%")
+    print(" -> Mean Jaccard of selections : " + str(round(agreement["mean_jaccard"], 4)))
+
+    passed = agreement["mean_jaccard"] >= min_jaccard and max(rouge_drops.values()) <= max_rouge_drop
+    print(" -> " + ("PASSED" if passed else "FAILED"))
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the quantized engine with the fp32 engine on a fixed local corpus.")
+    parser.add_argument("corpus", help="path of the local corpus file")
+    parser.add_argument("--create", type=int, default=0, help="create the corpus from the first N records of the CNN / Daily Mail test split")
+    parser.add_argument("--bert-version", default='bert-large-uncased')
+    args = parser.parse_args()
+
+    if args.create:
+        create_local_corpus(args.corpus, num_records=args.create)
+    raise SystemExit(0 if check_quantization(args.corpus, bert_version=args.bert_version) else 1)
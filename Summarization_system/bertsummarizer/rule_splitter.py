@@ -0,0 +1,125 @@
+import re
+from typing import List, Set, Tuple
+
+
+# Words which end with a period without ending a sentence (the abbreviations of spaCy's English tokenizer exceptions, so that both engines agree)
+ABBREVIATIONS = {
+    "Adm", "Bros", "Capt", "Co", "co", "Col", "Corp", "Dr", "Gen", "Gov", "Inc", "Jr", "Lt", "Ltd", "Messrs", "Mr", "Mrs", "Ms", "Mt",
+    "Ph.D", "Prof", "Rep", "Rev", "Sen", "Sgt", "Sr", "St", "etc", "vs", "v.s", "e.g", "E.g", "i.e", "I.e", "a.m", "p.m",
+    "Jan", "Feb", "Mar", "Apr", "Jun", "Jul", "Aug", "Sep", "Sept", "Oct", "Nov", "Dec",
+    "Ala", "Ariz", "Ark", "Calif", "Colo", "Conn", "Del", "Fla", "Ga", "Ill", "Ind", "Kan", "Kans", "Ky", "La", "Mass", "Md", "Mich",
+    "Minn", "Miss", "Mo", "Mont", "Neb", "Nebr", "Nev", "Okla", "Ore", "Pa", "Tenn", "Va", "Wash", "Wis",
+}
+
+# A whitespace-delimited token ending with a sentence terminator, optionally followed by closing quotes and brackets
+CANDIDATE_PATTERN = re.compile(r"(?<!\S)(\S*?)([.!?]+)([\"'”’)\]}»]*)(?=\s|$)")
+
+# A period glued between a lowercase word and a capitalized word (a missing space after the end of a sentence)
+GLUED_BOUNDARY_PATTERN = re.compile(r"(?<=[a-z])\.(?=[A-Z][a-z])")
+
+# Initials and acronyms written with periods (e.g. "J." or "U.S.")
+INITIALS_PATTERN = re.compile(r"(?:[A-Za-z]\.)*[A-Za-z]")
+
+# First character of the next sentence (whitespace between the sentences is skipped)
+SENTENCE_START_PATTERN = re.compile(r"\S")
+
+
+class RuleSentenceSplitter(object):
+    """The class that finds sentence boundaries with compiled regular expressions and a list of abbreviations, directly on the string (a lightweight alternative to the spaCy sentencizer).
+
+    A sentence ends at '!', '?' or a period followed by whitespace (closing quotes and brackets stay with the sentence). A period doesn't end a
+    sentence after an abbreviation, an initial or an acronym, inside a decimal number or in an ellipsis.
+
+    Attributes:
+        __abbreviations: Set[str]
+            Words (without the final period) which don't end a sentence.
+
+    Methods:
+        get_abbreviations():
+            Retrieves the abbreviations stored in a private class variable.
+        split_spans(content: str):
+            Finds the character spans of the sentences of the text.
+        split(content: str, min_length: int = 40, max_length: int = 600):
+            Retrieves the sentences of an appropriate length along with their character offsets.
+    """
+
+    def __init__(self, abbreviations: Set[str] = None):
+        """Initializes an instance of the RuleSentenceSplitter class.
+
+        Args:
+            abbreviations (Set[str], optional): Words (without the final period) which don't end a sentence. Defaults to None (ABBREVIATIONS).
+        """
+        self.__abbreviations = set(abbreviations) if abbreviations is not None else ABBREVIATIONS
+
+
+    def get_abbreviations(self) -> Set[str]:
+        """Retrieves the abbreviations stored in a private class variable.
+
+        Returns:
+            Set[str]: Words which don't end a sentence.
+        """
+        return self.__abbreviations
+
+
+    def __ends_sentence(self, word: str, terminators: str) -> bool:
+        """Checks whether a token ending with sentence terminators ends a sentence.
+
+        Args:
+            word (str): Token without its terminators and closing punctuation.
+            terminators (str): Run of '.', '!' and '?' characters at the end of the token.
+
+        Returns:
+            bool: Whether the sentence ends after the token.
+        """
+        if terminators[-1] in "!?":
+            return True
+        # An ellipsis continues the sentence
+        if len(terminators) > 1:
+            return False
+        # Strip the opening punctuation of the word (e.g. a quote or bracket)
+        word = word.lstrip("\"'“‘([{«")
+        return word not in self.__abbreviations and not INITIALS_PATTERN.fullmatch(word)
+
+
+    def split_spans(self, content: str) -> List[Tuple[int, int]]:
+        """Finds the character spans of the sentences of the text (without the whitespace between the sentences).
+
+        Args:
+            content (str): Text whose sentences will be found.
+
+        Returns:
+            List[Tuple[int, int]]: Start and end offset of every sentence.
+        """
+        # Offsets at which a sentence ends
+        ends = [match.end() for match in CANDIDATE_PATTERN.finditer(content) if self.__ends_sentence(match.group(1), match.group(2))]
+        ends.extend(match.end() for match in GLUED_BOUNDARY_PATTERN.finditer(content))
+        ends.sort()
+        # Trailing whitespace of the text isn't a part of the last sentence (the other sentences end right before whitespace)
+        ends.append(len(content.rstrip()))
+
+        spans = []
+        start = 0
+        for end in ends:
+            start_match = SENTENCE_START_PATTERN.search(content, start, end)
+            if start_match is not None:
+                spans.append((start_match.start(), end))
+            start = max(start, end)
+        return spans
+
+
+    def split(self, content: str, min_length: int = 40, max_length: int = 600) -> List[Tuple[str, int]]:
+        """Retrieves the sentences of an appropriate length along with their character offsets (the same filter as SentenceSeparator).
+
+        Args:
+            content (str): Text whose sentences will be retrieved.
+            min_length (int, optional): Minimum character length of returned sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of returned sentences. Defaults to 600.
+
+        Returns:
+            List[Tuple[str, int]]: Sentences of the input text, each with the offset of its first character in the text.
+        """
+        sentences = []
+        for start, end in self.split_spans(content):
+            if max_length > end - start > min_length:
+                sentences.append((content[start:end], start))
+        return sentences
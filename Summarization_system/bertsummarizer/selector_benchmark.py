@@ -0,0 +1,119 @@
+import argparse
+import time
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from benchmark_utils import create_local_corpus, load_local_corpus, gold_summary_lengths, compute_rouge, selection_agreement
+from clustering_benchmark import LONG_TEXT_SENTENCES
+from greedy_selector import GreedySelector
+from kmeans_wrapper import KMeansWrapper
+
+
+# Compared selectors (the first one is the reference, i.e. the current output of the summarizer)
+SELECTORS = {
+    "kmeans, n_init=10": {"selector": 'kmeans'},
+    "kmeans numpy, n_init=1": {"selector": 'kmeans', "backend": 'numpy'},
+    "facility location": {"selector": 'facility_location'},
+    "mmr, lambda=0.7": {"selector": 'mmr', "mmr_lambda": 0.7},
+    "mmr, lambda=0.5": {"selector": 'mmr', "mmr_lambda": 0.5},
+}
+
+
+def select_indices(sent_embeddings: np.ndarray, num_sentences: int, selector: str = 'kmeans', random_state: int = 12345, **options) -> List[int]:
+    """Selects the summary sentences of one text with a selector (the same call as SummarizerModel.cluster_sent_embeddings).
+
+    Args:
+        sent_embeddings (np.ndarray): Sentence embeddings of the text.
+        num_sentences (int): Number of selected sentences.
+        selector (str, optional): Strategy of selecting the sentences ('kmeans', 'facility_location' or 'mmr'). Defaults to 'kmeans'.
+        random_state (int, optional): A fixed random seed (only used by 'kmeans'). Defaults to 12345.
+        **options: Keyword arguments of the KMeansWrapper or GreedySelector.
+
+    Returns:
+        List[int]: Sorted indices of the selected sentences.
+    """
+    if selector == 'kmeans':
+        return KMeansWrapper(sent_embeddings, num_sentences=num_sentences, random_state=random_state, **options).cluster_embeddings()
+    return GreedySelector(sent_embeddings, num_sentences=num_sentences, objective=selector, **options).select_embeddings()
+
+
+def embed_corpus_sentences(corpus: List[Dict[str, str]], bert_version: str = 'bert-large-uncased', batch_size: int = 32) -> List[Tuple[List[str], np.ndarray]]:
+    """Separates every text of the corpus into sentences and computes their embeddings (once for all selectors).
+
+    Args:
+        corpus (List[Dict[str, str]]): Records of the corpus.
+        bert_version (str, optional): Version of the BERT model. Defaults to 'bert-large-uncased'.
+        batch_size (int, optional): Number of sentences embedded in one forward pass. Defaults to 32.
+
+    Returns:
+        List[Tuple[List[str], np.ndarray]]: Sentences of each text along with their embeddings.
+    """
+    from summarizer_model import SummarizerModel
+
+    summarizer = SummarizerModel(bert_version=bert_version, batch_size=batch_size)
+    texts = []
+    for record in corpus:
+        sentences = summarizer.separate_sentences(content=record["text"])
+        texts.append((sentences, summarizer.retrieve_sent_embeddings(sentences) if sentences else np.zeros((0, 0), dtype=np.float32)))
+    return texts
+
+
+def benchmark_selectors(texts: List[Tuple[List[str], np.ndarray]], references: List[str], num_sentences: List[int], selectors: Dict[str, Dict[str, Union[str, float]]] = SELECTORS,
+                        random_state: int = 12345, other_random_state: int = 54321) -> Dict[str, Dict[str, float]]:
+    """Measures the selection time, ROUGE scores and stability of every selector.
+
+    Args:
+        texts (List[Tuple[List[str], np.ndarray]]): Sentences of each text along with their embeddings.
+        references (List[str]): Gold summaries.
+        num_sentences (List[int]): Number of sentences selected for each text.
+        selectors (Dict[str, Dict[str, Union[str, float]]], optional): Keyword arguments of select_indices of each selector. Defaults to SELECTORS.
+        random_state (int, optional): A fixed random seed. Defaults to 12345.
+        other_random_state (int, optional): A second seed, the agreement of the selections of both seeds measures the stability of a selector. Defaults to 54321.
+
+    Returns:
+        Dict[str, Dict[str, float]]: Mean time on short and long texts (in milliseconds), ROUGE F-measures, mean Jaccard similarity with the first selector
+        and with the same selector under another seed.
+    """
+    results = {}
+    reference_selection = None
+    for name, options in selectors.items():
+        selection, other_selection, short_times, long_times = [], [], [], []
+        for (sentences, sent_embeddings), num in zip(texts, num_sentences):
+            if not sentences:
+                selection.append([])
+                other_selection.append([])
+                continue
+            start_time = time.perf_counter()
+            selection.append([sentences[index] for index in select_indices(sent_embeddings, num, random_state=random_state, **options)])
+            elapsed_time = 1000 * (time.perf_counter() - start_time)
+            (long_times if len(sentences) > LONG_TEXT_SENTENCES else short_times).append(elapsed_time)
+            other_selection.append([sentences[index] for index in select_indices(sent_embeddings, num, random_state=other_random_state, **options)])
+
+        reference_selection = reference_selection or selection
+        results[name] = dict(compute_rouge([' '.join(sentences) for sentences in selection], references),
+                             reference_jaccard=selection_agreement(reference_selection, selection)["mean_jaccard"],
+                             seed_jaccard=selection_agreement(selection, other_selection)["mean_jaccard"],
+                             short_ms=float(np.mean(short_times)) if short_times else 0.0,
+                             long_ms=float(np.mean(long_times)) if long_times else 0.0)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the latency, ROUGE scores and stability of the sentence selectors on a fixed local corpus.")
+    parser.add_argument("corpus", help="path of the local corpus file")
+    parser.add_argument("--create", type=int, default=0, help="create the corpus from the first N records of the CNN / Daily Mail test split")
+    parser.add_argument("--bert-version", default='bert-large-uncased')
+    args = parser.parse_args()
+
+    if args.create:
+        create_local_corpus(args.corpus, num_records=args.create)
+
+    corpus = load_local_corpus(args.corpus)
+    corpus_texts = embed_corpus_sentences(corpus, bert_version=args.bert_version)
+    print(" ------------- SELECTOR BENCHMARK -------------------")
+    for selector, result in benchmark_selectors(corpus_texts, [record["summary"] for record in corpus], gold_summary_lengths(corpus)).items():
+        print(" -> " + selector.upper() + " : " + str(round(result["short_ms"], 2)) + " ms (short texts), " + str(round(result["long_ms"], 2)) + " ms (long texts), "
+              + "mean Jaccard " + str(round(result["reference_jaccard"], 4)) + " with the reference, " + str(round(result["seed_jaccard"], 4)) + " between seeds")
+        for rouge_type in ("rouge1", "rouge2", "rougeL", "rougeLsum"):
+            print("      " + rouge_type + " : " + str(round(result[rouge_type], 4)))
@@ -1,38 +1,137 @@
-from typing import List
+import multiprocessing
+import re
+from collections import deque
+from itertools import islice
+from multiprocessing.pool import Pool
+from typing import IO, Iterable, Iterator, List, Tuple, Union
 
 # spacy==2.1.0
 from spacy.lang.en import English
 from spacy.tokens import Doc
 
+from rule_splitter import RuleSentenceSplitter
+
+
+# Engines finding the sentence boundaries ('spacy' is the sentencizer of a spaCy pipeline, 'rules' is the RuleSentenceSplitter working directly on the string)
+SUPPORTED_ENGINES = ('spacy', 'rules')
+
+
+# Whitespace character after which the rest of the text contains no whitespace (the start of the last word of the text)
+LAST_WHITESPACE_PATTERN = re.compile(r"\s(?=\S*\Z)")
+
+
+# Sentence separator of the current worker process (set by the initializer of the pool, see SentenceSeparator.process_contents)
+_separator = None
+
+
+def _initialize_worker(language, engine: str):
+    """Creates the sentence separator of a worker process.
+
+    Args:
+        language (spacy.lang.[lang].[Language]): Language used to separate text into sentences.
+        engine (str): Engine finding the sentence boundaries.
+    """
+    global _separator
+
+    _separator = SentenceSeparator(language=language, engine=engine)
+
+
+def _read_chunks(source: Union[str, IO[str], Iterable[str]], chunk_size: int) -> Iterator[str]:
+    """Reads the text from a string, a text file or an iterable of strings in pieces.
+
+    Args:
+        source (Union[str, IO[str], Iterable[str]]): The text, a file opened in text mode or an iterable of pieces of the text.
+        chunk_size (int): Number of characters of a piece read from a string or a file.
+
+    Yields:
+        str: Consecutive pieces of the text.
+    """
+    if isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            yield source[start:start + chunk_size]
+    elif hasattr(source, "read"):
+        chunk = source.read(chunk_size)
+        while chunk:
+            yield chunk
+            chunk = source.read(chunk_size)
+    else:
+        yield from source
+
+
+def _separate_batch(batch: Tuple[List[str], int, int, int]) -> List[List[str]]:
+    """Separates a batch of texts into sentences with the sentence separator of the worker process.
+
+    Args:
+        batch (Tuple[List[str], int, int, int]): Texts of the batch, the minimum and maximum character length of the sentences and the batch size of the language pipeline.
+
+    Returns:
+        List[List[str]]: Sentences of each text.
+    """
+    contents, min_length, max_length, batch_size = batch
+    return list(_separator.process_contents(contents, min_length=min_length, max_length=max_length, batch_size=batch_size))
+
+
 class SentenceSeparator(object):
     """The class that separates text onto its sentences.
 
     Attributes:
+        __language: spacy.lang.[lang].[Language]
+            Language of the pipeline (used to create the pipelines of worker processes).
         __nlp: spacy.lang.[lang].[Language]
-            A initialized language processing pipeline.
+            A initialized language processing pipeline (None with the 'rules' engine).
+        __engine: str
+            Engine finding the sentence boundaries ('spacy' or 'rules').
+        __rule_splitter: RuleSentenceSplitter
+            Rule-based splitter used by the 'rules' engine (None with the 'spacy' engine).
     
     Methods:
         get_language_pipeline():
             Retrieves a spacy language processing pipeline stored in a private variable.
+        get_language():
+            Retrieves the language of the pipeline stored in a private variable.
+        get_engine():
+            Retrieves the engine finding the sentence boundaries stored in a private variable.
         generate_doc(content: str):
             Processes the input text using a language pipeline specified upon class initialization.
         retrieve_doc_sents(doc: Doc , min_length: int = 40 , max_length: int = 600):
             Retrieves sentences of an appropriate length from a spacy Doc object.
+        retrieve_doc_sent_offsets(doc: Doc , min_length: int = 40 , max_length: int = 600):
+            Retrieves sentences of an appropriate length from a spacy Doc object along with their character offsets.
         process_content(content: str, min_length: int = 40 , max_length: int = 600):
             Processes the text using a language pipeline and retrieves the text sentences of an appropriate length.
+        process_content_with_offsets(content: str, min_length: int = 40 , max_length: int = 600):
+            Processes the text using a language pipeline and retrieves the text sentences of an appropriate length along with their character offsets.
+        create_pool(n_process: int):
+            Creates a pool of worker processes which separate texts with the same language and engine.
+        process_contents(contents: Iterable[str], min_length: int = 40 , max_length: int = 600, batch_size: int = 64, n_process: int = 1, pool: Pool = None):
+            Streams the texts through the language pipeline in batches (optionally in several processes) and yields the sentences of an appropriate length of each text.
+        stream_sentences(source: Union[str, IO[str], Iterable[str]], min_length: int = 40 , max_length: int = 600, chunk_size: int = 65536):
+            Reads the text in bounded chunks and lazily yields the sentences of an appropriate length along with their character offsets.
     """
 
 
-    def __init__(self, language=English):
+    def __init__(self, language=English, engine: str = 'spacy'):
         """Initializes an instance of the SentenceSeparator class.
 
         Args:
             language (spacy.lang.[lang].[Language], optional): Language used to separate text into sentences. Defaults to spacy.lang.en.English.
+            engine (str, optional): Engine finding the sentence boundaries ('spacy' or 'rules', the rules are written for English). Defaults to 'spacy'.
         """
+        if engine not in SUPPORTED_ENGINES:
+            raise ValueError("Unsupported sentence separation engine '" + str(engine) + "'. Supported engines: " + ", ".join(SUPPORTED_ENGINES) + ".")
+
         # Store the language object
-        self.__nlp = language()
-        # Add a *sentencizer* to the language pipeline
-        self.__nlp.add_pipe(self.__nlp.create_pipe('sentencizer'))
+        self.__language = language
+        self.__engine = engine
+        self.__nlp = None
+        self.__rule_splitter = None
+        if engine == 'rules':
+            # The rule-based splitter doesn't need a language pipeline
+            self.__rule_splitter = RuleSentenceSplitter()
+        else:
+            self.__nlp = language()
+            # Add a *sentencizer* to the language pipeline
+            self.__nlp.add_pipe(self.__nlp.create_pipe('sentencizer'))
 
 
     def get_language_pipeline(self):
@@ -44,6 +143,24 @@ class SentenceSeparator(object):
         return self.__nlp
 
 
+    def get_language(self):
+        """Retrieves the language of the pipeline stored in a private variable.
+
+        Returns:
+            spacy.lang.[lang].[Language] : Language used to separate text into sentences (specified upon class initialization).
+        """
+        return self.__language
+
+
+    def get_engine(self) -> str:
+        """Retrieves the engine finding the sentence boundaries stored in a private variable.
+
+        Returns:
+            str: Engine finding the sentence boundaries (specified upon class initialization).
+        """
+        return self.__engine
+
+
     def generate_doc(self, content: str ) -> Doc:
         """Processes the input text using a language pipeline specified upon class initialization.
 
@@ -53,6 +170,8 @@ class SentenceSeparator(object):
         Returns:
             Doc: Object containing linguistic annotations of the input text.
         """
+        if self.__nlp is None:
+            raise ValueError("The '" + self.__engine + "' sentence separation engine has no language pipeline.")
         return self.__nlp(content)
 
 
@@ -70,8 +189,32 @@ class SentenceSeparator(object):
         content_sentences=[]
         # Retrieve sentences of an appropriate length from a Doc
         for sentence in doc.sents:
-            if max_length > len(sentence.text.strip()) > min_length :
-                content_sentences.append(sentence.text.strip())
+            sentence_text = sentence.text.strip()
+            if max_length > len(sentence_text) > min_length :
+                content_sentences.append(sentence_text)
+
+        return content_sentences
+
+
+    def retrieve_doc_sent_offsets(self, doc: Doc , min_length: int = 40 , max_length: int = 600) -> List[Tuple[str, int]]:
+        """Retrieves sentences of an appropriate length from a spacy Doc object along with their character offsets.
+
+        Args:
+            doc (Doc): Object containing linguistic annotations of a text.
+            min_length (int, optional): Minimum character length of returned sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of returned sentences. Defaults to 600.
+
+        Returns:
+            List[Tuple[str, int]]: Sentences of a text whose Doc object was given as the input, each with the offset of its first character in the text.
+        """
+        content_sentences=[]
+        # Retrieve sentences of an appropriate length from a Doc
+        for sentence in doc.sents:
+            sentence_text = sentence.text.strip()
+            if max_length > len(sentence_text) > min_length :
+                # Skip the leading whitespace which was stripped from the sentence
+                offset = sentence.start_char + len(sentence.text) - len(sentence.text.lstrip())
+                content_sentences.append((sentence_text, offset))
 
         return content_sentences
 
@@ -87,13 +230,181 @@ class SentenceSeparator(object):
         Returns:
             List[str]: Sentences of the input text.
         """
+        # Find the sentence boundaries directly on the string
+        if self.__engine == 'rules':
+            return [sentence for sentence, _ in self.__rule_splitter.split(content, min_length=min_length, max_length=max_length)]
+
         # Process text using a language pipeline
         doc = self.generate_doc(content=content)
 
         # Retrieve sentences from a Doc object
         return self.retrieve_doc_sents( doc=doc , min_length=min_length , max_length=max_length)
+
+
+    def process_content_with_offsets(self, content: str, min_length: int = 40 , max_length: int = 600) -> List[Tuple[str, int]]:
+        """Processes the text using a language pipeline and retrieves the text sentences of an appropriate length along with their character offsets.
+
+        Args:
+            content (str): Text whose sentences will be retrieved.
+            min_length (int, optional): Minimum character length of returned sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of returned sentences. Defaults to 600.
+
+        Returns:
+            List[Tuple[str, int]]: Sentences of the input text, each with the offset of its first character in the text.
+        """
+        # Find the sentence boundaries directly on the string
+        if self.__engine == 'rules':
+            return self.__rule_splitter.split(content, min_length=min_length, max_length=max_length)
+
+        # Process text using a language pipeline
+        doc = self.generate_doc(content=content)
+
+        # Retrieve sentences and their offsets from a Doc object
+        return self.retrieve_doc_sent_offsets( doc=doc , min_length=min_length , max_length=max_length)
     
 
+    def create_pool(self, n_process: int) -> Pool:
+        """Creates a pool of worker processes which separate texts with the same language and engine (it can be shared by several calls of process_contents).
+
+        Worker processes are spawned, since forking a process with initialized thread pools (e.g. of the BERT model) can deadlock.
+
+        Args:
+            n_process (int): Number of worker processes.
+
+        Returns:
+            Pool: Pool of worker processes, each with its own sentence separator (to be closed or terminated by the caller).
+        """
+        context = multiprocessing.get_context("spawn")
+        return context.Pool(n_process, initializer=_initialize_worker, initargs=(self.__language, self.__engine))
+
+
+    def process_contents(self, contents: Iterable[str], min_length: int = 40 , max_length: int = 600, batch_size: int = 64, n_process: int = 1, pool: Pool = None) -> Iterator[List[str]]:
+        """Streams the texts through the language pipeline in batches (optionally in several processes) and yields the sentences of an appropriate length of each text.
+
+        The sentences are yielded lazily, in the order of the texts. With several processes, every worker process creates its own pipeline
+        and receives the texts in chunks of *batch_size* texts. At most two chunks per process are sent out before their sentences are yielded,
+        so a slow consumer holds back the workers instead of letting their results pile up.
+
+        Args:
+            contents (Iterable[str]): Texts whose sentences will be retrieved.
+            min_length (int, optional): Minimum character length of returned sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of returned sentences. Defaults to 600.
+            batch_size (int, optional): Number of texts processed together by the language pipeline. Defaults to 64.
+            n_process (int, optional): Number of worker processes (of the pool, if it is given). Defaults to 1 (the texts are processed in the current process).
+            pool (Pool, optional): Pool of worker processes created by create_pool of a separator with the same language and engine. Defaults to None (a pool of *n_process* processes is created if needed).
+
+        Yields:
+            List[str]: Sentences of each text.
+        """
+        # The rules are cheap enough to run in the current process
+        if self.__engine == 'rules':
+            for content in contents:
+                yield self.process_content(content, min_length=min_length, max_length=max_length)
+            return
+
+        if n_process <= 1 and pool is None:
+            for doc in self.__nlp.pipe(contents, batch_size=batch_size):
+                yield self.retrieve_doc_sents(doc=doc, min_length=min_length, max_length=max_length)
+            return
+
+        if pool is None:
+            with self.create_pool(n_process) as pool:
+                yield from self.process_contents(contents, min_length=min_length, max_length=max_length, batch_size=batch_size, n_process=n_process, pool=pool)
+            return
+
+        # Send the texts to the workers in chunks (the iterable is consumed only as the sentences of the earlier chunks are taken)
+        remaining_contents = iter(contents)
+        pending_batches = deque()
+        while True:
+            batch = list(islice(remaining_contents, batch_size))
+            if batch:
+                pending_batches.append(pool.apply_async(_separate_batch, ((batch, min_length, max_length, batch_size),)))
+            if not pending_batches:
+                return
+            # Wait for the oldest chunk once enough chunks are sent out (or once all texts are sent)
+            if not batch or len(pending_batches) >= 2 * max(n_process, 1):
+                yield from pending_batches.popleft().get()
+
+
+    def __find_spans(self, content: str) -> List[Tuple[int, int]]:
+        """Finds the character spans of all sentences of the text (without the surrounding whitespace).
+
+        Args:
+            content (str): Text whose sentences will be found.
+
+        Returns:
+            List[Tuple[int, int]]: Start and end offset of every sentence.
+        """
+        if self.__engine == 'rules':
+            return self.__rule_splitter.split_spans(content)
+
+        spans = []
+        for sentence in self.generate_doc(content=content).sents:
+            sentence_text = sentence.text.strip()
+            if sentence_text:
+                start = sentence.start_char + len(sentence.text) - len(sentence.text.lstrip())
+                spans.append((start, start + len(sentence_text)))
+        return spans
+
+
+    def stream_sentences(self, source: Union[str, IO[str], Iterable[str]], min_length: int = 40 , max_length: int = 600, chunk_size: int = 65536) -> Iterator[Tuple[str, int]]:
+        """Reads the text in bounded chunks and lazily yields the sentences of an appropriate length along with their character offsets.
+
+        Only a chunk and the unfinished sentence at its end are processed at once, so the memory doesn't grow with the length of the text (and
+        the text can be longer than the *max_length* limit of the spaCy pipeline). The last sentence of every chunk is carried over to the next
+        chunk, since it can continue there. An unfinished sentence which is already too long to be returned is dropped, except for its last word,
+        which is kept as the context of the boundary that ends it.
+
+        Args:
+            source (Union[str, IO[str], Iterable[str]]): The text, a file opened in text mode or an iterable of pieces of the text.
+            min_length (int, optional): Minimum character length of returned sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of returned sentences. Defaults to 600.
+            chunk_size (int, optional): Minimum number of new characters processed at once. Defaults to 65536.
+
+        Yields:
+            Tuple[str, int]: Sentences of the text, each with the offset of its first character in the text.
+        """
+        # Unprocessed text, its offset in the whole text and whether it starts with the rest of a dropped sentence
+        buffer = ""
+        buffer_offset = 0
+        skip_first = False
+
+        for piece in _read_chunks(source, chunk_size):
+            buffer += piece
+            if len(buffer) < chunk_size:
+                continue
+
+            spans = self.__find_spans(buffer)
+            if not spans:
+                buffer_offset += len(buffer)
+                buffer = ""
+                continue
+
+            # Every sentence except the last one is finished
+            for start, end in spans[:-1]:
+                if skip_first:
+                    skip_first = False
+                elif max_length > end - start > min_length:
+                    yield buffer[start:end], buffer_offset + start
+
+            # Carry the unfinished sentence over to the next chunk (only its last word if it's already too long). The next chunk can only
+            # move its end within its last word, so the sentence is too long if the part before its last word already has max_length characters
+            keep_start, keep_end = spans[-1]
+            whitespace = LAST_WHITESPACE_PATTERN.search(buffer, keep_start, keep_end)
+            if (whitespace.start() if whitespace is not None else keep_end) - keep_start >= max_length:
+                keep_start = whitespace.start() if whitespace is not None else len(buffer)
+                skip_first = True
+            buffer_offset += keep_start
+            buffer = buffer[keep_start:]
+
+        # The sentences of the rest of the text are finished
+        for start, end in self.__find_spans(buffer) if buffer.strip() else []:
+            if skip_first:
+                skip_first = False
+            elif max_length > end - start > min_length:
+                yield buffer[start:end], buffer_offset + start
+
+
     def __call__(self, content: str, min_length: int = 40 , max_length: int = 600) -> List[str]:
         """Processes the text using a language pipeline and retrieves the text sentences of an appropriate length.
 
@@ -0,0 +1,97 @@
+import argparse
+import re
+import time
+from typing import Dict, List, Set, Tuple, Union
+
+from benchmark_utils import create_local_corpus, load_local_corpus
+from sentence_separator import SentenceSeparator
+
+
+# First word character of a sentence (boundaries are compared at this character, so that quotes and brackets moved between the sentences don't count)
+WORD_CHARACTER_PATTERN = re.compile(r"\w")
+
+
+def boundary_offsets(content: str, sentences: List[Tuple[str, int]]) -> Set[int]:
+    """Retrieves the offset of the first word character of every sentence except the first one.
+
+    Args:
+        content (str): Text of the sentences.
+        sentences (List[Tuple[str, int]]): Sentences of the text along with their character offsets.
+
+    Returns:
+        Set[int]: Offsets of the sentence boundaries.
+    """
+    offsets = set()
+    for sentence, offset in sentences[1:]:
+        match = WORD_CHARACTER_PATTERN.search(content, offset, offset + len(sentence))
+        offsets.add(match.start() if match is not None else offset)
+    return offsets
+
+
+def compare_engines(contents: List[str], min_length: int = 40, max_length: int = 600) -> Dict[str, Union[float, List[Tuple[str, str]]]]:
+    """Measures the speed of the 'spacy' and 'rules' engines of the SentenceSeparator and the agreement of their sentence boundaries.
+
+    Args:
+        contents (List[str]): Texts whose sentences are separated.
+        min_length (int, optional): Minimum character length of the compared sentence lists. Defaults to 40.
+        max_length (int, optional): Maximum character length of the compared sentence lists. Defaults to 600.
+
+    Returns:
+        Dict[str, Union[float, List[Tuple[str, str]]]]: Mean time per text of each engine (in milliseconds), bulk time of the 'spacy' engine, precision, recall and F1 of the
+        boundaries of the 'rules' engine (the 'spacy' engine is the reference), share of texts with identical sentence lists and the contexts of the differing boundaries.
+    """
+    separators = {engine: SentenceSeparator(engine=engine) for engine in ('spacy', 'rules')}
+
+    # Time one call per text (as in an API request)
+    results = {}
+    sentences = {}
+    for engine, separator in separators.items():
+        start_time = time.perf_counter()
+        sentences[engine] = [separator.process_content_with_offsets(content, min_length=min_length, max_length=max_length) for content in contents]
+        results[engine + "_ms"] = 1000 * (time.perf_counter() - start_time) / max(len(contents), 1)
+    start_time = time.perf_counter()
+    list(separators['spacy'].process_contents(contents, min_length=min_length, max_length=max_length))
+    results["spacy_bulk_ms"] = 1000 * (time.perf_counter() - start_time) / max(len(contents), 1)
+
+    # Compare all boundaries (without the length filter)
+    true_positives, num_rules, num_spacy = 0, 0, 0
+    differences = []
+    for content in contents:
+        spacy_boundaries = boundary_offsets(content, separators['spacy'].process_content_with_offsets(content, min_length=0, max_length=len(content) + 1))
+        rules_boundaries = boundary_offsets(content, separators['rules'].process_content_with_offsets(content, min_length=0, max_length=len(content) + 1))
+        true_positives += len(spacy_boundaries & rules_boundaries)
+        num_rules += len(rules_boundaries)
+        num_spacy += len(spacy_boundaries)
+        for offset in sorted(spacy_boundaries ^ rules_boundaries):
+            differences.append(("spacy" if offset in spacy_boundaries else "rules", content[max(offset - 50, 0):offset] + " | " + content[offset:offset + 30]))
+
+    precision = true_positives / num_rules if num_rules else 1.0
+    recall = true_positives / num_spacy if num_spacy else 1.0
+    results["precision"] = precision
+    results["recall"] = recall
+    results["f1"] = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    results["identical_texts"] = sum(spacy_sents == rules_sents for spacy_sents, rules_sents in zip(sentences['spacy'], sentences['rules'])) / max(len(contents), 1)
+    results["differences"] = differences
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the speed and sentence boundaries of the spaCy and rule-based sentence separation engines on a fixed local corpus.")
+    parser.add_argument("corpus", help="path of the local corpus file")
+    parser.add_argument("--create", type=int, default=0, help="create the corpus from the first N records of the CNN / Daily Mail test split")
+    parser.add_argument("--examples", type=int, default=20, help="number of differing boundaries printed")
+    args = parser.parse_args()
+
+    if args.create:
+        create_local_corpus(args.corpus, num_records=args.create)
+
+    corpus = load_local_corpus(args.corpus)
+    result = compare_engines([record["text"] for record in corpus])
+    print(" ------------- SENTENCE SEPARATION BENCHMARK -------------------")
+    print("  " + str(len(corpus)) + " records")
+    print(" -> SPACY : " + str(round(result["spacy_ms"], 3)) + " ms/document (" + str(round(result["spacy_bulk_ms"], 3)) + " ms/document with nlp.pipe)")
+    print(" -> RULES : " + str(round(result["rules_ms"], 3)) + " ms/document")
+    print(" -> Boundary precision : " + str(round(result["precision"], 4)) + ", recall : " + str(round(result["recall"], 4)) + ", F1 : " + str(round(result["f1"], 4)))
+    print(" -> Identical sentence lists : " + str(round(100 * result["identical_texts"], 1)) + "%")
+    for engine, context in result["differences"][:args.examples]:
+        print("      only " + engine + " : " + context.replace("\n", " "))
@@ -0,0 +1,216 @@
+from typing import List
+
+import numpy as np
+
+from sklearn.cluster import MiniBatchKMeans
+
+from kmeans_wrapper import KMeansWrapper
+from numpy_kmeans import squared_distance_matrix
+
+
+class StreamingKMeans(object):
+    """The class that clusters sentence embeddings arriving in chunks, so that the embedding matrix of a long text never has to exist in memory.
+
+    Every chunk updates the centroids of a MiniBatchKMeans model (partial_fit) and a reservoir of candidate sentences which keeps,
+    for every cluster, the embeddings closest to its current centroid. The summary sentences are picked from the reservoirs, so the
+    memory depends on the number of clusters, the number of candidates and the chunk size, but not on the length of the text. The
+    candidates of all clusters are capped by *max_candidates* (a cluster keeps fewer candidates as the number of clusters grows), but
+    every cluster keeps its centroid and at least one candidate. With a number of clusters proportional to the number of sentences
+    (see *sent_ratio* of SummarizerModel), the memory therefore still grows linearly with the length of the text, as the summary does.
+
+    Attributes:
+        __n_clusters: int
+            Number of clusters.
+        __reservoir_size: int
+            Number of candidate sentences kept for every cluster (at most *max_candidates* divided by the number of clusters, but at least one).
+        __assignment: str
+            Way of assigning a sentence to every centroid ('greedy' or 'optimal', see KMeansWrapper).
+        __random_state: int
+            A fixed random seed.
+        __model: MiniBatchKMeans
+            Clustering model (None until it has seen at least as many embeddings as there are clusters).
+        __pending_embeddings: List[np.ndarray]
+            Embeddings which haven't been folded into the model yet (chunks smaller than the number of clusters are merged).
+        __pending_indices: List[np.ndarray]
+            Sentence indices of the pending embeddings.
+        __candidate_embeddings: np.ndarray
+            Embeddings of the candidate sentences of all clusters.
+        __candidate_indices: np.ndarray
+            Sentence indices of the candidate sentences.
+        __num_seen: int
+            Number of embeddings passed to the model so far.
+
+    Methods:
+        get_n_clusters():
+            Retrieves the number of clusters stored in a private class variable.
+        get_reservoir_size():
+            Retrieves the number of candidate sentences kept for every cluster stored in a private class variable.
+        get_num_seen():
+            Retrieves the number of embeddings passed to the model stored in a private class variable.
+        partial_fit(sent_embeddings: np.ndarray):
+            Folds the next chunk of sentence embeddings into the clustering and the reservoirs of candidate sentences.
+        retrieve_centroids():
+            Retrieves the coordinates of the current cluster centroids.
+        get_candidate_embedding(sent_index: int):
+            Retrieves the embedding of a candidate sentence.
+        find_closest_sents():
+            Determines the indices of the sentences closest to the cluster centroids.
+    """
+
+    def __init__(self, n_clusters: int, reservoir_size: int = 8, assignment: str = 'greedy', random_state: int = 12345, max_candidates: int = 1024):
+        """Initializes an instance of the StreamingKMeans class.
+
+        Args:
+            n_clusters (int): Number of clusters (known in advance, since the sentences are separated before they are embedded).
+            reservoir_size (int, optional): Number of candidate sentences kept for every cluster. Defaults to 8.
+            assignment (str, optional): Way of assigning a sentence to every centroid ('greedy' or 'optimal'). Defaults to 'greedy'.
+            random_state (int, optional): A fixed random seed (used for replication of results). Defaults to 12345.
+            max_candidates (int, optional): Maximum number of candidate sentences of all clusters together (exceeded only if there are more clusters). Defaults to 1024.
+        """
+        if reservoir_size < 1:
+            raise ValueError("The reservoir needs to keep at least one sentence per cluster, got " + str(reservoir_size) + ".")
+
+        self.__n_clusters = n_clusters
+        # Keep fewer candidates per cluster when there are many clusters, so that the reservoirs don't grow with the number of clusters
+        self.__reservoir_size = max(1, min(reservoir_size, max_candidates // max(n_clusters, 1)))
+        self.__assignment = assignment
+        self.__random_state = random_state
+        self.__model = None
+        self.__pending_embeddings = []
+        self.__pending_indices = []
+        self.__candidate_embeddings = None
+        self.__candidate_indices = np.zeros(0, dtype=np.int64)
+        self.__num_seen = 0
+
+
+    def get_n_clusters(self) -> int:
+        """Retrieves the number of clusters stored in a private class variable.
+
+        Returns:
+            int: Number of clusters (specified upon class initialization).
+        """
+        return self.__n_clusters
+
+
+    def get_reservoir_size(self) -> int:
+        """Retrieves the number of candidate sentences kept for every cluster stored in a private class variable.
+
+        Returns:
+            int: Number of candidate sentences kept for every cluster.
+        """
+        return self.__reservoir_size
+
+
+    def get_num_seen(self) -> int:
+        """Retrieves the number of embeddings passed to the model stored in a private class variable.
+
+        Returns:
+            int: Number of embeddings passed to the model so far.
+        """
+        return self.__num_seen
+
+
+    def partial_fit(self, sent_embeddings: np.ndarray) -> "StreamingKMeans":
+        """Folds the next chunk of sentence embeddings into the clustering and the reservoirs of candidate sentences.
+
+        Sentence indices continue from the previous chunks. Chunks are merged until they hold at least as many embeddings as there are clusters,
+        since the model can't be initialized (and a mini-batch step isn't meaningful) with fewer.
+
+        Args:
+            sent_embeddings (np.ndarray): Embeddings of the next sentences of the text.
+
+        Returns:
+            StreamingKMeans: The updated instance.
+        """
+        if len(sent_embeddings) == 0:
+            return self
+
+        # Float16 embeddings are clustered in float32
+        self.__pending_embeddings.append(np.asarray(sent_embeddings, dtype=np.float32))
+        self.__pending_indices.append(np.arange(self.__num_seen, self.__num_seen + len(sent_embeddings)))
+        self.__num_seen += len(sent_embeddings)
+
+        if sum(len(embeddings) for embeddings in self.__pending_embeddings) >= self.__n_clusters:
+            self.__flush()
+        return self
+
+
+    def __flush(self):
+        """Passes the pending embeddings to the model and updates the reservoirs."""
+        if not self.__pending_embeddings:
+            return
+        embeddings = np.concatenate(self.__pending_embeddings)
+        indices = np.concatenate(self.__pending_indices)
+        self.__pending_embeddings, self.__pending_indices = [], []
+
+        # A text with fewer sentences than clusters (only possible at the end of the text) gets one cluster per sentence
+        if self.__model is None:
+            self.__model = MiniBatchKMeans(n_clusters=min(self.__n_clusters, len(embeddings)), random_state=self.__random_state)
+        self.__model.partial_fit(embeddings)
+        self.__update_reservoirs(embeddings, indices)
+
+
+    def __update_reservoirs(self, embeddings: np.ndarray, indices: np.ndarray):
+        """Reassigns the candidate sentences and the new sentences to the current centroids and keeps the closest sentences of every cluster.
+
+        Args:
+            embeddings (np.ndarray): Embeddings of the new sentences.
+            indices (np.ndarray): Sentence indices of the new sentences.
+        """
+        if self.__candidate_embeddings is not None:
+            embeddings = np.concatenate([self.__candidate_embeddings, embeddings])
+            indices = np.concatenate([self.__candidate_indices, indices])
+
+        # The centroids move with every chunk, so the old candidates are reassigned as well
+        distances = squared_distance_matrix(embeddings, self.__model.cluster_centers_)
+        labels = distances.argmin(axis=0)
+        label_distances = distances[labels, np.arange(len(indices))]
+
+        # Sort by cluster, then by distance to its centroid (then by the order in the text) and keep the first sentences of every cluster
+        order = np.lexsort((indices, label_distances, labels))
+        sorted_labels = labels[order]
+        ranks = np.arange(len(order)) - np.searchsorted(sorted_labels, sorted_labels, side='left')
+        kept = np.sort(order[ranks < self.__reservoir_size])
+
+        self.__candidate_embeddings = embeddings[kept]
+        self.__candidate_indices = indices[kept]
+
+
+    def retrieve_centroids(self) -> np.ndarray:
+        """Retrieves the coordinates of the current cluster centroids (the pending embeddings are folded into the model first).
+
+        Returns:
+            np.ndarray: Coordinates of cluster centroids (an empty array if no embeddings were seen).
+        """
+        self.__flush()
+        if self.__model is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self.__model.cluster_centers_
+
+
+    def get_candidate_embedding(self, sent_index: int) -> np.ndarray:
+        """Retrieves the embedding of a candidate sentence.
+
+        Args:
+            sent_index (int): Index of the sentence in the text.
+
+        Returns:
+            np.ndarray: Embedding of the sentence (None if the sentence isn't among the candidates).
+        """
+        positions = np.flatnonzero(self.__candidate_indices == sent_index)
+        return self.__candidate_embeddings[positions[0]] if len(positions) else None
+
+
+    def find_closest_sents(self) -> List[int]:
+        """Determines the indices of the sentences closest to the cluster centroids, choosing among the candidate sentences.
+
+        Returns:
+            List[int]: Sorted indices of the sentences closest to cluster centroids.
+        """
+        centroids = self.retrieve_centroids()
+        if len(centroids) == 0:
+            return []
+
+        candidates = KMeansWrapper(self.__candidate_embeddings, num_sentences=len(centroids), random_state=self.__random_state, assignment=self.__assignment)
+        closest_candidates = candidates.find_closest_sents(centroids)
+        return sorted(int(self.__candidate_indices[position]) for position in closest_candidates.values() if position != -1)
@@ -1,16 +1,39 @@
-from typing import List, Optional, Tuple, Union
+import time
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
-from transformers import *
 
 from spacy.lang.en import English
 
 
 from sentence_separator import SentenceSeparator
-from kmeans_wrapper import KMeansWrapper
+from kmeans_wrapper import KMeansWrapper, cluster_embeddings_batch, compute_num_clusters
+from greedy_selector import GreedySelector, SUPPORTED_OBJECTIVES
+from streaming_kmeans import StreamingKMeans
+from summary_hierarchy import SummaryHierarchy, SummaryHierarchyCache
 from bert_wrapper import BertWrapper
+from embedding_cache import EmbeddingCache
+from encoder_registry import get_encoder_spec
+from projection import EmbeddingProjector
+from profiling import count, stage, traced
 
 
+# Sentences of the dummy batch used to warm up the model (of different lengths, so that several sequence lengths are exercised)
+WARM_UP_SENTENCES = [
+    "Most of the solar system's asteroids live and work in the main asteroid belt, a roughly flat zone between the orbits of Mars and Jupiter.",
+    "By tradition, the discoverers get to name their asteroids whatever they like.",
+    "Asteroids are not the only space objects that pose a risk to life on Earth.",
+    "The Kuiper belt is a comet-strewn swath of circular real estate that begins just beyond the orbit of Neptune, includes Pluto, and extends perhaps as far again from Neptune as Neptune is from the Sun.",
+    "This subset includes Halley, the most famous comet of them all.",
+    "Without a massive planet upon which to fall, most of these comets will orbit the Sun for billions more years.",
+]
+
+# Modes of computing the sentence embeddings (each sentence on its own, or all sentences in the context of the whole text)
+SUPPORTED_EMBEDDING_MODES = ('sentence', 'document')
+
+# Strategies of selecting the summary sentences ('kmeans' picks the sentences closest to the cluster centroids, the others are objectives of GreedySelector)
+SUPPORTED_SELECTORS = ('kmeans',) + SUPPORTED_OBJECTIVES
+
 class SummarizerModel(object):
     """The class that performs text summarization.
 
@@ -23,6 +46,24 @@ class SummarizerModel(object):
             Hidden layer(s) from which the sentence representation will be taken.
         __random_state: int
             A fixed random seed.
+        __batch_size: int
+            Number of sentences embedded in one forward pass of the BERT model.
+        __embedding_cache: EmbeddingCache
+            Cache of the sentence embeddings (None if the embeddings aren't cached).
+        __assignment: str
+            Way of assigning a sentence to every cluster centroid ('greedy' or 'optimal').
+        __clustering_options: Dict[str, Union[str, int]]
+            Clustering backend, its number of runs and the algorithm of the 'kmeans' backend.
+        __projector: EmbeddingProjector
+            Projection of the sentence embeddings applied before the clustering (None if the embeddings are clustered at full width).
+        __streaming_options: Dict[str, int]
+            Minimum number of sentences of a text clustered in the streaming mode, the number of sentences embedded per chunk, the number of candidate sentences kept per cluster and the maximum number of candidate sentences of all clusters.
+        __hierarchy_cache: SummaryHierarchyCache
+            Hierarchies of recently summarized texts (used by summarize_lengths).
+        __selector: str
+            Strategy of selecting the summary sentences ('kmeans', 'facility_location' or 'mmr').
+        __mmr_lambda: float
+            Weight of the similarity to the text against the redundancy of the 'mmr' selector.
     
     Methods:
         get_bert_model():
@@ -33,20 +74,50 @@ class SummarizerModel(object):
             Retrieves a hidden layers value stored in a private class variable.
         get_random_state():
             Retrieves a fixed random seed stored in a private class variable.
+        get_batch_size():
+            Retrieves the number of sentences embedded in one forward pass stored in a private class variable.
+        get_embedding_cache():
+            Retrieves the cache of the sentence embeddings stored in a private class variable.
+        get_projector():
+            Retrieves the projection of the sentence embeddings stored in a private class variable.
         separate_sentences(content: str ,min_length: int = 40, max_length: int = 600):
             Splits the input text into sentences.
-        retrieve_sent_embeddings(content_sents: List[str]):
+        separate_sentences_with_offsets(content: str ,min_length: int = 40, max_length: int = 600):
+            Splits the input text into sentences and retrieves the character offset of each sentence.
+        stream_sentences(source: Union[str, IO[str], Iterable[str]], min_length: int = 40, max_length: int = 600, chunk_size: int = 65536):
+            Reads the input text in bounded chunks and lazily yields its sentences along with their character offsets.
+        retrieve_sent_embeddings(content_sents: List[str], batch_size: int = None):
             Calculates the embeddings of input sentences.
+        retrieve_document_sent_embeddings(content: str, content_sents: List[str], sent_offsets: List[int]):
+            Calculates the embeddings of input sentences in the context of the whole text.
         cluster_sent_embeddings(sent_embeddings: np.ndarray, sent_ratio: float = 0.2, num_sentences: int = None):
             Clusters the input embeddings using a specified number of clusters (number of clusters is determined by ratio/number of sentences that need to be returned).
-        cluster_sentences(self, content_sents: List[str], sent_ratio: float = 0.2, num_sentences: int = None ,use_first_sent: bool = True):
+        cluster_sent_embeddings_batch(embeddings_list: List[np.ndarray], sent_ratio: Union[List[float], float] = 0.2, num_sentences: Union[List[int], int] = None):
+            Clusters the sentence embeddings of several texts together and determines the list indices of the embeddings closest to the centroids of each text.
+        cluster_sentences(self, content_sents: List[str], sent_ratio: float = 0.2, num_sentences: int = None ,use_first_sent: bool = True, embedding_mode: str = 'sentence', content: str = None, sent_offsets: List[int] = None):
             Calculates the embeddings of input sentences and clusters them using a specified number of clusters (number of clusters is determined by ratio/number of sentences that need to be returned).
-        summarize(content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True):
+        cluster_sentences_streaming(content_sents: List[str], sent_ratio: float = 0.2, num_sentences: int = None, use_first_sent: bool = True):
+            Calculates the embeddings of input sentences chunk by chunk and folds every chunk into an online clustering, so that the embeddings of all sentences are never held at once.
+        build_summary_hierarchy(content: str, min_length: int = 40, max_length: int = 600, sentence_list: List[str] = None, sent_embeddings: np.ndarray = None):
+            Splits the input text into sentences, calculates the sentence embeddings and clusters them hierarchically (or retrieves the cached hierarchy of the text).
+        summarize_lengths(content: str, lengths: List[Union[int, float]], min_length: int = 40, max_length: int = 600, use_first_sent: bool = True):
+            Calculates summaries of several lengths of the input text from one hierarchical clustering.
+        summarize_with_lengths(content: str, lengths: List[Union[int, float]], sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True):
+            Calculates the summary of the input text along with the summaries of several lengths, from one sentence separation and one calculation of the sentence embeddings.
+        warm_up():
+            Runs the sentence separation, embedding and clustering steps on a dummy batch.
+        summarize(content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence'):
             Splits the input text into sentences, calculates the sentence embeddings and clusters them using a specified number of clusters (number of clusters is determined by ratio/number of sentences that need to be returned). In other words, it calculates the summary of the input text.
+        summarize_stream(source: Union[str, IO[str], Iterable[str]], sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, chunk_size: int = 65536):
+            Calculates the summary of a text which is read in bounded chunks.
+        cluster_sentences_batch(documents_sents: List[List[str]], sent_ratio: Union[List[float], float] = 0.2, num_sentences: Union[List[int], int] = None, use_first_sent: Union[List[bool], bool] = True, batch_size: int = 32):
+            Calculates the embeddings of the sentences of several texts together, in batches shared across the texts, and clusters the sentences of each text.
+        summarize_batch(documents: List[str], sent_ratio: Union[List[float], float] = 0.2, num_sentences: Union[List[int], int] = None, min_length: int = 40, max_length: int = 600, use_first_sent: Union[List[bool], bool] = True, batch_size: int = 32, n_process: int = 1):
+            Calculates the summaries of several texts, whose sentences are embedded together in batches shared across the texts.
 
     """
 
-    def __init__(self, bert_version: str = 'bert-large-uncased', hidden_layers: Union[List[int], int] = -2, sent_sep_language=English, random_state: int = 12345):
+    def __init__(self, bert_version: str = 'bert-large-uncased', hidden_layers: Union[List[int], int] = -2, sent_sep_language=English, random_state: int = 12345, batch_size: int = 1, engine: str = 'eager', compiled_model_path: str = None, embedding_cache: EmbeddingCache = None, encoder: str = None, snapshot_dir: str = None, precision: str = 'float32', embedding_dtype: str = 'float32', assignment: str = 'greedy', clustering_backend: str = 'kmeans', n_init: int = None, kmeans_algorithm: str = None, projection: str = None, projection_components: int = 128, projection_min_sentences: int = 0, streaming_min_sentences: int = None, streaming_chunk_size: int = 256, streaming_reservoir_size: int = 8, hierarchy_cache_size: int = 32, selector: str = 'kmeans', mmr_lambda: float = 0.7, sent_sep_engine: str = 'spacy', streaming_max_candidates: int = 1024):
         """Initializes an instance of the SummarizerModel class.
 
         Args:
@@ -54,15 +125,59 @@ class SummarizerModel(object):
             hidden_layers (Union[List[int], int], optional): Hidden layer(s) from which the sentence representation will be taken. Defaults to -2.
             sent_sep_language (spacy.lang.[lang].[Language], optional): Language used to separate text into sentences. Defaults to spacy.lang.en.English.
             random_state (int, optional): A fixed random seed (used for replication of results). Defaults to 12345.
+            batch_size (int, optional): Number of sentences embedded in one forward pass of the BERT model (values larger than 1 enable padded batches). Defaults to 1.
+            engine (str, optional): Engine which runs the BERT model ('eager', 'quantized', 'torchscript' or 'onnx', see BertWrapper). Defaults to 'eager'.
+            compiled_model_path (str, optional): Path of the graph exported by compiled_encoder.py (required by the 'torchscript' and 'onnx' engines). Defaults to None.
+            embedding_cache (EmbeddingCache, optional): Cache of the sentence embeddings, so that only the sentences which aren't cached are sent to the BERT model. Defaults to None.
+            encoder (str, optional): Name of a registered encoder (see encoder_registry.ENCODERS) which replaces the BERT version, hidden layers and pooling. Defaults to None.
+            snapshot_dir (str, optional): Directory of a model snapshot which loads without parsing the checkpoint and whose weights are shared by the processes running the model (see BertWrapper). Defaults to None.
+            precision (str, optional): Numerical precision of the encoder computation ('float32' or 'bfloat16', see BertWrapper). Defaults to 'float32'.
+            embedding_dtype (str, optional): Data type in which the sentence embeddings are kept until the clustering ('float32' or 'float16'). Defaults to 'float32'.
+            assignment (str, optional): Way of assigning a sentence to every centroid ('greedy' or 'optimal', see KMeansWrapper). Defaults to 'greedy'.
+            clustering_backend (str, optional): Clustering backend ('kmeans', 'minibatch' or 'numpy', see KMeansWrapper). Defaults to 'kmeans'.
+            n_init (int, optional): Number of runs of the clustering with different seeds. Defaults to None (the default of the clustering backend).
+            kmeans_algorithm (str, optional): Algorithm of the 'kmeans' backend (e.g. 'full' or 'elkan', see KMeansWrapper). Defaults to None (the default of sklearn's KMeans).
+            projection (str, optional): Projection of the sentence embeddings before the clustering ('pca' or 'random', see EmbeddingProjector). Defaults to None (no projection).
+            projection_components (int, optional): Dimension of the projected embeddings. Defaults to 128.
+            projection_min_sentences (int, optional): Minimum number of sentences of a text whose embeddings are projected. Defaults to 0.
+            streaming_min_sentences (int, optional): Minimum number of sentences of a text which is clustered in the streaming mode (see cluster_sentences_streaming). Defaults to None (the streaming mode is disabled).
+            streaming_chunk_size (int, optional): Number of sentences embedded and clustered together in the streaming mode. Defaults to 256.
+            streaming_reservoir_size (int, optional): Number of candidate sentences kept for every cluster in the streaming mode. Defaults to 8.
+            hierarchy_cache_size (int, optional): Number of texts whose hierarchical clustering is kept for follow-up requests (see summarize_lengths). Defaults to 32.
+            selector (str, optional): Strategy of selecting the summary sentences ('kmeans', or 'facility_location' / 'mmr' of GreedySelector). Defaults to 'kmeans'.
+            mmr_lambda (float, optional): Weight of the similarity to the text against the redundancy of the 'mmr' selector. Defaults to 0.7.
+            sent_sep_engine (str, optional): Engine finding the sentence boundaries ('spacy' or 'rules', see SentenceSeparator). Defaults to 'spacy'.
+            streaming_max_candidates (int, optional): Maximum number of candidate sentences of all clusters together in the streaming mode (every cluster keeps at least one). Defaults to 1024.
         """
+        if selector not in SUPPORTED_SELECTORS:
+            raise ValueError("Unsupported selector '" + str(selector) + "'. Supported selectors: " + ", ".join(SUPPORTED_SELECTORS) + ".")
+
         # Set the random seed
         np.random.seed(random_state)
         # Initialize the BertWrapper and SentenceSeparator classes
-        self.__bert_model = BertWrapper(model_version=bert_version)
-        self.__sentence_separator = SentenceSeparator(language=sent_sep_language)
+        if encoder is not None:
+            spec = get_encoder_spec(encoder)
+            hidden_layers = spec.hidden_layers
+            self.__bert_model = BertWrapper(model_version=spec.model_version, engine=engine, compiled_model_path=compiled_model_path,
+                                            architecture=spec.architecture, num_layers=spec.num_layers, tokenizer_version=spec.tokenizer_version,
+                                            snapshot_dir=snapshot_dir, precision=precision, embedding_dtype=embedding_dtype, pooling=spec.pooling)
+        else:
+            self.__bert_model = BertWrapper(model_version=bert_version, engine=engine, compiled_model_path=compiled_model_path, snapshot_dir=snapshot_dir,
+                                            precision=precision, embedding_dtype=embedding_dtype)
+        self.__sentence_separator = SentenceSeparator(language=sent_sep_language, engine=sent_sep_engine)
         # Save the remaining argument values
         self.__hidden_layers = hidden_layers
         self.__random_state = random_state
+        self.__batch_size = batch_size
+        self.__embedding_cache = embedding_cache
+        self.__assignment = assignment
+        self.__clustering_options = {"backend": clustering_backend, "n_init": n_init, "algorithm": kmeans_algorithm}
+        self.__projector = EmbeddingProjector(projection, n_components=projection_components, min_sentences=projection_min_sentences,
+                                              random_state=random_state) if projection is not None else None
+        self.__streaming_options = {"min_sentences": streaming_min_sentences, "chunk_size": streaming_chunk_size, "reservoir_size": streaming_reservoir_size, "max_candidates": streaming_max_candidates}
+        self.__hierarchy_cache = SummaryHierarchyCache(max_entries=hierarchy_cache_size)
+        self.__selector = selector
+        self.__mmr_lambda = mmr_lambda
     
 
     def get_bert_model(self) -> BertWrapper:
@@ -101,6 +216,34 @@ class SummarizerModel(object):
         return self.__random_state
     
 
+    def get_batch_size(self) -> int:
+        """Retrieves the number of sentences embedded in one forward pass stored in a private class variable.
+
+        Returns:
+            int: Number of sentences embedded in one forward pass of the BERT model (specified upon class initialization).
+        """
+        return self.__batch_size
+    
+
+    def get_embedding_cache(self) -> Union[EmbeddingCache, None]:
+        """Retrieves the cache of the sentence embeddings stored in a private class variable.
+
+        Returns:
+            Union[EmbeddingCache, None]: Cache of the sentence embeddings (specified upon class initialization).
+        """
+        return self.__embedding_cache
+    
+
+    def get_projector(self) -> Union[EmbeddingProjector, None]:
+        """Retrieves the projection of the sentence embeddings stored in a private class variable.
+
+        Returns:
+            Union[EmbeddingProjector, None]: Projection of the sentence embeddings applied before the clustering (None if the embeddings aren't projected).
+        """
+        return self.__projector
+
+
+    @traced('separate_sentences')
     def separate_sentences(self, content: str ,min_length: int = 40, max_length: int = 600) -> List[str]:
         """Splits the input text into sentences.
 
@@ -112,21 +255,101 @@ class SummarizerModel(object):
         Returns:
             List[str]: Sentences of a text whose length is in the acceptable range.
         """
-        return self.__sentence_separator(content=content, min_length=min_length, max_length=max_length)
+        sentences = self.__sentence_separator(content=content, min_length=min_length, max_length=max_length)
+        count('sentences', len(sentences))
+        return sentences
 
 
-    def retrieve_sent_embeddings(self, content_sents: List[str]) -> np.ndarray:
+    @traced('separate_sentences')
+    def separate_sentences_with_offsets(self, content: str ,min_length: int = 40, max_length: int = 600) -> List[Tuple[str, int]]:
+        """Splits the input text into sentences and retrieves the character offset of each sentence.
+
+        Args:
+            content (str): Input text that will be split into sentences.
+            min_length (int, optional): Minimum character length of returned sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of returned sentences. Defaults to 600.
+
+        Returns:
+            List[Tuple[str, int]]: Sentences of a text whose length is in the acceptable range, each with the offset of its first character in the text.
+        """
+        sentences = self.__sentence_separator.process_content_with_offsets(content=content, min_length=min_length, max_length=max_length)
+        count('sentences', len(sentences))
+        return sentences
+
+
+    def stream_sentences(self, source: Union[str, IO[str], Iterable[str]], min_length: int = 40, max_length: int = 600, chunk_size: int = 65536) -> Iterator[Tuple[str, int]]:
+        """Reads the input text in bounded chunks and lazily yields its sentences along with their character offsets (see SentenceSeparator.stream_sentences).
+
+        Args:
+            source (Union[str, IO[str], Iterable[str]]): The text, a file opened in text mode or an iterable of pieces of the text.
+            min_length (int, optional): Minimum character length of returned sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of returned sentences. Defaults to 600.
+            chunk_size (int, optional): Minimum number of new characters separated at once. Defaults to 65536.
+
+        Yields:
+            Tuple[str, int]: Sentences of a text whose length is in the acceptable range, each with the offset of its first character in the text.
+        """
+        return self.__sentence_separator.stream_sentences(source, min_length=min_length, max_length=max_length, chunk_size=chunk_size)
+
+
+    @traced('embed')
+    def retrieve_sent_embeddings(self, content_sents: List[str], batch_size: int = None) -> np.ndarray:
         """Calculates the embeddings of input sentences.
 
         Args:
             content_sents (List[str]): Input sentences whose embeddings will be calculted.
+            batch_size (int, optional): Number of sentences embedded in one forward pass. Defaults to None (the batch size of the model).
 
         Returns:
             np.ndarray: Embeddings of input sentences.
         """
-        return self.__bert_model(content = content_sents, hidden_layers=self.__hidden_layers)
+        batch_size = batch_size or self.__batch_size
+        if self.__embedding_cache is None or not content_sents:
+            return self.__bert_model(content = content_sents, hidden_layers=self.__hidden_layers, batch_size=batch_size)
+
+        # Embeddings computed by different engines (or in a reduced precision, or pooled differently) aren't interchangeable, so they are a part of the model version
+        model_version = self.__bert_model.get_model_version() + "/" + self.__bert_model.get_engine()
+        if self.__bert_model.get_precision() != 'float32':
+            model_version += "/" + self.__bert_model.get_precision()
+        if self.__bert_model.get_pooling() != 'mean':
+            model_version += "/" + self.__bert_model.get_pooling()
+        hidden_layers = self.__bert_model.normalize_hidden_layers(self.__hidden_layers)
+        keys = [EmbeddingCache.create_key(model_version, hidden_layers, sentence) for sentence in content_sents]
+        sent_embeddings = self.__embedding_cache.get_many(keys)
+
+        # Send only the cache misses to the BERT model (a sentence repeated within the text is computed once)
+        missing_keys = {}
+        for index, embedding in enumerate(sent_embeddings):
+            if embedding is None:
+                missing_keys.setdefault(keys[index], []).append(index)
+        if missing_keys:
+            missing_sents = [content_sents[indices[0]] for indices in missing_keys.values()]
+            missing_embeddings = self.__bert_model(content = missing_sents, hidden_layers=self.__hidden_layers, batch_size=batch_size)
+            self.__embedding_cache.put_many(list(missing_keys.keys()), missing_embeddings)
+            for indices, embedding in zip(missing_keys.values(), missing_embeddings):
+                for index in indices:
+                    sent_embeddings[index] = embedding
+
+        return np.asarray(sent_embeddings, dtype=self.__bert_model.get_embedding_dtype())
+
+
+    @traced('embed')
+    def retrieve_document_sent_embeddings(self, content: str, content_sents: List[str], sent_offsets: List[int]) -> np.ndarray:
+        """Calculates the embeddings of input sentences in the context of the whole text.
 
+        Args:
+            content (str): Text containing the input sentences.
+            content_sents (List[str]): Input sentences whose embeddings will be calculated.
+            sent_offsets (List[int]): Character offset of each input sentence in the text.
 
+        Returns:
+            np.ndarray: Embeddings of input sentences.
+        """
+        char_spans = [(offset, offset + len(sentence)) for sentence, offset in zip(content_sents, sent_offsets)]
+        return self.__bert_model.create_document_embeddings(content, char_spans, hidden_layers=self.__hidden_layers)
+
+
+    @traced('cluster')
     def cluster_sent_embeddings(self, sent_embeddings: np.ndarray, sent_ratio: float = 0.2, num_sentences: int = None) -> List[int]:
         """Clusters the input embeddings using a specified number of clusters (number of clusters is determined by ratio/number of sentences that need to be returned).
 
@@ -138,10 +361,44 @@ class SummarizerModel(object):
         Returns:
             List[int]: List indices of embeddings who are closest to cluster centroids.
         """
-        return KMeansWrapper(sent_embeddings, sent_ratio=sent_ratio, num_sentences=num_sentences , random_state=self.__random_state).cluster_embeddings()
+        # Project the embeddings into a lower dimension (the indices of the closest embeddings are the same for both)
+        if self.__projector is not None:
+            sent_embeddings = self.__projector(sent_embeddings)
+        # Select the sentences greedily from their similarity matrix (without clustering)
+        if self.__selector != 'kmeans':
+            return GreedySelector(sent_embeddings, sent_ratio=sent_ratio, num_sentences=num_sentences, objective=self.__selector, mmr_lambda=self.__mmr_lambda).select_embeddings()
+        return KMeansWrapper(sent_embeddings, sent_ratio=sent_ratio, num_sentences=num_sentences , random_state=self.__random_state, assignment=self.__assignment, **self.__clustering_options).cluster_embeddings()
+
+
+    def cluster_sent_embeddings_batch(self, embeddings_list: List[np.ndarray], sent_ratio: Union[List[float], float] = 0.2, num_sentences: Union[List[int], int] = None) -> List[List[int]]:
+        """Clusters the sentence embeddings of several texts together and determines the list indices of the embeddings closest to the centroids of each text.
+
+        With the 'numpy' clustering backend, all texts are clustered by one vectorized k-means on padded arrays (see kmeans_wrapper.cluster_embeddings_batch),
+        which avoids the overhead of a separate clustering model for every short text. The other backends (and the greedy selectors) cluster
+        every text on its own, so every text gets the same indices as from cluster_sent_embeddings (up to floating-point rounding).
+
+        Args:
+            embeddings_list (List[np.ndarray]): Sentence embeddings of each text.
+            sent_ratio (Union[List[float], float], optional): Ratio of the number of embeddings that need to be returned (one ratio for all texts or one per text). Defaults to 0.2.
+            num_sentences (Union[List[int], int], optional): Absolute number of embeddings that need to be returned (one number for all texts or one per text). Defaults to None.
+
+        Returns:
+            List[List[int]]: List indices of embeddings who are closest to cluster centroids of each text.
+        """
+        # Only the 'numpy' backend has a batched implementation (the greedy selectors have no clustering step to batch)
+        if self.__selector != 'kmeans' or self.__clustering_options["backend"] != 'numpy':
+            sent_ratio_list = sent_ratio if isinstance(sent_ratio, (list, tuple)) else [sent_ratio] * len(embeddings_list)
+            num_sentences_list = num_sentences if isinstance(num_sentences, (list, tuple)) else [num_sentences] * len(embeddings_list)
+            return [self.cluster_sent_embeddings(sent_embeddings, sent_ratio=ratio, num_sentences=num) for sent_embeddings, ratio, num in zip(embeddings_list, sent_ratio_list, num_sentences_list)]
 
+        with stage('cluster'):
+            if self.__projector is not None:
+                embeddings_list = [self.__projector(sent_embeddings) for sent_embeddings in embeddings_list]
+            return cluster_embeddings_batch(embeddings_list, sent_ratio=sent_ratio, num_sentences=num_sentences, random_state=self.__random_state,
+                                            assignment=self.__assignment, n_init=self.__clustering_options["n_init"] or 1)
 
-    def cluster_sentences(self, content_sents: List[str], sent_ratio: float = 0.2, num_sentences: int = None ,use_first_sent: bool = True) -> Tuple[List[str], np.ndarray]:
+
+    def cluster_sentences(self, content_sents: List[str], sent_ratio: float = 0.2, num_sentences: int = None ,use_first_sent: bool = True, embedding_mode: str = 'sentence', content: str = None, sent_offsets: List[int] = None) -> Tuple[List[str], np.ndarray]:
         """Calculates the embeddings of input sentences and clusters them using a specified number of clusters (number of clusters is determined by ratio/number of sentences that need to be returned).
 
         Args:
@@ -149,12 +406,32 @@ class SummarizerModel(object):
             sent_ratio (float, optional): Ratio of the number of sentences that need to be returned. Defaults to 0.2
             num_sentences (int, optional): Absolute number of sentences that need to be returned. Defaults to None.
             use_first_sent (bool, optional): Whether the first sentence of the input should be included in the output. Defaults to True.
+            embedding_mode (str, optional): Whether each sentence is embedded on its own ('sentence') or in the context of the whole text ('document'). Defaults to 'sentence'.
+            content (str, optional): Text containing the input sentences (used by the 'document' mode, rebuilt from the sentences if not provided). Defaults to None.
+            sent_offsets (List[int], optional): Character offset of each input sentence in the text (used by the 'document' mode along with the text). Defaults to None.
 
         Returns:
             Tuple[List[str], np.ndarray]: List of sentences along with their embeddings.
         """
+        if embedding_mode not in SUPPORTED_EMBEDDING_MODES:
+            raise ValueError("Unsupported embedding mode '" + str(embedding_mode) + "'. Supported modes: " + ", ".join(SUPPORTED_EMBEDDING_MODES) + ".")
+
+        # Cluster long texts without holding the embeddings of all sentences (only sentences embedded on their own can be streamed)
+        streaming_min_sentences = self.__streaming_options["min_sentences"]
+        if embedding_mode == 'sentence' and streaming_min_sentences is not None and len(content_sents) >= streaming_min_sentences:
+            return self.cluster_sentences_streaming(content_sents=content_sents, sent_ratio=sent_ratio, num_sentences=num_sentences, use_first_sent=use_first_sent)
+
         # Calculate the embeddings of the input sentences 
-        all_sent_embeddings = self.retrieve_sent_embeddings(content_sents = content_sents)
+        if embedding_mode == 'document':
+            # Without the original text, join the sentences into one
+            if content is None or sent_offsets is None:
+                content = ' '.join(content_sents)
+                sent_offsets = [0]
+                for sentence in content_sents[:-1]:
+                    sent_offsets.append(sent_offsets[-1] + len(sentence) + 1)
+            all_sent_embeddings = self.retrieve_document_sent_embeddings(content=content, content_sents=content_sents, sent_offsets=sent_offsets)
+        else:
+            all_sent_embeddings = self.retrieve_sent_embeddings(content_sents = content_sents)
         # Cluster the sentence embeddings using the specified number of clusters
         closest_sent_indices = self.cluster_sent_embeddings(all_sent_embeddings, sent_ratio=sent_ratio, num_sentences=num_sentences)
 
@@ -173,7 +450,191 @@ class SummarizerModel(object):
         return sentences, embedded_sentences
     
 
-    def summarize(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> str:
+    def cluster_sentences_streaming(self, content_sents: List[str], sent_ratio: float = 0.2, num_sentences: int = None, use_first_sent: bool = True) -> Tuple[List[str], np.ndarray]:
+        """Calculates the embeddings of input sentences chunk by chunk and folds every chunk into an online clustering (see StreamingKMeans), so that the embeddings of all sentences are never held at once.
+
+        The memory of the clustering is bounded by the number of clusters, so it stays constant for a fixed number of sentences (*num_sentences*). With
+        *sent_ratio*, the number of clusters grows with the text and so does the memory (a centroid and at least one candidate sentence per cluster,
+        see StreamingKMeans). The embeddings aren't projected in this mode, since the PCA projection needs the embeddings of the whole text.
+
+        Args:
+            content_sents (List[str]): Input sentences whose embeddings will be calculted and clustered.
+            sent_ratio (float, optional): Ratio of the number of sentences that need to be returned. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of sentences that need to be returned. Defaults to None.
+            use_first_sent (bool, optional): Whether the first sentence of the input should be included in the output. Defaults to True.
+
+        Returns:
+            Tuple[List[str], np.ndarray]: List of sentences along with their embeddings.
+        """
+        # The number of clusters is known in advance, since the sentences are separated before they are embedded
+        n_clusters = compute_num_clusters(len(content_sents), sent_ratio, num_sentences)
+        clustering = StreamingKMeans(n_clusters, reservoir_size=self.__streaming_options["reservoir_size"], assignment=self.__assignment, random_state=self.__random_state,
+                                     max_candidates=self.__streaming_options["max_candidates"]) if n_clusters > 0 else None
+
+        # Embed the sentences chunk by chunk and fold every chunk into the clustering
+        first_sent_embedding = None
+        chunk_size = self.__streaming_options["chunk_size"]
+        for start in range(0, len(content_sents), chunk_size):
+            chunk_embeddings = self.retrieve_sent_embeddings(content_sents=content_sents[start:start + chunk_size])
+            if start == 0:
+                first_sent_embedding = chunk_embeddings[0]
+            if clustering is None:
+                # Only the first sentence can be returned
+                break
+            clustering.partial_fit(chunk_embeddings)
+
+        closest_sent_indices = clustering.find_closest_sents() if clustering is not None else []
+
+        # Include the index of the first sentence if *useFirstSent* is set to true 
+        if use_first_sent:
+            if not closest_sent_indices:
+                closest_sent_indices.append(0)
+            elif closest_sent_indices[0] != 0:
+                closest_sent_indices.insert(0 , 0)
+
+        # Extract the sentences and their embeddings (the first sentence might not be one of the candidates)
+        sentences = [content_sents[index] for index in closest_sent_indices]
+        embedded_sentences = np.asarray([first_sent_embedding if index == 0 else clustering.get_candidate_embedding(index) for index in closest_sent_indices])
+
+        return sentences, embedded_sentences
+
+
+    def build_summary_hierarchy(self, content: str, min_length: int = 40, max_length: int = 600, sentence_list: List[str] = None, sent_embeddings: np.ndarray = None) -> SummaryHierarchy:
+        """Splits the input text into sentences, calculates the sentence embeddings and clusters them hierarchically (or retrieves the cached hierarchy of the text).
+
+        Args:
+            content (str): Input text.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            sentence_list (List[str], optional): Sentences of the text, if they are already separated (with the same minimum and maximum length). Defaults to None.
+            sent_embeddings (np.ndarray, optional): Embeddings of the sentences, if they are already calculated (along with *sentence_list*). Defaults to None.
+
+        Returns:
+            SummaryHierarchy: Hierarchical clustering of the sentences of the text.
+        """
+        key = SummaryHierarchyCache.create_key(content, min_length, max_length)
+        hierarchy = self.__hierarchy_cache.get(key)
+        if hierarchy is None:
+            if sentence_list is None:
+                sentence_list = self.separate_sentences(content=content, min_length=min_length, max_length=max_length)
+            if sent_embeddings is None:
+                sent_embeddings = self.retrieve_sent_embeddings(content_sents=sentence_list) if sentence_list else np.zeros((0, 0), dtype=np.float32)
+            if self.__projector is not None:
+                sent_embeddings = self.__projector(sent_embeddings)
+            hierarchy = SummaryHierarchy(sentence_list, sent_embeddings, assignment=self.__assignment)
+            self.__hierarchy_cache.put(key, hierarchy)
+        return hierarchy
+
+
+    def __cut_summaries(self, hierarchy: SummaryHierarchy, lengths: List[Union[int, float]], use_first_sent: bool) -> List[str]:
+        """Cuts the hierarchical clustering of a text into summaries of several lengths.
+
+        Args:
+            hierarchy (SummaryHierarchy): Hierarchical clustering of the sentences of the text.
+            lengths (List[Union[int, float]]): Lengths of the summaries, an integer is an absolute number of sentences and a float is a ratio of the number of sentences.
+            use_first_sent (bool): Whether the first sentence of the text should be included in the summaries.
+
+        Returns:
+            List[str]: Summaries of the text, one for each length.
+        """
+        sentences = hierarchy.get_sentences()
+
+        summaries = []
+        for length in lengths:
+            if isinstance(length, float):
+                sent_indices = hierarchy.select_sentences(sent_ratio=length, use_first_sent=use_first_sent)
+            else:
+                sent_indices = hierarchy.select_sentences(num_sentences=length, use_first_sent=use_first_sent)
+            summaries.append(' '.join(sentences[index] for index in sent_indices))
+        return summaries
+
+
+    @traced('summarize_lengths')
+    def summarize_lengths(self, content: str, lengths: List[Union[int, float]], min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> List[str]:
+        """Calculates summaries of several lengths of the input text from one hierarchical clustering (see SummaryHierarchy).
+
+        The text is embedded and clustered once, every summary is a cut of the same tree. The hierarchy is cached, so a follow-up request
+        for the same text with other lengths doesn't run the BERT model again. The summaries can differ from the summaries of the
+        summarize method, which clusters the sentences with KMeans.
+
+        Args:
+            content (str): Input text that will be summarized.
+            lengths (List[Union[int, float]]): Lengths of the summaries, an integer is an absolute number of sentences and a float is a ratio of the number of sentences.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summaries. Defaults to True.
+
+        Returns:
+            List[str]: Summaries of the input text, one for each length.
+        """
+        hierarchy = self.build_summary_hierarchy(content=content, min_length=min_length, max_length=max_length)
+        return self.__cut_summaries(hierarchy, lengths, use_first_sent)
+
+
+    @traced('summarize')
+    def summarize_with_lengths(self, content: str, lengths: List[Union[int, float]], sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> Tuple[str, List[str]]:
+        """Calculates the summary of the input text (the same as the summary of the summarize method) along with the summaries of several lengths (the same as those of summarize_lengths).
+
+        The text is separated into sentences and embedded once. KMeans clusters the embeddings into the main summary and the hierarchy of the
+        other lengths is built from the same embeddings. Only a text which is clustered in the streaming mode (see *streaming_min_sentences*)
+        is embedded twice, since its main summary never holds the embeddings of all sentences.
+
+        Args:
+            content (str): Input text that will be summarized.
+            lengths (List[Union[int, float]]): Lengths of the additional summaries, an integer is an absolute number of sentences and a float is a ratio of the number of sentences.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned in the main summary. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned in the main summary. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summaries. Defaults to True.
+
+        Returns:
+            Tuple[str, List[str]]: The summary of the input text along with its summaries of the additional lengths.
+        """
+        # Separate the text into sentences
+        sentence_list = self.separate_sentences(content=content, min_length=min_length, max_length=max_length)
+
+        # Calculate the sentence embeddings once and cluster them (the streaming mode calculates its own embeddings)
+        streaming_min_sentences = self.__streaming_options["min_sentences"]
+        if not sentence_list:
+            summary_sents = []
+            hierarchy = self.build_summary_hierarchy(content=content, min_length=min_length, max_length=max_length, sentence_list=sentence_list)
+        elif streaming_min_sentences is not None and len(sentence_list) >= streaming_min_sentences:
+            summary_sents, _ = self.cluster_sentences_streaming(content_sents=sentence_list, sent_ratio=sent_ratio, num_sentences=num_sentences, use_first_sent=use_first_sent)
+            hierarchy = self.build_summary_hierarchy(content=content, min_length=min_length, max_length=max_length, sentence_list=sentence_list)
+        else:
+            sent_embeddings = self.retrieve_sent_embeddings(content_sents=sentence_list)
+            closest_sent_indices = self.cluster_sent_embeddings(sent_embeddings, sent_ratio=sent_ratio, num_sentences=num_sentences)
+
+            # Include the index of the first sentence if *useFirstSent* is set to true
+            if use_first_sent:
+                if not closest_sent_indices:
+                    closest_sent_indices.append(0)
+                elif closest_sent_indices[0] != 0:
+                    closest_sent_indices.insert(0 , 0)
+            summary_sents = [sentence_list[index] for index in closest_sent_indices]
+            hierarchy = self.build_summary_hierarchy(content=content, min_length=min_length, max_length=max_length, sentence_list=sentence_list, sent_embeddings=sent_embeddings)
+
+        # Cut the hierarchy into the summaries of the additional lengths
+        return ' '.join(summary_sents), self.__cut_summaries(hierarchy, lengths, use_first_sent)
+
+
+    def warm_up(self) -> float:
+        """Runs the sentence separation, embedding and clustering steps on a dummy batch, so that the first request doesn't pay for the lazy initialization of the model (thread pools, memory allocations, first page faults of the weights).
+
+        Returns:
+            float: Duration of the warm-up in seconds.
+        """
+        start_time = time.perf_counter()
+        self.separate_sentences(content=' '.join(WARM_UP_SENTENCES))
+        # The cache is bypassed, so that the dummy sentences aren't stored in it
+        sent_embeddings = self.__bert_model(content=WARM_UP_SENTENCES, hidden_layers=self.__hidden_layers, batch_size=self.__batch_size)
+        self.cluster_sent_embeddings(sent_embeddings, num_sentences=2)
+        return time.perf_counter() - start_time
+
+
+    @traced('summarize')
+    def summarize(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence') -> str:
         """Splits the input text into sentences, calculates the sentence embeddings and clusters them using a specified number of clusters (number of clusters is determined by ratio/number of sentences that need to be returned). In other words, it calculates the summary of the input text.
 
         Args:
@@ -183,22 +644,151 @@ class SummarizerModel(object):
             min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
             max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
             use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+            embedding_mode (str, optional): Whether each sentence is embedded on its own ('sentence') or in the context of the whole text ('document'). Defaults to 'sentence'.
 
         Returns:
             str: A summary of the input text containing sentences whose embeddings are closest to the cluster centroids.
         """
-        # Separate the text into sentences
-        sentence_list = self.separate_sentences(content=content, min_length=min_length, max_length=max_length)
+        # Separate the text into sentences (the 'document' mode also needs their positions in the text)
+        sent_offsets = None
+        if embedding_mode == 'document':
+            sentences_with_offsets = self.separate_sentences_with_offsets(content=content, min_length=min_length, max_length=max_length)
+            sentence_list = [sentence for sentence, _ in sentences_with_offsets]
+            sent_offsets = [offset for _, offset in sentences_with_offsets]
+        else:
+            sentence_list = self.separate_sentences(content=content, min_length=min_length, max_length=max_length)
 
         # Calculate the sentence embeddings and cluster them (if there are any sentences)
         if sentence_list:
-            sentence_list, _ = self.cluster_sentences(content_sents=sentence_list, sent_ratio=sent_ratio, num_sentences=num_sentences, use_first_sent=use_first_sent)
+            sentence_list, _ = self.cluster_sentences(content_sents=sentence_list, sent_ratio=sent_ratio, num_sentences=num_sentences, use_first_sent=use_first_sent, embedding_mode=embedding_mode, content=content, sent_offsets=sent_offsets)
         
         # Return the sentences that make up the summary as a string
         return ' '.join(sentence_list)
     
 
-    def __call__(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True) -> str:
+    def summarize_stream(self, source: Union[str, IO[str], Iterable[str]], sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, chunk_size: int = 65536) -> str:
+        """Calculates the summary of a text which is read in bounded chunks, so that multi-megabyte documents never have to be loaded (or processed by the language pipeline) at once.
+
+        Only the sentences of an appropriate length are kept in memory. Their embeddings are bounded as well if the streaming clustering mode is enabled
+        (see *streaming_min_sentences*). The sentences are embedded on their own, since the 'document' embedding mode needs the whole text.
+
+        Args:
+            source (Union[str, IO[str], Iterable[str]]): The text, a file opened in text mode or an iterable of pieces of the text.
+            sent_ratio (float, optional): Ratio of the number of input text sentences that need to be returned. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of input text sentences that need to be returned. Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+            chunk_size (int, optional): Minimum number of new characters separated at once. Defaults to 65536.
+
+        Returns:
+            str: A summary of the input text containing sentences whose embeddings are closest to the cluster centroids.
+        """
+        # Separate the text into sentences chunk by chunk
+        sentence_list = [sentence for sentence, _ in self.stream_sentences(source, min_length=min_length, max_length=max_length, chunk_size=chunk_size)]
+
+        # Calculate the sentence embeddings and cluster them (if there are any sentences)
+        if sentence_list:
+            sentence_list, _ = self.cluster_sentences(content_sents=sentence_list, sent_ratio=sent_ratio, num_sentences=num_sentences, use_first_sent=use_first_sent)
+
+        # Return the sentences that make up the summary as a string
+        return ' '.join(sentence_list)
+
+
+    def cluster_sentences_batch(self, documents_sents: List[List[str]], sent_ratio: Union[List[float], float] = 0.2, num_sentences: Union[List[int], int] = None, use_first_sent: Union[List[bool], bool] = True, batch_size: int = 32) -> List[List[str]]:
+        """Calculates the embeddings of the sentences of several texts together, in batches shared across the texts, and clusters the sentences of each text.
+
+        The sentences of all texts are pooled and sent to the BERT model at once, so the sentences with a similar number of tokens form the
+        padded batches regardless of the text they belong to. The embeddings are then scattered back and the texts are clustered by
+        cluster_sent_embeddings_batch (in one vectorized k-means with the 'numpy' backend), so the selected sentences are the same as those of
+        cluster_sentences with the 'sentence' embedding mode (up to floating-point rounding). Texts which are clustered in the streaming mode
+        (see *streaming_min_sentences*) are clustered one by one.
+
+        Args:
+            documents_sents (List[List[str]]): Sentences of each input text.
+            sent_ratio (Union[List[float], float], optional): Ratio of the number of sentences that need to be returned (one value for all texts or one per text). Defaults to 0.2
+            num_sentences (Union[List[int], int], optional): Absolute number of sentences that need to be returned (one value for all texts or one per text). Defaults to None.
+            use_first_sent (Union[List[bool], bool], optional): Whether the first sentence of the input should be included in the output (one value for all texts or one per text). Defaults to True.
+            batch_size (int, optional): Number of sentences embedded in one forward pass. Defaults to 32.
+
+        Returns:
+            List[List[str]]: Sentences closest to cluster centroids of each text (in the order of the texts).
+        """
+        # One value of every parameter per text
+        parameters = {"sent_ratio": sent_ratio, "num_sentences": num_sentences, "use_first_sent": use_first_sent}
+        for name, value in parameters.items():
+            if not isinstance(value, (list, tuple)):
+                parameters[name] = [value] * len(documents_sents)
+            elif len(value) != len(documents_sents):
+                raise ValueError("Parameter '" + name + "' has " + str(len(value)) + " values for " + str(len(documents_sents)) + " texts.")
+
+        # Pool the sentences of the texts which aren't clustered in the streaming mode and embed them together
+        streaming_min_sentences = self.__streaming_options["min_sentences"]
+        pooled_documents = [num for num, sentences in enumerate(documents_sents) if sentences and (streaming_min_sentences is None or len(sentences) < streaming_min_sentences)]
+        pooled_sents = [sentence for num in pooled_documents for sentence in documents_sents[num]]
+        pooled_embeddings = self.retrieve_sent_embeddings(content_sents=pooled_sents, batch_size=batch_size) if pooled_sents else None
+
+        # Scatter the embeddings of the texts and cluster them (together, if the clustering backend allows it)
+        embeddings_list = []
+        start = 0
+        for num in pooled_documents:
+            embeddings_list.append(pooled_embeddings[start:start + len(documents_sents[num])])
+            start += len(documents_sents[num])
+        closest_indices_list = self.cluster_sent_embeddings_batch(embeddings_list, sent_ratio=[parameters["sent_ratio"][num] for num in pooled_documents],
+                                                                  num_sentences=[parameters["num_sentences"][num] for num in pooled_documents])
+
+        selected_sents = [[] for _ in documents_sents]
+        for num, closest_sent_indices in zip(pooled_documents, closest_indices_list):
+            sentences = documents_sents[num]
+
+            # Include the index of the first sentence if *useFirstSent* is set to true
+            if parameters["use_first_sent"][num]:
+                if not closest_sent_indices:
+                    closest_sent_indices.append(0)
+                elif closest_sent_indices[0] != 0:
+                    closest_sent_indices.insert(0 , 0)
+            selected_sents[num] = [sentences[index] for index in closest_sent_indices]
+
+        # Cluster the long texts one by one
+        for num, sentences in enumerate(documents_sents):
+            if sentences and streaming_min_sentences is not None and len(sentences) >= streaming_min_sentences:
+                selected_sents[num], _ = self.cluster_sentences_streaming(content_sents=sentences, sent_ratio=parameters["sent_ratio"][num], num_sentences=parameters["num_sentences"][num], use_first_sent=parameters["use_first_sent"][num])
+
+        return selected_sents
+
+
+    def summarize_batch(self, documents: List[str], sent_ratio: Union[List[float], float] = 0.2, num_sentences: Union[List[int], int] = None, min_length: int = 40, max_length: int = 600, use_first_sent: Union[List[bool], bool] = True, batch_size: int = 32, n_process: int = 1) -> List[str]:
+        """Calculates the summaries of several texts, whose sentences are embedded together in batches shared across the texts (see cluster_sentences_batch).
+
+        A summary is the same as the summary of the summarize method (with the 'sentence' embedding mode), only the per-text overhead of the
+        sentence separation and of the small batches of the BERT model is avoided.
+
+        Args:
+            documents (List[str]): Input texts that will be summarized.
+            sent_ratio (Union[List[float], float], optional): Ratio of the number of input text sentences that need to be returned (one value for all texts or one per text). Defaults to 0.2
+            num_sentences (Union[List[int], int], optional): Absolute number of input text sentences that need to be returned (one value for all texts or one per text). Defaults to None.
+            min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
+            max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
+            use_first_sent (Union[List[bool], bool], optional): Whether the first sentence of the input text should be included in the summary (one value for all texts or one per text). Defaults to True.
+            batch_size (int, optional): Number of sentences embedded in one forward pass. Defaults to 32.
+            n_process (int, optional): Number of processes separating the texts into sentences (see SentenceSeparator.process_contents). Defaults to 1.
+
+        Returns:
+            List[str]: Summaries of the input texts (in the order of the texts).
+        """
+        # Separate all texts into sentences
+        with stage('separate_sentences'):
+            documents_sents = list(self.__sentence_separator.process_contents(documents, min_length=min_length, max_length=max_length, n_process=n_process))
+        count('sentences', sum(len(sentences) for sentences in documents_sents))
+
+        # Calculate the sentence embeddings of all texts together and cluster them
+        selected_sents = self.cluster_sentences_batch(documents_sents, sent_ratio=sent_ratio, num_sentences=num_sentences, use_first_sent=use_first_sent, batch_size=batch_size)
+
+        # Return the sentences that make up each summary as a string
+        return [' '.join(sentences) for sentences in selected_sents]
+
+
+    def __call__(self, content: str, sent_ratio: float = 0.2, num_sentences: int = None, min_length: int = 40, max_length: int = 600, use_first_sent: bool = True, embedding_mode: str = 'sentence') -> str:
         """Splits the input text into sentences, calculates the sentence embeddings and clusters them using a specified number of clusters (number of clusters is determined by ratio/number). In other words, it calculates the summary of the input text.
 
         Args:
@@ -208,9 +798,10 @@ class SummarizerModel(object):
             min_length (int, optional): Minimum character length of summary sentences. Defaults to 40.
             max_length (int, optional): Maximum character length of summary sentences. Defaults to 600.
             use_first_sent (bool, optional): Whether the first sentence of the input text should be included in the summary. Defaults to True.
+            embedding_mode (str, optional): Whether each sentence is embedded on its own ('sentence') or in the context of the whole text ('document'). Defaults to 'sentence'.
 
         Returns:
             str: A summary of the input text containing sentences whose embeddings are closest to cluster centroids.
         """
-        return self.summarize(content, sent_ratio, num_sentences, min_length, max_length, use_first_sent)
+        return self.summarize(content, sent_ratio, num_sentences, min_length, max_length, use_first_sent, embedding_mode)
 
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Union
+
+import numpy as np
+from scipy.cluster.hierarchy import cut_tree, linkage
+
+from kmeans_wrapper import KMeansWrapper, compute_num_clusters
+
+
+class SummaryHierarchy(object):
+    """The class that clusters the sentences of a text hierarchically once, so that summaries of any length are cheap cuts of the same tree.
+
+    The tree is built by Ward's method, which merges the clusters with the smallest increase of the within-cluster variance (the same criterion
+    KMeans minimizes). A cut into k clusters is followed by the same search for the sentences closest to the centroids as in KMeansWrapper.
+
+    Attributes:
+        __sentences: List[str]
+            Sentences of the text.
+        __sent_embeddings: np.ndarray
+            Embeddings of the sentences (used to compute the centroids of every cut).
+        __linkage: np.ndarray
+            Linkage matrix of the tree (None if the text has a single sentence).
+        __assignment: str
+            Way of assigning a sentence to every centroid ('greedy' or 'optimal', see KMeansWrapper).
+        __cuts: Dict[int, List[int]]
+            Sentence indices selected by the cuts computed so far, keyed by the number of clusters.
+
+    Methods:
+        get_sentences():
+            Retrieves the sentences of the text stored in a private class variable.
+        cut(n_clusters: int):
+            Cuts the tree into the given number of clusters and determines the indices of the sentences closest to their centroids.
+        select_sentences(sent_ratio: float = 0.2, num_sentences: int = None, use_first_sent: bool = True):
+            Determines the sentences of a summary of the given length.
+    """
+
+    def __init__(self, sentences: List[str], sent_embeddings: np.ndarray, assignment: str = 'greedy'):
+        """Initializes an instance of the SummaryHierarchy class and builds the tree.
+
+        Args:
+            sentences (List[str]): Sentences of the text.
+            sent_embeddings (np.ndarray): Embeddings of the sentences.
+            assignment (str, optional): Way of assigning a sentence to every centroid ('greedy' or 'optimal'). Defaults to 'greedy'.
+        """
+        self.__sentences = sentences
+        self.__sent_embeddings = np.asarray(sent_embeddings, dtype=np.float64)
+        self.__assignment = assignment
+        self.__cuts = {}
+        # Ward's method needs at least two observations
+        self.__linkage = linkage(self.__sent_embeddings, method='ward') if len(sentences) > 1 else None
+
+
+    def get_sentences(self) -> List[str]:
+        """Retrieves the sentences of the text stored in a private class variable.
+
+        Returns:
+            List[str]: Sentences of the text (specified upon class initialization).
+        """
+        return self.__sentences
+
+
+    def cut(self, n_clusters: int) -> List[int]:
+        """Cuts the tree into the given number of clusters and determines the indices of the sentences closest to their centroids.
+
+        Args:
+            n_clusters (int): Number of clusters.
+
+        Returns:
+            List[int]: Sorted indices of the sentences closest to cluster centroids.
+        """
+        n_clusters = min(n_clusters, len(self.__sentences))
+        if n_clusters <= 0:
+            return []
+        if n_clusters not in self.__cuts:
+            # Cluster of every sentence and the centroid (mean embedding) of every cluster
+            labels = cut_tree(self.__linkage, n_clusters=[n_clusters])[:, 0] if self.__linkage is not None else np.zeros(1, dtype=np.int64)
+            centroids = np.zeros((n_clusters, self.__sent_embeddings.shape[1]))
+            np.add.at(centroids, labels, self.__sent_embeddings)
+            centroids /= np.bincount(labels, minlength=n_clusters)[:, None]
+
+            closest_sentences = KMeansWrapper(self.__sent_embeddings, num_sentences=n_clusters, assignment=self.__assignment).find_closest_sents(centroids)
+            self.__cuts[n_clusters] = sorted(closest_sentences.values())
+
+        return list(self.__cuts[n_clusters])
+
+
+    def select_sentences(self, sent_ratio: float = 0.2, num_sentences: int = None, use_first_sent: bool = True) -> List[int]:
+        """Determines the sentences of a summary of the given length.
+
+        Args:
+            sent_ratio (float, optional): Ratio of the number of sentences that need to be returned. Defaults to 0.2
+            num_sentences (int, optional): Absolute number of sentences that need to be returned. Defaults to None.
+            use_first_sent (bool, optional): Whether the first sentence of the text should be included in the summary. Defaults to True.
+
+        Returns:
+            List[int]: Sorted indices of the summary sentences.
+        """
+        if not self.__sentences:
+            return []
+        closest_sent_indices = self.cut(compute_num_clusters(len(self.__sentences), sent_ratio, num_sentences))
+
+        # Include the index of the first sentence if *useFirstSent* is set to true
+        if use_first_sent:
+            if not closest_sent_indices:
+                closest_sent_indices.append(0)
+            elif closest_sent_indices[0] != 0:
+                closest_sent_indices.insert(0 , 0)
+
+        return closest_sent_indices
+
+
+class SummaryHierarchyCache(object):
+    """The class that keeps the hierarchies of recently summarized texts, so that follow-up requests with a different summary length skip the sentence separation and the BERT model.
+
+    Attributes:
+        __max_entries: int
+            Maximum number of hierarchies kept in memory.
+        __entries: OrderedDict
+            Hierarchies kept in memory, ordered from the least to the most recently used.
+        __lock: threading.Lock
+            Lock guarding the cache against concurrent requests.
+
+    Methods:
+        get_max_entries():
+            Retrieves the maximum number of hierarchies kept in memory stored in a private class variable.
+        create_key(content: str, min_length: int, max_length: int):
+            Creates the key of the hierarchy of a text.
+        get(key: str):
+            Retrieves the cached hierarchy of the given key.
+        put(key: str, hierarchy: SummaryHierarchy):
+            Stores the hierarchy under the given key.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        """Initializes an instance of the SummaryHierarchyCache class.
+
+        Args:
+            max_entries (int, optional): Maximum number of hierarchies kept in memory. Defaults to 32.
+        """
+        self.__max_entries = max_entries
+        self.__entries = OrderedDict()
+        self.__lock = threading.Lock()
+
+
+    def get_max_entries(self) -> int:
+        """Retrieves the maximum number of hierarchies kept in memory stored in a private class variable.
+
+        Returns:
+            int: Maximum number of hierarchies kept in memory.
+        """
+        return self.__max_entries
+
+
+    @staticmethod
+    def create_key(content: str, min_length: int, max_length: int) -> str:
+        """Creates the key of the hierarchy of a text.
+
+        Args:
+            content (str): Text of the hierarchy.
+            min_length (int): Minimum character length of the sentences.
+            max_length (int): Maximum character length of the sentences.
+
+        Returns:
+            str: Hexadecimal SHA-256 digest identifying the hierarchy.
+        """
+        return hashlib.sha256(json.dumps([content, min_length, max_length]).encode("utf-8")).hexdigest()
+
+
+    def get(self, key: str) -> Union[SummaryHierarchy, None]:
+        """Retrieves the cached hierarchy of the given key.
+
+        Args:
+            key (str): Key of the hierarchy (see create_key).
+
+        Returns:
+            Union[SummaryHierarchy, None]: The hierarchy (None if it isn't cached).
+        """
+        with self.__lock:
+            hierarchy = self.__entries.get(key)
+            if hierarchy is not None:
+                self.__entries.move_to_end(key)
+            return hierarchy
+
+
+    def put(self, key: str, hierarchy: SummaryHierarchy):
+        """Stores the hierarchy under the given key (the least recently used hierarchy is evicted if the cache is full).
+
+        Args:
+            key (str): Key of the hierarchy (see create_key).
+            hierarchy (SummaryHierarchy): The stored hierarchy.
+        """
+        if self.__max_entries <= 0:
+            return
+        with self.__lock:
+            self.__entries[key] = hierarchy
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
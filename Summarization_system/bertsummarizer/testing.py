@@ -3,9 +3,10 @@ from datasets import load_metric
 from sentence_separator import SentenceSeparator
 from summarizer_model import SummarizerModel
 import time
+from itertools import islice
 
 
-def test_system( dataset_name="cnn_dailymail"):
+def test_system( dataset_name="cnn_dailymail", n_process=1, documents_per_batch=64, batch_size=32):
     # define model
     summarizer = SummarizerModel()
     # define sentence separator
@@ -27,48 +28,64 @@ def test_system( dataset_name="cnn_dailymail"):
     print("  "+ str(dataset_length) + " records")
     print(" ------------- TESTING ... -------------------")
 
+    # the texts and gold summaries are separated by the same worker processes (both separators use the same language and engine)
+    pool = sent_sep.create_pool(n_process) if n_process > 1 else None
+
     start_time = time.time()
 
     if dataset_name=="cnn_dailymail":
-        # test model on dataset CNN / DAILY MAIL
-        for num,test_case in enumerate(dataset):
-            # extract text and summary
-            text = test_case["article"]
-            gold_summary = test_case["highlights"]
-            # create a summary using the model
-            numOfSents = len(sent_sep(gold_summary, min_length=20))
-            model_summary = summarizer(text, num_sentences=numOfSents, min_length=40, use_first_sent=False)
-            # add the prediction to the memory
-            metric.add(prediction=model_summary, reference=gold_summary)
-            if ( (num + 1) % 100) == 0:
-                checkpoint = time.time()
-                time_for_one = (checkpoint-start_time)/(num+1)
-                estimated_seconds = time_for_one*(dataset_length-(num+1))
-                estimated_hours = estimated_seconds/3600
-                estimated_hours = round(estimated_hours, 2)
-                print("--- TEST CASE: " + str(num+1) + " ---- ESTIMATED TIME: " + str(int(estimated_seconds))+ "s, "+ str(int(estimated_hours))+ "h "+str(int((estimated_hours % 1)*60))+ "min")
+        # separate the texts and gold summaries in bulk (sentences are yielded lazily, in the order of the test cases)
+        text_sents = summarizer.get_sentence_separator().process_contents((test_case["article"] for test_case in dataset), min_length=40, n_process=n_process, pool=pool)
+        gold_sents = sent_sep.process_contents((test_case["highlights"] for test_case in dataset), min_length=20, n_process=n_process, pool=pool)
+        test_cases = zip(dataset, text_sents, gold_sents)
+        num = 0
+        # test model on dataset CNN / DAILY MAIL (the sentences of several texts are embedded together)
+        for batch in iter(lambda: list(islice(test_cases, documents_per_batch)), []):
+            # create the summaries using the model (the number of sentences of each summary is the number of sentences of its gold summary)
+            model_sents = summarizer.cluster_sentences_batch([sentences for _, sentences, _ in batch], num_sentences=[len(gold_sentences) for _, _, gold_sentences in batch], use_first_sent=False, batch_size=batch_size)
+            for (test_case, _, _), sentences in zip(batch, model_sents):
+                # extract summary
+                gold_summary = test_case["highlights"]
+                model_summary = ' '.join(sentences)
+                # add the prediction to the memory
+                metric.add(prediction=model_summary, reference=gold_summary)
+                num += 1
+                if ( num % 100) == 0:
+                    checkpoint = time.time()
+                    time_for_one = (checkpoint-start_time)/num
+                    estimated_seconds = time_for_one*(dataset_length-num)
+                    estimated_hours = estimated_seconds/3600
+                    estimated_hours = round(estimated_hours, 2)
+                    print("--- TEST CASE: " + str(num) + " ---- ESTIMATED TIME: " + str(int(estimated_seconds))+ "s, "+ str(int(estimated_hours))+ "h "+str(int((estimated_hours % 1)*60))+ "min")
     
     elif dataset_name=="newsroom":
-        # test model on dataset NEWSROOM
-        for num,test_case in enumerate(dataset):
-            # extract text and summary
-            text = test_case["text"]
-            gold_summary = test_case["summary"]
-            # create a summary using the model
-            numOfSents = len(sent_sep(gold_summary, min_length=20))
-            model_summary = summarizer(text, num_sentences=numOfSents, min_length=40, use_first_sent=False)
-            # add the prediction to the memory
-            metric.add(prediction=model_summary, reference=gold_summary)
-            if num == 9999:
-                break
-            if ( (num + 1) % 100) == 0:
-                checkpoint = time.time()
-                time_for_one = (checkpoint-start_time)/(num+1)
-                estimated_seconds = time_for_one*(9999-num)
-                estimated_hours = estimated_seconds/3600
-                print("--- TEST CASE: " + str(num+1) + " ---- ESTIMATED TIME: " + str(int(estimated_seconds))+ "s, "+ str(int(estimated_hours))+ "h "+str(int((estimated_hours % 1)*60))+ "min")
+        # separate the texts and gold summaries in bulk (sentences are yielded lazily, in the order of the test cases)
+        text_sents = summarizer.get_sentence_separator().process_contents((test_case["text"] for test_case in dataset), min_length=40, n_process=n_process, pool=pool)
+        gold_sents = sent_sep.process_contents((test_case["summary"] for test_case in dataset), min_length=20, n_process=n_process, pool=pool)
+        # only the first 10000 test cases are used
+        test_cases = islice(zip(dataset, text_sents, gold_sents), 10000)
+        num = 0
+        # test model on dataset NEWSROOM (the sentences of several texts are embedded together)
+        for batch in iter(lambda: list(islice(test_cases, documents_per_batch)), []):
+            # create the summaries using the model (the number of sentences of each summary is the number of sentences of its gold summary)
+            model_sents = summarizer.cluster_sentences_batch([sentences for _, sentences, _ in batch], num_sentences=[len(gold_sentences) for _, _, gold_sentences in batch], use_first_sent=False, batch_size=batch_size)
+            for (test_case, _, _), sentences in zip(batch, model_sents):
+                # extract summary
+                gold_summary = test_case["summary"]
+                model_summary = ' '.join(sentences)
+                # add the prediction to the memory
+                metric.add(prediction=model_summary, reference=gold_summary)
+                num += 1
+                if ( num % 100) == 0:
+                    checkpoint = time.time()
+                    time_for_one = (checkpoint-start_time)/num
+                    estimated_seconds = time_for_one*(10000-num)
+                    estimated_hours = estimated_seconds/3600
+                    print("--- TEST CASE: " + str(num) + " ---- ESTIMATED TIME: " + str(int(estimated_seconds))+ "s, "+ str(int(estimated_hours))+ "h "+str(int((estimated_hours % 1)*60))+ "min")
     
     end_time = time.time()
+    if pool is not None:
+        pool.terminate()
 
     print(" ------------- TESTING DONE! -------------------")
     # print elapsed time
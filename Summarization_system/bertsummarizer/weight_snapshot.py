@@ -0,0 +1,201 @@
+import argparse
+import contextlib
+import json
+import os
+from typing import Dict, List, Union
+
+import numpy as np
+import torch
+
+
+# Byte alignment of every tensor in the snapshot file
+TENSOR_ALIGNMENT = 64
+
+# Name of the weight file in the directory of a model snapshot
+SNAPSHOT_WEIGHTS_NAME = "weights.bin"
+
+
+def manifest_path(path: str) -> str:
+    """Retrieves the path of the manifest stored next to a weight snapshot.
+
+    Args:
+        path (str): Path of the weight snapshot.
+
+    Returns:
+        str: Path of the manifest file.
+    """
+    return path + ".json"
+
+
+def read_manifest(path: str) -> Dict[str, Union[Dict, List[Dict]]]:
+    """Reads the manifest of a weight snapshot.
+
+    Args:
+        path (str): Path of the weight snapshot.
+
+    Returns:
+        Dict[str, Union[Dict, List[Dict]]]: Identity of the model (None for the snapshots stored without it) and the name, dtype, shape and offset of every tensor.
+    """
+    with open(manifest_path(path), "r") as manifest_file:
+        manifest = json.load(manifest_file)
+    # Older snapshots stored only the list of tensors
+    if isinstance(manifest, list):
+        return {"identity": None, "tensors": manifest}
+    return manifest
+
+
+def save_weight_snapshot(model: torch.nn.Module, path: str, identity: Dict[str, Union[str, int]] = None) -> Dict[str, Union[Dict, List[Dict]]]:
+    """Writes the parameters and buffers of a model into one flat file which can be memory-mapped by other processes.
+
+    The file is written under a temporary name and renamed afterwards, so that processes starting at the same time never attach
+    to a partially written snapshot.
+
+    Args:
+        model (torch.nn.Module): Model whose weights are stored.
+        path (str): Path of the snapshot file. The name, dtype, shape and offset of every tensor are stored in a manifest next to it (see manifest_path).
+        identity (Dict[str, Union[str, int]], optional): Settings identifying the model (e.g. its version and number of layers), stored in the manifest. Defaults to None.
+
+    Returns:
+        Dict[str, Union[Dict, List[Dict]]]: Manifest of the snapshot.
+    """
+    tensors = []
+    temporary_path = path + "." + str(os.getpid()) + ".tmp"
+    with open(temporary_path, "wb") as snapshot_file:
+        for name, tensor in list(model.named_parameters()) + list(model.named_buffers()):
+            array = tensor.detach().cpu().numpy()
+            # Pad the file, so that every tensor starts at an aligned offset
+            offset = -(-snapshot_file.tell() // TENSOR_ALIGNMENT) * TENSOR_ALIGNMENT
+            snapshot_file.write(b"\0" * (offset - snapshot_file.tell()))
+            snapshot_file.write(np.ascontiguousarray(array).tobytes())
+            tensors.append({"name": name, "dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+
+    manifest = {"identity": identity, "tensors": tensors}
+    with open(temporary_path + ".json", "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+    os.replace(temporary_path + ".json", manifest_path(path))
+    os.replace(temporary_path, path)
+    return manifest
+
+
+def attach_weight_snapshot(model: torch.nn.Module, path: str) -> torch.nn.Module:
+    """Replaces the parameters and buffers of a model with copy-on-write views of a memory-mapped weight snapshot.
+
+    Pages of the snapshot are shared by every process which maps it (through the page cache), so a model attached in several
+    worker processes occupies the memory of its weights only once. A process which writes into a weight gets a private copy of
+    the written page only.
+
+    Args:
+        model (torch.nn.Module): Model with the same architecture as the model the snapshot was saved from.
+        path (str): Path of the snapshot file (see save_weight_snapshot).
+
+    Returns:
+        torch.nn.Module: The same model, with its weights backed by the snapshot.
+    """
+    manifest = read_manifest(path)["tensors"]
+    # Mode 'c' maps the file copy-on-write (the arrays are writable, but writes never reach the file)
+    snapshot = np.memmap(path, mode="c")
+
+    expected_names = {name for name, _ in list(model.named_parameters()) + list(model.named_buffers())}
+    stored_names = {entry["name"] for entry in manifest}
+    if expected_names != stored_names:
+        raise ValueError("The weight snapshot at '" + path + "' doesn't match the model (" + str(len(expected_names ^ stored_names)) + " tensors differ).")
+
+    for entry in manifest:
+        dtype = np.dtype(entry["dtype"])
+        num_bytes = int(np.prod(entry["shape"], dtype=np.int64)) * dtype.itemsize
+        array = snapshot[entry["offset"]:entry["offset"] + num_bytes].view(dtype).reshape(entry["shape"])
+        tensor = torch.from_numpy(array)
+
+        # Find the module owning the tensor and replace the tensor without copying it
+        module_name, _, tensor_name = entry["name"].rpartition(".")
+        module = model
+        for attribute in module_name.split(".") if module_name else []:
+            module = getattr(module, attribute)
+        if tensor_name in module._parameters:
+            module._parameters[tensor_name] = torch.nn.Parameter(tensor, requires_grad=False)
+        else:
+            module._buffers[tensor_name] = tensor
+
+    return model
+
+
+def save_model_snapshot(model: torch.nn.Module, tokenizer, directory: str, identity: Dict[str, Union[str, int]] = None):
+    """Stores the configuration, tokenizer and weights of a model into a directory, so that the model can be loaded without parsing its checkpoint.
+
+    The weight file is written last, so a directory with the weight file always contains the complete snapshot.
+
+    Args:
+        model (torch.nn.Module): Model whose snapshot is stored (an instance of a transformers model class).
+        tokenizer (PreTrainedTokenizer): Tokenizer of the model.
+        directory (str): Directory of the snapshot (created if it doesn't exist).
+        identity (Dict[str, Union[str, int]], optional): Settings identifying the model, checked by has_model_snapshot. Defaults to None.
+    """
+    os.makedirs(directory, exist_ok=True)
+    model.config.save_pretrained(directory)
+    tokenizer.save_pretrained(directory)
+    save_weight_snapshot(model, os.path.join(directory, SNAPSHOT_WEIGHTS_NAME), identity=identity)
+
+
+def has_model_snapshot(directory: str, identity: Dict[str, Union[str, int]] = None) -> bool:
+    """Checks whether the directory contains a complete model snapshot (of the identified model).
+
+    Args:
+        directory (str): Directory of the snapshot.
+        identity (Dict[str, Union[str, int]], optional): Settings identifying the model, which have to match the settings stored in the manifest. Defaults to None (any model).
+
+    Returns:
+        bool: Whether the snapshot exists.
+    """
+    weights_path = os.path.join(directory, SNAPSHOT_WEIGHTS_NAME)
+    if not (os.path.exists(weights_path) and os.path.exists(manifest_path(weights_path))):
+        return False
+    return identity is None or read_manifest(weights_path)["identity"] == identity
+
+
+@contextlib.contextmanager
+def skip_weight_initialization(model_class: type):
+    """Creates the context in which a model is built without initializing its weights (used for the models whose weights are replaced by a snapshot).
+
+    Since PyTorch 2.0 the model is built on the 'meta' device, which doesn't allocate its tensors at all. Older versions allocate the
+    tensors, but skip the random initialization of the model and of its Linear, Embedding and LayerNorm layers. Either way, the weights
+    are only usable after they are replaced (see attach_weight_snapshot).
+
+    Args:
+        model_class (type): Class of the built model (a transformers model class, whose _init_weights method initializes every submodule).
+    """
+    if hasattr(torch.device, "__enter__"):
+        with torch.device("meta"):
+            yield
+        return
+
+    patched = [(module, "reset_parameters") for module in (torch.nn.Linear, torch.nn.Embedding, torch.nn.LayerNorm)] + [(model_class, "_init_weights")]
+    # Keep the attributes defined by the class itself (inherited attributes are restored by deleting the patch)
+    originals = [vars(owner).get(name) for owner, name in patched]
+    try:
+        for owner, name in patched:
+            setattr(owner, name, lambda self, *args: None)
+        yield
+    finally:
+        for (owner, name), original in zip(patched, originals):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+
+
+if __name__ == "__main__":
+    from bert_wrapper import BertWrapper
+    from encoder_registry import get_encoder_spec
+
+    parser = argparse.ArgumentParser(description="Converts a pretrained model into a snapshot which loads without parsing the checkpoint.")
+    parser.add_argument("directory", help="directory of the snapshot")
+    parser.add_argument("--bert-version", default='bert-large-uncased')
+    parser.add_argument("--encoder", default=None, help="name of a registered encoder (replaces the BERT version)")
+    args = parser.parse_args()
+
+    if args.encoder is not None:
+        spec = get_encoder_spec(args.encoder)
+        BertWrapper(model_version=spec.model_version, architecture=spec.architecture, num_layers=spec.num_layers, tokenizer_version=spec.tokenizer_version, snapshot_dir=args.directory)
+    else:
+        BertWrapper(model_version=args.bert_version, snapshot_dir=args.directory)
+    print(" -> Snapshot stored in : " + args.directory)
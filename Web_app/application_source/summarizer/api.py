@@ -1,14 +1,113 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+import contextlib
 import json
+import threading
 
-from bertsummarizer.summarizer_model import SummarizerModel
 
+# The model is loaded on first use (see get_model), so importing this module doesn't import torch and transformers
+_model = None
+_model_lock = threading.Lock()
+
+# Summarization model loaded in the server's master process before the workers are forked (see preload_model)
+_preloaded_model = None
+
+
+# ---------------------------------------------------------
+#   Function for creating the summarization model
+# ---------------------------------------------------------
+def create_summarizer_model():
+
+    # Heavy imports are deferred until the model is needed
+    from bertsummarizer.embedding_cache import EmbeddingCache
+    from bertsummarizer.summarizer_model import SummarizerModel
+
+    # Define the embedding cache and the model (their options are set in the project settings)
+    embedding_cache = EmbeddingCache(**settings.SUMMARIZER_EMBEDDING_CACHE) if settings.SUMMARIZER_EMBEDDING_CACHE is not None else None
+    return SummarizerModel(embedding_cache=embedding_cache, **settings.SUMMARIZER_MODEL_OPTIONS)
+
+
+# ---------------------------------------------------------
+#   Function for loading the model before the workers fork
+# ---------------------------------------------------------
+def preload_model():
+
+    global _preloaded_model
+
+    # The replicas of an inference pool are spawned processes which load their own models, and neither the pool's management
+    # thread nor its replicas would belong to the forked workers
+    if settings.SUMMARIZER_INFERENCE_POOL is not None:
+        raise ImproperlyConfigured("SUMMARIZER_PRELOAD can't be combined with SUMMARIZER_INFERENCE_POOL (the replicas load their own models).")
+
+    # Only the weights of the summarization model are loaded: the threads of a pipeline don't survive the fork, and the thread
+    # pools of torch and of the clustering (started by the first forward pass and fit) aren't fork-safe, so the pipeline is
+    # created and the model is warmed up in every worker (see get_model)
+    with _model_lock:
+        if _preloaded_model is None:
+            _preloaded_model = create_summarizer_model()
+
+
+# ---------------------------------------------------------
+#   Function for loading (and warming up) the model
+# ---------------------------------------------------------
+def get_model():
+
+    global _model
+
+    with _model_lock:
+        if _model is None:
+            # Heavy imports are deferred until the model is needed
+            from bertsummarizer.inference_pool import InferencePool
+            from bertsummarizer.pipeline_executor import PipelineExecutor
+
+            # Define the model (its options are set in the project settings)
+            # -- with an inference pool, every replica runs in its own process with its own cache
+            if settings.SUMMARIZER_INFERENCE_POOL is not None:
+                model = InferencePool(model_options=settings.SUMMARIZER_MODEL_OPTIONS, embedding_cache_options=settings.SUMMARIZER_EMBEDDING_CACHE, **settings.SUMMARIZER_INFERENCE_POOL)
+            else:
+                # -- a preloaded model is shared with the master process
+                model = _preloaded_model if _preloaded_model is not None else create_summarizer_model()
+                # -- with a pipeline, the stages of the model work on different requests at the same time
+                if settings.SUMMARIZER_PIPELINE is not None:
+                    model = PipelineExecutor(model, **settings.SUMMARIZER_PIPELINE)
+
+            # Run a dummy batch before the model is marked as ready
+            if settings.SUMMARIZER_WARM_UP:
+                model.warm_up()
+            _model = model
+
+    return _model
+
+
+# ---------------------------------------------------------
+#   Function for loading the model in a background thread
+# ---------------------------------------------------------
+def load_model_in_background():
+
+    threading.Thread(target=get_model, daemon=True).start()
+
+
+# --------------------------------------------
+#   Handler for the 'ready' url path
+# --------------------------------------------
+@api_view(['GET',])
+def readiness(request):
+
+    # The worker is ready once the model is loaded and warmed up
+    if _model is None:
+        return Response(
+            data = {"ready": False},
+            status = status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+    return Response(
+        data = {"ready": True}
+    )
 
-# Define the model
-model = SummarizerModel()
 
 # --------------------------------------------
 #   Handler for the 'summarize' url path
@@ -29,7 +128,7 @@ def summary_computation(request):
     # Validate the names of the request parameters
     if not validateParameterNames(req):
         return Response(
-            data = {"detail": "Malformed request body. Incorrect parameters provided. A set of correct parameters: \"text\", \"numOfSents\", \"sentRatio\", \"useFirstSent\". "},
+            data = {"detail": "Malformed request body. Incorrect parameters provided. A set of correct parameters: \"text\", \"numOfSents\", \"sentRatio\", \"useFirstSent\", \"lengths\". "},
             status = status.HTTP_400_BAD_REQUEST
         )
     
@@ -70,13 +169,51 @@ def summary_computation(request):
             status = status.HTTP_400_BAD_REQUEST
         )
  
+    # Record the time of every stage of the model if requested in the settings (the modules of the model import each other
+    # by their top-level names, so the trace has to be imported the same way to share their context variable)
+    trace = None
+    if settings.SUMMARIZER_SERVER_TIMING:
+        from profiling import StageTrace
+        trace = StageTrace()
+
+    # Validate the additional summary lengths (if provided)
+    lengths = req.get("lengths", None)
+    if lengths is not None:
+        error_message, lengths = validateLengths(lengths)
+        if error_message:
+            return Response(
+                data = {"detail": error_message},
+                status = status.HTTP_400_BAD_REQUEST
+            )
+
     # Use the model to make a summary
-    summary = model(content=content , sent_ratio=sentenceRatio, num_sentences=numberOfSentences, use_first_sent=useFirstSent)
+    model = get_model()
+    with trace or contextlib.nullcontext():
+        # Compute the summaries of the additional lengths from one clustering of the text, whose sentence embeddings are
+        # shared with the main summary (the main summary doesn't depend on the additional lengths)
+        if lengths is not None:
+            summary, summaries = model.summarize_with_lengths(content=content, lengths=lengths, sent_ratio=sentenceRatio, num_sentences=numberOfSentences, use_first_sent=useFirstSent)
+        else:
+            summary = model(content=content , sent_ratio=sentenceRatio, num_sentences=numberOfSentences, use_first_sent=useFirstSent)
 
-    # Return a response containing the summary  
-    return Response(
-        data={"content":summary}
-    )
+    # Return a response containing the summary (and the summaries of the additional lengths)
+    data = {"content":summary}
+    if lengths is not None:
+        data["summaries"] = summaries
+    return addServerTiming(Response(
+        data=data
+    ), trace)
+
+
+# ---------------------------------------------------------
+#   Function for adding the stage times to a response
+# ---------------------------------------------------------
+def addServerTiming(response, trace):
+
+    # The Server-Timing header is shown by the developer tools of the browsers (stages are nested, e.g. 'summarize' contains the others)
+    if trace is not None:
+        response["Server-Timing"] = trace.server_timing()
+    return response
     
 
 # ---------------------------------------------------------
@@ -85,7 +222,7 @@ def summary_computation(request):
 def validateParameterNames(requestBody):
 
     # A set of valid parameter names
-    valid_parameters = ["text", "numOfSents", "sentRatio", "useFirstSent"]
+    valid_parameters = ["text", "numOfSents", "sentRatio", "useFirstSent", "lengths"]
 
     # Extract the body's parameter names and check if they are valid
     request_parameters = requestBody.keys()
@@ -150,6 +287,36 @@ def validateParameterTypes(content, numberOfSentences, sentenceRatio, useFirstSe
     return (False, request_parameters)
 
 
+# ---------------------------------------------------------
+#   Function for checking the additional summary lengths
+# ---------------------------------------------------------
+def validateLengths(lengths):
+
+    error_message = "Malformed request body. The parameter \"lengths\" must be a list of integers (number of sentences in the [1 - 999] range) or floats (sentence ratio in the [0.05 - 1.0] range), with at most 20 values."
+
+    # The lengths could be sent as a comma separated string, so try to convert them to numbers
+    if type(lengths) == str:
+        try:
+            lengths = [float(length) if "." in length else int(length) for length in lengths.split(",")]
+        except ValueError:
+            return (error_message, None)
+    if type(lengths) != list or len(lengths) > 20:
+        return (error_message, None)
+
+    # Check the type and range of every length
+    for length in lengths:
+        if type(length) == int:
+            if not ( length >= 1 and length <= 999 ):
+                return (error_message, None)
+        elif type(length) == float:
+            if not ( length >= 0.05 and length <= 1.0 ):
+                return (error_message, None)
+        else:
+            return (error_message, None)
+
+    return (False, lengths)
+
+
 # ---------------------------------------------------------
 #   Function for checking if the parameter values are
 #   in the appropriate range.
@@ -1,6 +1,11 @@
-from django.test import TestCase, Client
+from django.test import SimpleTestCase, TestCase, Client, override_settings
+import itertools
 import json
 
+import numpy as np
+
+from . import api
+
 class ApiTest(TestCase):
 
     # Define the variables before the testing starts
@@ -70,7 +75,7 @@ class ApiTest(TestCase):
         response = self.client.post( path = '/summarize' , data = request_body )
 
         self.assertEqual (response.status_code , 400)
-        self.assertEqual (json.loads(response.content)["detail"], "Malformed request body. Incorrect parameters provided. A set of correct parameters: \"text\", \"numOfSents\", \"ratio\", \"useFirstSent\". ")
+        self.assertEqual (json.loads(response.content)["detail"], "Malformed request body. Incorrect parameters provided. A set of correct parameters: \"text\", \"numOfSents\", \"sentRatio\", \"useFirstSent\", \"lengths\". ")
     
 
     # Send a request with a body lacking the *text* parameter (which is required)
@@ -212,4 +217,188 @@ class ApiTest(TestCase):
         response = self.client.post( path = '/summarize' , data = request_body )
 
         self.assertEqual (response.status_code , 200)
-        self.assertEqual (json.loads(response.content)["content"], self.expectedSummary )
\ No newline at end of file
+        self.assertEqual (json.loads(response.content)["content"], self.expectedSummary )
+
+    # Send a request with a body containing a parameter *lengths* with a value in the incorrect range
+    def test_incorrect_lengths(self):
+
+        # Define the request body and send the request
+        request_body = {
+            "text" : self.textToSummarize,
+            "numOfSents" : 6,
+            "lengths" : [3, 1.25]
+        }
+        response = self.client.post( path = '/summarize' , data = request_body , content_type="application/json")
+
+        self.assertEqual (response.status_code , 400)
+        self.assertEqual (json.loads(response.content)["detail"], "Malformed request body. The parameter \"lengths\" must be a list of integers (number of sentences in the [1 - 999] range) or floats (sentence ratio in the [0.05 - 1.0] range), with at most 20 values.")
+
+
+    # Send a request for several summary lengths and check the number of sentences of each summary
+    def test_summary_lengths(self):
+
+        # Define the request body and send the request
+        request_body = {
+            "text" : self.textToSummarize,
+            "numOfSents" : 6,
+            "useFirstSent": False,
+            "lengths" : [3, 5]
+        }
+        response = self.client.post( path = '/summarize' , data = request_body , content_type="application/json")
+        summaries = json.loads(response.content)["summaries"]
+
+        self.assertEqual (response.status_code , 200)
+        self.assertEqual (len(summaries) , 2)
+        self.assertEqual (len(api.get_model().separate_sentences(summaries[0])) , 3)
+        self.assertEqual (len(api.get_model().separate_sentences(summaries[1])) , 5)
+
+    # Check that the additional summary lengths don't change the main summary
+    def test_summary_lengths_content(self):
+
+        # Define the request body and send the request (once without and once with the additional lengths)
+        request_body = {
+            "text" : self.textToSummarize,
+            "numOfSents" : 6,
+            "useFirstSent": True
+        }
+        response = self.client.post( path = '/summarize' , data = request_body , content_type="application/json")
+        request_body["lengths"] = [3, 5]
+        response_with_lengths = self.client.post( path = '/summarize' , data = request_body , content_type="application/json")
+
+        self.assertEqual (response_with_lengths.status_code , 200)
+        self.assertEqual (json.loads(response_with_lengths.content)["content"] , json.loads(response.content)["content"])
+
+    # Check that the main summary and the summaries of the additional lengths share one calculation of the sentence embeddings
+    def test_summary_with_lengths_embedding(self):
+
+        from profiling import StageTrace
+
+        # Summarize a text whose hierarchy isn't cached yet
+        with StageTrace() as trace:
+            summary, summaries = api.get_model().summarize_with_lengths(content=self.textToSummarize + " And that is the end of the story about the comets.", lengths=[3, 5], num_sentences=6)
+
+        self.assertEqual (trace.get_stages()["separate_sentences"]["calls"] , 1)
+        self.assertEqual (trace.get_stages()["embed"]["calls"] , 1)
+        self.assertEqual (len(summaries) , 2)
+
+    # Check that the memoized (fast) tokenization gives the same vocabulary IDs as the BertTokenizer
+    def test_tokenization(self):
+
+        bert_model = api.get_model().get_bert_model()
+        sentences = [sentence.strip() for sentence in self.textToSummarize.strip().split("\n")] + ["Naïve café owners, e.g. Mr. O'Neil, paid $3.50 (twice)!"]
+
+        # Tokenize the sentences twice, so that the second time every word is memoized
+        for _ in range(2):
+            self.assertEqual (bert_model.tokenize_batch(sentences) , [bert_model.convert_tokens_into_ids(bert_model.tokenize_text(sentence)) for sentence in sentences])
+
+    # Check that the sentences separated from a stream of chunks match the sentences separated from the whole text
+    def test_stream_sentences(self):
+
+        from bertsummarizer.sentence_separator import SentenceSeparator
+
+        # Sentences close to the maximum length end at the chunk boundaries for some of the chunk sizes
+        content = self.textToSummarize * 5
+        for separator in (api.get_model().get_sentence_separator(), SentenceSeparator(engine='rules')):
+            expected_sentences = separator.process_content_with_offsets(content, min_length=40, max_length=200)
+            for chunk_size in (64, 100, 257, 1000):
+                self.assertEqual (list(separator.stream_sentences(content, min_length=40, max_length=200, chunk_size=chunk_size)) , expected_sentences)
+
+    # Check that the stage times are returned in the Server-Timing header if requested in the settings
+    @override_settings(SUMMARIZER_SERVER_TIMING=True)
+    def test_server_timing(self):
+
+        # Define the request body and send the request
+        request_body = {
+            "text" : self.textToSummarize,
+            "numOfSents" : 3
+        }
+        response = self.client.post( path = '/summarize' , data = request_body , content_type="application/json")
+
+        self.assertEqual (response.status_code , 200)
+        self.assertIn ("summarize;dur=" , response["Server-Timing"])
+        self.assertIn ("forward_pass;dur=" , response["Server-Timing"])
+
+    # Check that the worker reports it's ready once the model is loaded
+    def test_readiness(self):
+
+        # Load the model (and warm it up) and send the request
+        api.get_model()
+        response = self.client.get( path = '/ready' )
+
+        self.assertEqual (response.status_code , 200)
+        self.assertEqual (json.loads(response.content)["ready"], True)
+
+
+class KMeansWrapperTest(SimpleTestCase):
+
+    # Assignment of the sentences to the centroids by the original double loop (the closest unused sentence for the centroids in order)
+    def originalClosestSents(self, sent_embeddings, cluster_centroids):
+
+        used_sent_indexes = []
+        closest_sentences = {}
+        for cent_num, centroid in enumerate(cluster_centroids):
+            min_distance = 1e10
+            curr_sent_num = -1
+            for sent_num, sent_features in enumerate(sent_embeddings):
+                distance = np.linalg.norm(sent_features - centroid)
+                if distance < min_distance and sent_num not in used_sent_indexes:
+                    curr_sent_num = sent_num
+                    min_distance = distance
+            used_sent_indexes.append(curr_sent_num)
+            closest_sentences[cent_num] = curr_sent_num
+        return closest_sentences
+
+    # Random embeddings and centroids, including exact ties (small integer coordinates), duplicate embeddings and centroids placed on embeddings
+    def randomCases(self):
+
+        rng = np.random.default_rng(12345)
+        for case in range(150):
+            num_sents = int(rng.integers(1, 12))
+            num_centroids = int(rng.integers(1, num_sents + 1))
+            if case % 3 == 0:
+                sent_embeddings = rng.integers(0, 3, size=(num_sents, 4)).astype(np.float32)
+                cluster_centroids = rng.integers(0, 5, size=(num_centroids, 4)) / 2
+            else:
+                sent_embeddings = rng.normal(size=(num_sents, 4)).astype(np.float32)
+                cluster_centroids = rng.normal(size=(num_centroids, 4))
+            if case % 3 == 1:
+                sent_embeddings[rng.integers(0, num_sents, size=num_sents // 2)] = sent_embeddings[0]
+                cluster_centroids[0] = sent_embeddings[-1]
+            yield sent_embeddings, cluster_centroids
+
+    # Check that the vectorized 'greedy' assignment selects the same sentences as the original loop
+    def test_greedy_assignment(self):
+
+        from bertsummarizer.kmeans_wrapper import KMeansWrapper
+
+        # Exact ties are resolved in favour of the lower index
+        sent_embeddings = np.array([[0, 0], [2, 0], [2, 0], [1, 1]], dtype=np.float32)
+        cluster_centroids = np.array([[1, 0], [1, 0], [2, 0]])
+        wrapper = KMeansWrapper(sent_embeddings, num_sentences=3, backend='numpy')
+        self.assertEqual (wrapper.find_closest_sents(cluster_centroids) , {0: 0, 1: 1, 2: 2})
+
+        for sent_embeddings, cluster_centroids in self.randomCases():
+            wrapper = KMeansWrapper(sent_embeddings, num_sentences=len(cluster_centroids), backend='numpy', assignment='greedy')
+            self.assertEqual (wrapper.find_closest_sents(cluster_centroids) , self.originalClosestSents(sent_embeddings, cluster_centroids))
+
+    # Check that the 'optimal' assignment is one-to-one and has the minimum total distance
+    def test_optimal_assignment(self):
+
+        from bertsummarizer.kmeans_wrapper import KMeansWrapper
+
+        for sent_embeddings, cluster_centroids in self.randomCases():
+            if len(sent_embeddings) > 7:
+                continue
+            wrapper = KMeansWrapper(sent_embeddings, num_sentences=len(cluster_centroids), backend='numpy', assignment='optimal')
+            closest_sentences = wrapper.find_closest_sents(cluster_centroids)
+            distances = np.linalg.norm(sent_embeddings[None, :, :] - cluster_centroids[:, None, :], axis=2)
+            minimum_distance = min(sum(distances[cent_num, sent_num] for cent_num, sent_num in enumerate(sent_indices))
+                                   for sent_indices in itertools.permutations(range(len(sent_embeddings)), len(cluster_centroids)))
+
+            self.assertEqual (sorted(closest_sentences.keys()) , list(range(len(cluster_centroids))))
+            self.assertEqual (len(set(closest_sentences.values())) , len(cluster_centroids))
+            self.assertAlmostEqual (sum(distances[cent_num, sent_num] for cent_num, sent_num in closest_sentences.items()) , minimum_distance, places=5)
+
+            # The original loop never finds a smaller total distance than the optimal assignment
+            greedy_sentences = self.originalClosestSents(sent_embeddings, cluster_centroids)
+            self.assertLessEqual (minimum_distance , sum(distances[cent_num, sent_num] for cent_num, sent_num in greedy_sentences.items()) + 1e-6)
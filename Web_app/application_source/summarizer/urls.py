@@ -7,5 +7,6 @@ urlpatterns = [
     path('home/', views.homepage_view, name='homepage2'),
     path('summarizer/', views.summary_request_form_view, name='summary-form'),
     path('api/', views.api_view, name='api'),
-    path('summarize', api.summary_computation, name='summary-computation')
+    path('summarize', api.summary_computation, name='summary-computation'),
+    path('ready', api.readiness, name='readiness')
 ]
\ No newline at end of file
@@ -125,3 +125,47 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.1/howto/static-files/
 
 STATIC_URL = '/static/'
+
+
+# Summarization model
+# Keyword arguments of the SummarizerModel used by the API (see bertsummarizer/summarizer_model.py),
+# e.g. {'engine': 'torchscript', 'compiled_model_path': '/path/to/encoder.pt'}
+
+SUMMARIZER_MODEL_OPTIONS = {}
+
+# Keyword arguments of the EmbeddingCache shared by the API requests (see bertsummarizer/embedding_cache.py),
+# e.g. {'max_entries': 20000, 'db_path': BASE_DIR / 'embeddings.sqlite3'}. Set to None to disable caching.
+
+SUMMARIZER_EMBEDDING_CACHE = None
+
+# The directory of a model snapshot can also be added to the model options, e.g. {'snapshot_dir': str(BASE_DIR / 'model_snapshot')},
+# so that the model loads without parsing its checkpoint and every process running the model maps the same weights.
+# Set SUMMARIZER_PRELOAD to True to load the model in the server's master process before the workers are forked (gunicorn --preload).
+
+SUMMARIZER_PRELOAD = False
+
+# Keyword arguments of the InferencePool which runs the model replicas in worker processes (see bertsummarizer/inference_pool.py),
+# e.g. {'num_replicas': 4, 'threads_per_replica': 8}. Set to None to run the model in the web server process.
+# The pool can't be combined with SUMMARIZER_PRELOAD: a pool created before the fork doesn't work in the forked workers, and its replicas
+# load their own models anyway (from the snapshot directory, if any, whose weights they share).
+
+SUMMARIZER_INFERENCE_POOL = None
+
+# Keyword arguments of the PipelineExecutor which runs the sentence separation, the BERT model and the clustering of concurrent requests
+# as overlapping stages (see bertsummarizer/pipeline_executor.py), e.g. {'separation_workers': 2, 'clustering_workers': 2, 'queue_size': 16}.
+# Set to None to run every request through all stages in its own thread (ignored with an inference pool).
+# WARNING: the threads of the pipeline don't survive a fork, so with SUMMARIZER_PRELOAD the pipeline is created in every worker
+# after the fork (only the model itself is preloaded). Don't create a PipelineExecutor in the master process in any other way.
+
+SUMMARIZER_PIPELINE = None
+
+# Whether the wall time of every stage of the model (sentence separation, tokenization, forward pass, clustering) is returned
+# in the Server-Timing header of the 'summarize' responses (see bertsummarizer/profiling.py). The stages of a model
+# running in an inference pool aren't recorded, since they run in other processes.
+
+SUMMARIZER_SERVER_TIMING = False
+
+# Whether a dummy batch is run through the model before it is marked as ready (see the 'ready' url path).
+# With SUMMARIZER_PRELOAD, every worker warms up the model after the fork (the master only loads the weights).
+
+SUMMARIZER_WARM_UP = True
@@ -7,10 +7,28 @@ For more information on this file, see
 https://docs.djangoproject.com/en/3.1/howto/deployment/wsgi/
 """
 
+import gc
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'summarizerApp.settings')
 
 application = get_wsgi_application()
+
+# Load the summarization model before the server forks its workers (e.g. gunicorn --preload), so that the workers share
+# the pages of the model instead of loading their own copies. Freezing the garbage collector keeps the collections in the
+# workers from writing into (and thereby copying) the pages of the preloaded objects. Threads don't survive the fork (and the
+# thread pools of torch aren't fork-safe), so every worker completes its model (e.g. the threads of a pipeline) and warms it
+# up in a background thread started right after the fork.
+# Otherwise the model is loaded in a background thread, and the worker reports that it's ready (the 'ready' url path)
+# once the model is loaded and warmed up.
+from summarizer import api
+
+if settings.SUMMARIZER_PRELOAD:
+    api.preload_model()
+    gc.freeze()
+    os.register_at_fork(after_in_child=api.load_model_in_background)
+else:
+    api.load_model_in_background()